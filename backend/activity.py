@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+# Günlük aktivite ve seri (streak). Her ilerleme olayı o günün satırını
+# artırır ve seriyi kullanıcının son aktif gününe bakarak hemen günceller;
+# okurken geçmiş taranmaz. Bir gün atlayanların serisi toplu tek bir UPDATE
+# ile sıfırlanır:
+#
+#   python activity.py              # kırılan serileri sıfırla (cron için)
+
+# Gün sınırı kullanıcıların saat dilimine göre belirlenir.
+ACTIVITY_TIMEZONE = ZoneInfo(os.getenv("ACTIVITY_TIMEZONE", "Europe/Istanbul"))
+# Uygulama içinde sıfırlama aralığı; 0 ise yalnızca cron/CLI ile çalışır.
+STREAK_RESET_INTERVAL_SECONDS = float(os.getenv("STREAK_RESET_INTERVAL_SECONDS", "3600"))
+
+
+def today() -> date:
+    return datetime.now(ACTIVITY_TIMEZONE).date()
+
+
+def current_streak(user: models.User, day: date | None = None) -> int:
+    # Sıfırlama işi henüz çalışmadıysa kırık seri gösterilmesin.
+    day = day or today()
+    last = user.last_active_date
+    if last is None or last < day - timedelta(days=1):
+        return 0
+    return int(user.streak or 0)
+
+
+def record(db: Session, user: models.User, xp: int = 0, day: date | None = None) -> int:
+    """Bugünün aktivitesini işler ve güncel seriyi döner; commit çağırana kalır."""
+    day = day or today()
+
+    database.upsert(
+        db,
+        models.UserActivity.__table__,
+        {"user_id": user.id, "day": day, "xp": xp, "events": 1},
+        keys=["user_id", "day"],
+        increments={
+            "xp": lambda cur, new: cur.xp + new.xp,
+            "events": lambda cur, new: cur.events + 1,
+        },
+    )
+
+    # Aynı gün içindeki sonraki olaylar seriyi değiştirmez.
+    last = user.last_active_date
+    if last is None or last < day:
+        if last == day - timedelta(days=1):
+            user.streak = int(user.streak or 0) + 1
+        else:
+            user.streak = 1
+        user.last_active_date = day
+    return int(user.streak or 0)
+
+
+def reset_broken_streaks(day: date | None = None) -> int:
+    # Dün ya da bugün aktif olmayan herkesin serisi tek ifadeyle sıfırlanır.
+    yesterday = (day or today()) - timedelta(days=1)
+    with database.SessionLocal() as db:
+        reset = db.execute(
+            update(models.User)
+            .where(models.User.streak > 0)
+            .where((models.User.last_active_date.is_(None)) | (models.User.last_active_date < yesterday))
+            .values(streak=0)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    return reset
+
+
+async def reset_loop() -> None:
+    while True:
+        try:
+            reset = await asyncio.to_thread(reset_broken_streaks)
+            if reset:
+                print(f"{reset} kullanıcının serisi sıfırlandı")
+        except Exception as e:
+            print(f"Seriler sıfırlanamadı: {e}")
+        await asyncio.sleep(STREAK_RESET_INTERVAL_SECONDS)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Kırılan serileri sıfırla")
+    parser.parse_args()
+    print(f"{reset_broken_streaks()} kullanıcının serisi sıfırlandı")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+# Groq'un OpenAI uyumlu API'sini taklit eden yerel sunucu. Uygulama
+# GROQ_BASE_URL=http://127.0.0.1:<port> ile buna yönlendirilir.
+#
+# Gecikme dağılımı FAKE_GROQ_LATENCY (veya --latency) ile seçilir:
+#   fixed:800              her çağrı 800 ms
+#   uniform:300-1500       300-1500 ms arası düzgün dağılım
+#   lognormal:700,0.5      medyanı 700 ms, sigma 0.5 olan log-normal
+
+STORY_TEXT = (
+    "Tom wakes up early on Saturday. He puts on his running shoes and goes to the park near his house. "
+    "The air is cold, but the sun is shining.\n\n"
+    "In the park he meets his friend Anna. She is walking her dog, Max. Tom and Anna decide to run together. "
+    "Max runs faster than both of them and they laugh.\n\n"
+    "After the run they sit on a bench and drink water. Anna says she wants to join a running club. "
+    "Tom thinks it is a great idea. They plan to run again next weekend."
+)
+
+CANNED = {
+    "chat": {
+        "reply": "Sure! What size would you like for your coffee?",
+        "has_mistake": False,
+        "correction": "",
+        "explanation_tr": "",
+    },
+    "openings": {
+        "openings": [
+            "Hi there! Welcome in. What can I get for you today?",
+            "Good morning! Are you ready to order, or do you need a minute?",
+            "Hello! Nice to see you. How is your day going so far?",
+            "Hey! Come on in. Have you been here before?",
+        ]
+    },
+    "quiz": {
+        "questions": [
+            {
+                "id": i,
+                "question": "They ___ playing football now.",
+                "options": ["is", "are", "am", "be"],
+                "correct_answer": "are",
+            }
+            for i in range(1, 6)
+        ]
+    },
+    "flashcards": {
+        "cards": [
+            {
+                "term": "break the ice",
+                "meaning": "to make people feel more comfortable in a social situation",
+                "meaning_tr": "ortamı yumuşatmak",
+                "example": "To break the ice, I asked her about her hobbies.",
+                "example_tr": "Ortamı yumuşatmak için ona hobilerini sordum.",
+            }
+        ]
+        * 7
+    },
+    "story": {
+        "title": "A Run in the Park",
+        "story": STORY_TEXT,
+        "keywords": [
+            {"word": "early", "meaning": "erken"},
+            {"word": "bench", "meaning": "bank"},
+            {"word": "decide", "meaning": "karar vermek"},
+        ],
+        "quiz": [
+            {
+                "question": "Who does Tom meet in the park?",
+                "options": ["Anna", "Max", "His brother"],
+                "answer": "Anna",
+            }
+        ],
+    },
+    "story_fix": {"story": STORY_TEXT},
+    "translate": {"translation": "Tom cumartesi günü erken uyanır. Koşu ayakkabılarını giyer ve parka gider."},
+    "define": {"word": "apple", "meaning": "elma", "example": "I eat an apple every day."},
+    "chat_summary": "The student ordered a medium latte with oat milk and asked about prices.",
+    "transcription": {"text": "I would like a cup of coffee, please."},
+}
+
+
+def classify(system_prompt: str) -> str:
+    prompt = system_prompt.lower()
+    if "text cleaner" in prompt:
+        return "story_fix"
+    if "summarize an ongoing" in prompt:
+        return "chat_summary"
+    if '"openings"' in prompt:
+        return "openings"
+    if "hikaye" in prompt:
+        return "story"
+    if '"questions"' in prompt:
+        return "quiz"
+    if '"cards"' in prompt:
+        return "flashcards"
+    if "translator" in prompt:
+        return "translate"
+    if "sözlük" in prompt:
+        return "define"
+    return "chat"
+
+
+def parse_latency(spec: str):
+    kind, _, args = spec.partition(":")
+    if kind == "fixed":
+        value = float(args or 0) / 1000
+        return lambda: value
+    if kind == "uniform":
+        low, high = (float(x) / 1000 for x in args.split("-"))
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = (float(x) for x in args.split(","))
+        mu = math.log(median / 1000)
+        return lambda: random.lognormvariate(mu, sigma)
+    raise ValueError(f"Bilinmeyen gecikme dağılımı: {spec}")
+
+
+def create_app(latency_spec: str, bodies: dict | None = None, seed: int | None = None) -> FastAPI:
+    if seed is not None:
+        random.seed(seed)
+    sample_latency = parse_latency(latency_spec)
+    canned = {**CANNED, **(bodies or {})}
+    app = FastAPI()
+    app.state.calls = {}
+
+    def _count(kind: str) -> None:
+        app.state.calls[kind] = app.state.calls.get(kind, 0) + 1
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        messages = payload.get("messages") or [{}]
+        kind = classify(messages[0].get("content") or "")
+        _count(kind)
+        await asyncio.sleep(sample_latency())
+
+        body = canned[kind]
+        content = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "llama-3.3-70b-versatile"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        await request.body()
+        _count("transcription")
+        await asyncio.sleep(sample_latency())
+        return canned["transcription"]
+
+    @app.get("/_stats")
+    def stats():
+        return {"calls": app.state.calls}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Yerel sahte Groq sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default=os.getenv("FAKE_GROQ_LATENCY", "lognormal:700,0.5"))
+    parser.add_argument("--bodies", help="Hazır cevapları ezen JSON dosyası ({tür: gövde})")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    bodies = None
+    if args.bodies:
+        with open(args.bodies, encoding="utf-8") as f:
+            bodies = json.load(f)
+
+    uvicorn.run(
+        create_app(args.latency, bodies, args.seed),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+# Yük testi: sahte Groq sunucusu + yerel veritabanı ile uygulamayı ayağa kaldırır,
+# kullanıcı yolculuklarını eşzamanlı çalıştırır ve uç nokta bazında req/s, p50, p99
+# raporlar. Sonuçlar bench/baselines/<isim>.json olarak kaydedilip karşılaştırılabilir.
+#
+#   python bench/run.py --users 50 --concurrency 10 --save main
+#   python bench/run.py --users 50 --concurrency 10 --compare main
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, "bench", "baselines")
+
+# Sahte sunucu ses içeriğine bakmaz; sabit boyutlu bir gövde yeterli.
+FAKE_AUDIO = b"\x00" * 16_000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Sunucu hazır olmadı: {url}")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def call(
+        self, client: httpx.AsyncClient, method: str, path: str, label: str | None = None, **kwargs
+    ) -> httpx.Response | None:
+        key = f"{method} {label or path}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            return None
+        self.samples.setdefault(key, []).append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[key] = self.errors.get(key, 0) + 1
+        return response
+
+
+async def journey(client: httpx.AsyncClient, rec: Recorder, run_id: str, index: int, full: bool) -> None:
+    username = f"bench_{run_id}_{index}"
+    r = await rec.call(
+        client,
+        "POST",
+        "/register",
+        json={"username": username, "email": f"{username}@bench.local", "password": "bench-pass"},
+    )
+    if r is None or r.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = await rec.call(client, "POST", "/placement_test/start", headers=headers)
+    step = r.json() if r is not None and r.status_code == 200 else {"done": True}
+    test_id = step.get("test_id")
+    while not step.get("done"):
+        question = step["question"]
+        r = await rec.call(
+            client,
+            "POST",
+            f"/placement_test/{test_id}/answer",
+            label="/placement_test/{test_id}/answer",
+            headers=headers,
+            json={"item_id": question["id"], "answer": random.choice(question["options"])},
+        )
+        if r is None or r.status_code != 200:
+            break
+        step = r.json()
+    await rec.call(client, "GET", "/roadmap", headers=headers)
+    await rec.call(client, "POST", "/generate_quiz", headers=headers, json={"topic": "Present Tense Review"})
+    await rec.call(client, "POST", "/complete_unit", headers=headers)
+
+    r = await rec.call(client, "POST", "/start_chat", headers=headers, json={"scenario": "cafe", "keep_history": True})
+    session_id = r.json().get("session_id") if r is not None and r.status_code == 200 else None
+    for message in ("Hi, a latte please.", "Medium, with oat milk.", "How much is it?"):
+        await rec.call(
+            client,
+            "POST",
+            "/chat",
+            headers=headers,
+            json={"message": message, "scenario": "cafe", "session_id": session_id},
+        )
+
+    if full:
+        await rec.call(client, "POST", "/story", headers=headers, json={"topic": "sports", "level": "A2"})
+        await rec.call(client, "POST", "/translate", json={"text": "Tom wakes up early on Saturday."})
+        await rec.call(client, "POST", "/define", json={"word": "apple"})
+        await rec.call(client, "GET", "/generate_flashcards", headers=headers)
+        await rec.call(
+            client,
+            "POST",
+            "/voice",
+            data={"lang": "en"},
+            files={"file": ("bench.m4a", FAKE_AUDIO, "audio/m4a")},
+        )
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(rec: Recorder, wall: float) -> dict:
+    endpoints = {}
+    total = 0
+    for key in sorted(rec.samples.keys() | rec.errors.keys()):
+        values = sorted(rec.samples.get(key, []))
+        total += len(values)
+        endpoints[key] = {
+            "count": len(values),
+            "errors": rec.errors.get(key, 0),
+            "rps": round(len(values) / wall, 2) if wall else 0.0,
+            "p50_ms": round(_percentile(values, 0.50) * 1000, 2) if values else None,
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 2) if values else None,
+            "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else None,
+        }
+    return {
+        "wall_seconds": round(wall, 3),
+        "requests": total,
+        "rps": round(total / wall, 2) if wall else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: dict, baseline: dict | None = None) -> None:
+    def _delta(new, old) -> str:
+        if new is None or not old:
+            return ""
+        return f" ({(new - old) / old * 100:+.1f}%)"
+
+    base_endpoints = (baseline or {}).get("endpoints", {})
+    print(f"\n{'endpoint':<32} {'count':>6} {'err':>4} {'req/s':>16} {'p50 ms':>18} {'p99 ms':>18}")
+    for key, row in result["endpoints"].items():
+        old = base_endpoints.get(key, {})
+        print(
+            f"{key:<32} {row['count']:>6} {row['errors']:>4} "
+            f"{str(row['rps']) + _delta(row['rps'], old.get('rps')):>16} "
+            f"{str(row['p50_ms']) + _delta(row['p50_ms'], old.get('p50_ms')):>18} "
+            f"{str(row['p99_ms']) + _delta(row['p99_ms'], old.get('p99_ms')):>18}"
+        )
+    overall_delta = _delta(result["rps"], (baseline or {}).get("rps"))
+    print(f"\nToplam: {result['requests']} istek, {result['wall_seconds']} sn, {result['rps']} req/s{overall_delta}")
+    if baseline:
+        print(f"Karşılaştırılan baseline: {baseline.get('name')} @ {baseline.get('git_commit')}")
+
+
+async def run_load(base_url: str, users: int, concurrency: int, full: bool) -> dict:
+    rec = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        async def _one(index: int) -> None:
+            async with semaphore:
+                await journey(client, rec, run_id, index, full)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_one(i) for i in range(users)))
+        wall = time.perf_counter() - start
+    return summarize(rec, wall)
+
+
+def start_servers(args) -> tuple[str, list[subprocess.Popen]]:
+    procs = []
+    groq_port = _free_port()
+    fake_cmd = [
+        sys.executable,
+        os.path.join(BACKEND_DIR, "bench", "fake_groq.py"),
+        "--port", str(groq_port),
+        "--latency", args.latency,
+        "--seed", str(args.seed),
+    ]
+    procs.append(subprocess.Popen(fake_cmd, cwd=BACKEND_DIR))
+    _wait_ready(f"http://127.0.0.1:{groq_port}/_stats")
+
+    if args.db == "sqlite":
+        db_path = os.path.join(BACKEND_DIR, "bench", "bench.db")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        database_url = f"sqlite:///{db_path}"
+    else:
+        database_url = args.database_url or os.getenv("BENCH_DATABASE_URL", "postgresql://localhost/english_bench")
+
+    # Her koşu soğuk önbellekle başlar; önceki koşunun sonuçları ölçümü bozmasın.
+    cache_path = os.path.join(BACKEND_DIR, "bench", "bench_cache.sqlite3")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(cache_path + suffix):
+            os.remove(cache_path + suffix)
+
+    env = {
+        **os.environ,
+        "CACHE_SQLITE_PATH": cache_path,
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        # Tüm sanal kullanıcılar aynı IP'den gelir; ölçüm sınırlamaya takılmasın.
+        "RATE_LIMIT_ENABLED": "0",
+        # Günün içeriği ilk istekte üretilir; açılıştaki parti ölçüme karışmasın.
+        "DAILY_BATCH_ENABLED": "0",
+        "SQLALCHEMY_DATABASE_URL": database_url,
+    }
+    subprocess.run([sys.executable, "migrations.py"], cwd=BACKEND_DIR, env=env, check=True)
+
+    app_port = _free_port()
+    app_cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1",
+        "--port", str(app_port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+    ]
+    procs.append(subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=env))
+    base_url = f"http://127.0.0.1:{app_port}"
+    _wait_ready(f"{base_url}/")
+    return base_url, procs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="English AI backend yük testi")
+    parser.add_argument("--users", type=int, default=20, help="Toplam sanal kullanıcı (yolculuk) sayısı")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--full", action="store_true", help="story/translate/define/flashcards/voice da çağrılsın")
+    parser.add_argument("--latency", default="lognormal:700,0.5", help="Sahte Groq gecikme dağılımı")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--database-url", help="--db postgres için bağlantı adresi")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--app-url", help="Zaten çalışan bir uygulamaya karşı koş (sunucu başlatma)")
+    parser.add_argument("--save", metavar="NAME", help="Sonucu baseline olarak kaydet")
+    parser.add_argument("--compare", metavar="NAME", help="Kayıtlı baseline ile karşılaştır")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    procs: list[subprocess.Popen] = []
+    try:
+        if args.app_url:
+            base_url = args.app_url
+        else:
+            base_url, procs = start_servers(args)
+        result = asyncio.run(run_load(base_url, args.users, args.concurrency, args.full))
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+
+    result.update(
+        {
+            "git_commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "users": args.users,
+                "concurrency": args.concurrency,
+                "full": args.full,
+                "latency": args.latency,
+                "seed": args.seed,
+                "db": args.db,
+                "workers": args.workers,
+            },
+        }
+    )
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        result["name"] = args.save
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Baseline kaydedildi: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import jsonutil
+
+# LLM sonuçları için önbellek. Birden fazla uvicorn worker'ı aynı önbelleği
+# paylaşsın diye varsayılan arka uç WAL modunda bir SQLite dosyasıdır;
+# CACHE_BACKEND=memory ile süreç içi önbelleğe geçilir. Değerler JSON'a
+# çevrilebilir olmalıdır.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+CACHE_SQLITE_PATH = os.getenv(
+    "CACHE_SQLITE_PATH", os.path.join(os.path.dirname(__file__), "cache.sqlite3")
+)
+# SQLite arka ucunun toplam boyut sınırı; aşılınca en uzun süredir okunmayanlar silinir.
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Bellek arka ucunun kayıt sınırı
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "4096"))
+# Başka bir worker aynı değeri hesaplarken en fazla bu kadar beklenir.
+CACHE_LOCK_TIMEOUT_SECONDS = float(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "60"))
+# SQLite'ta okunma zamanı en fazla bu sıklıkla yazılır; her okuma bir yazma
+# işlemi olup tüm worker'ları WAL yazma kilidinde sıraya sokmasın. Boyut
+# tahliyesi için bu kabalık yeterli.
+CACHE_TOUCH_INTERVAL_SECONDS = float(os.getenv("CACHE_TOUCH_INTERVAL_SECONDS", "60"))
+
+_LOCK_POLL_SECONDS = 0.1
+_EVICT_EVERY_SETS = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at);
+CREATE TABLE IF NOT EXISTS cache_locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class CacheBackend:
+    # Engelleyen (disk/ağ) arka uçlar thread'de çalıştırılır.
+    blocking = False
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def try_lock(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        # Tek süreçli arka uçta süreç içi tekilleştirme yeterli.
+        return True
+
+    def unlock(self, key: str, owner: str) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl_seconds: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SQLiteBackend(CacheBackend):
+    blocking = True
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sets = 0
+        # Dosya açılamıyorsa hata burada, açılışta görülsün.
+        self._conn()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at < ?", (key, now))
+            return None
+        if now - row[2] >= CACHE_TOUCH_INTERVAL_SECONDS:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return jsonutil.loads(row[0])
+
+    def set(self, key: str, value, ttl_seconds: float) -> None:
+        blob = jsonutil.dumps(value)
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO cache_entries (key, value, size, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+            (key, blob, len(blob), now + ttl_seconds, now),
+        )
+        self._sets += 1
+        if self._sets % _EVICT_EVERY_SETS == 0:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def evict(self) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        conn.execute("DELETE FROM cache_locks WHERE expires_at < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # En uzun süredir okunmayanlardan başlayarak sınırın %90'ına in.
+        excess = total - int(self.max_bytes * 0.9)
+        conn.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, size, SUM(size) OVER (ORDER BY accessed_at, key) AS running"
+            "  FROM cache_entries"
+            " ) WHERE running - size < ?"
+            ")",
+            (excess,),
+        )
+
+    def try_lock(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT INTO cache_locks (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE cache_locks.expires_at < ?",
+            (key, owner, now + ttl_seconds, now),
+        )
+        return cursor.rowcount == 1
+
+    def unlock(self, key: str, owner: str) -> None:
+        self._conn().execute("DELETE FROM cache_locks WHERE key = ? AND owner = ?", (key, owner))
+
+
+_backend: CacheBackend | None = None
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        if CACHE_BACKEND == "sqlite":
+            try:
+                _backend = SQLiteBackend()
+            except sqlite3.Error as e:
+                print(f"UYARI: SQLite önbellek açılamadı ({CACHE_SQLITE_PATH}): {e}; bellek içi önbellek kullanılıyor")
+                _backend = MemoryBackend()
+        else:
+            _backend = MemoryBackend()
+    return _backend
+
+
+class Cache:
+    """Bir isim alanı ve TTL ile paylaşılan önbellek görünümü.
+
+    get_or_compute aynı anahtar için hesaplamayı tekilleştirir: süreç içinde
+    aynı anda gelen istekler ilkini bekler, diğer worker'lar da kilit
+    kaydı üzerinden onun sonucunu bekler.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, backend: CacheBackend | None = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._backend = backend
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    async def _call(self, method: str, *args, default=None):
+        # Önbellek hatası isteği düşürmemeli; değer yeniden hesaplanır.
+        fn = getattr(self.backend, method)
+        try:
+            if self.backend.blocking:
+                return await asyncio.to_thread(fn, *args)
+            return fn(*args)
+        except Exception as e:
+            print(f"Önbellek hatası ({self.namespace} {method}): {e}")
+            return default
+
+    async def get(self, key: str):
+        return await self._call("get", f"{self.namespace}:{key}")
+
+    async def set(self, key: str, value) -> None:
+        await self._call("set", f"{self.namespace}:{key}", value, self.ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self._call("delete", f"{self.namespace}:{key}")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable],
+        cacheable: Callable[[object], bool] = lambda value: True,
+    ) -> tuple[object, str]:
+        """(değer, kaynak) döner; kaynak "hit", "inflight" veya "miss"."""
+        full_key = f"{self.namespace}:{key}"
+        value = await self._call("get", full_key)
+        if value is not None:
+            return value, "hit"
+
+        pending = self._inflight.get(full_key)
+        if pending is not None:
+            return await asyncio.shield(pending), "inflight"
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value, source = await self._compute_shared(full_key, compute, cacheable)
+        except BaseException as e:
+            future.set_exception(e)
+            # Bekleyen yoksa "exception was never retrieved" uyarısı çıkmasın.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, source
+        finally:
+            self._inflight.pop(full_key, None)
+
+    async def _compute_shared(self, full_key: str, compute, cacheable) -> tuple[object, str]:
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + CACHE_LOCK_TIMEOUT_SECONDS
+        while not await self._call("try_lock", full_key, owner, CACHE_LOCK_TIMEOUT_SECONDS, default=True):
+            # Başka bir worker hesaplıyor; sonucu yazmasını bekle.
+            await asyncio.sleep(_LOCK_POLL_SECONDS)
+            value = await self._call("get", full_key)
+            if value is not None:
+                return value, "inflight"
+            if time.monotonic() >= deadline:
+                break
+
+        try:
+            # Kilidi alana kadar diğer worker bitirmiş olabilir.
+            value = await self._call("get", full_key)
+            if value is not None:
+                return value, "hit"
+            value = await compute()
+            if cacheable(value):
+                await self._call("set", full_key, value, self.ttl_seconds)
+            return value, "miss"
+        finally:
+            await self._call("unlock", full_key, owner)
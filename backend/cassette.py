@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+# Groq çağrılarını diske kaydedip sonra aynen geri oynatır (benchmark ve
+# çevrimdışı geliştirme için). GROQ_CASSETTE_MODE:
+#   off          (varsayılan) gerçek API
+#   record       gerçek API'yi çağır, cevabı ve süresini kaydet
+#   replay       kayıttan oynat, kaydedilen süre kadar bekle
+#   replay_fast  kayıttan oynat, hiç bekleme
+# Kayıt bulunamazsa CassetteMissError atılır. GROQ_CASSETTE_FALLBACK=endpoint
+# verilirse promptu rastgele olan uç noktalar için o uç noktanın son kaydı
+# döner (yanlış cevabı fark ettirmemesi için her kullanımda loglanır).
+CASSETTE_MODE = os.getenv("GROQ_CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.getenv(
+    "GROQ_CASSETTE_DIR", os.path.join(os.path.dirname(__file__), "cassettes")
+)
+
+_MODES = {"off", "record", "replay", "replay_fast"}
+if CASSETTE_MODE not in _MODES:
+    raise ValueError(f"GROQ_CASSETTE_MODE geçersiz: {CASSETTE_MODE} ({', '.join(sorted(_MODES))})")
+CASSETTE_FALLBACK = os.getenv("GROQ_CASSETTE_FALLBACK", "off").lower()
+if CASSETTE_FALLBACK not in {"off", "endpoint"}:
+    raise ValueError(f"GROQ_CASSETTE_FALLBACK geçersiz: {CASSETTE_FALLBACK} (endpoint, off)")
+
+class CassetteMissError(LookupError):
+    pass
+
+
+def _response_type(kind: str):
+    if kind == "transcription":
+        from groq.types.audio import Transcription
+
+        return Transcription
+    from groq.types.chat import ChatCompletion
+
+    return ChatCompletion
+
+
+def is_enabled() -> bool:
+    return CASSETTE_MODE != "off"
+
+
+def _normalize(value):
+    # Ses dosyası gibi ikili içerik anahtara özetiyle girer; geçici dosya adı girmez.
+    if isinstance(value, (bytes, bytearray)):
+        return {"sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], (bytes, bytearray)):
+        return _normalize(value[1])
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def request_key(kind: str, kwargs: dict) -> str:
+    canonical = json.dumps(
+        {"kind": kind, "request": _normalize(kwargs)},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(CASSETTE_DIR, key[:2], f"{key}.json")
+
+
+def _endpoint_path(endpoint: str) -> str:
+    return os.path.join(CASSETTE_DIR, "_endpoint", f"{endpoint}.json")
+
+
+def _write(path: str, entry: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _load(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+async def call(kind: str, endpoint: str, kwargs: dict, upstream):
+    key = request_key(kind, kwargs)
+
+    if CASSETTE_MODE == "record":
+        start = time.perf_counter()
+        response = await upstream()
+        entry = {
+            "kind": kind,
+            "endpoint": endpoint,
+            "request": _normalize(kwargs),
+            "latency": time.perf_counter() - start,
+            "response": response.model_dump(mode="json"),
+        }
+        _write(_path(key), entry)
+        # Promptu rastgele olan uç noktalar (ör. flashcard kategorileri) için
+        # uç noktanın son kaydı yedek olarak tutulur (GROQ_CASSETTE_FALLBACK).
+        _write(_endpoint_path(endpoint), entry)
+        return response
+
+    entry = _load(_path(key))
+    if entry is None and CASSETTE_FALLBACK == "endpoint":
+        entry = _load(_endpoint_path(endpoint))
+        if entry is not None:
+            print(f"UYARI: Kasette birebir kayıt yok ({endpoint}: {key}); uç noktanın son kaydı kullanılıyor")
+    if entry is None:
+        raise CassetteMissError(f"Kasette kayıt yok ({endpoint}): {key}")
+    if CASSETTE_MODE == "replay":
+        await asyncio.sleep(float(entry.get("latency") or 0))
+    return _response_type(kind).model_validate(entry["response"])
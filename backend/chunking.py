@@ -0,0 +1,72 @@
+import re
+
+# Uzun metinleri paralel işlenebilecek, boyutu sınırlı parçalara böler. Her parça
+# kendinden sonra gelen ayırıcıyla birlikte döner; çıktılar join() ile aynı
+# paragraf/cümle yapısında birleştirilir.
+
+PARAGRAPH_SEP = "\n\n"
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"'”’)]))\s+")
+
+
+def _split_long(piece: str, max_chars: int, pattern) -> list[str]:
+    parts = pattern.split(piece) if pattern is not None else piece.split()
+    out, current = [], ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if current and len(current) + 1 + len(part) > max_chars:
+            out.append(current)
+            current = part
+        else:
+            current = f"{current} {part}" if current else part
+    if current:
+        out.append(current)
+    return out
+
+
+def _sentences(paragraph: str, max_chars: int) -> list[str]:
+    pieces = []
+    for sentence in _split_long(paragraph, max_chars, _SENTENCE_SPLIT):
+        if len(sentence) > max_chars:
+            # Noktalamasız çok uzun cümle: kelime sınırından böl.
+            pieces.extend(_split_long(sentence, max_chars, None))
+        else:
+            pieces.append(sentence)
+    return pieces
+
+
+def split_text(text: str, max_chars: int) -> list[tuple[str, str]]:
+    """Metni (parça, sonraki ayırıcı) listesine böler; son parçanın ayırıcısı ''."""
+    chunks: list[tuple[str, str]] = []
+    current: list[str] = []
+
+    def _flush() -> None:
+        if current:
+            chunks.append((PARAGRAPH_SEP.join(current), PARAGRAPH_SEP))
+            current.clear()
+
+    for paragraph in _PARAGRAPH_SPLIT.split(text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) > max_chars:
+            _flush()
+            sentences = _sentences(paragraph, max_chars)
+            for sentence in sentences[:-1]:
+                chunks.append((sentence, " "))
+            chunks.append((sentences[-1], PARAGRAPH_SEP))
+            continue
+        if current and len(PARAGRAPH_SEP.join(current)) + len(PARAGRAPH_SEP) + len(paragraph) > max_chars:
+            _flush()
+        current.append(paragraph)
+    _flush()
+
+    if chunks:
+        chunks[-1] = (chunks[-1][0], "")
+    return chunks
+
+
+def join(outputs: list[str], separators: list[str]) -> str:
+    return "".join(output.strip() + sep for output, sep in zip(outputs, separators)).strip()
@@ -0,0 +1,89 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+import jsonutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bu boyuttan küçük cevaplar sıkıştırılmaz; başlık ve CPU maliyetine değmez.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Dinamik cevaplar için hız/oran dengesi; önbelleklenen sabit cevaplar bir kez
+# en yüksek seviyede sıkıştırılır.
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson")
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    wildcard = weights.get("*", 0.0)
+    if brotli is not None and weights.get("br", wildcard) > 0:
+        return "br"
+    if weights.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+class CompressedCache:
+    """Aynı gövdeyi her istekte yeniden sıkıştırmamak için hazır cevap önbelleği."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        # Senkron endpoint'ler thread pool'da çalışır.
+        self._lock = threading.Lock()
+
+    def response(self, key: tuple, build_payload, accept_encoding: str | None) -> Response:
+        encoding = negotiate(accept_encoding)
+        raw = self._get(key + ("identity",), lambda: jsonutil.dumps(build_payload()))
+        if encoding is None or len(raw) < COMPRESSION_MIN_SIZE:
+            return Response(raw, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+
+        body = self._get(key + (encoding,), lambda: compress(raw, encoding, best=True))
+        return Response(
+            body,
+            media_type="application/json",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+    def _get(self, key: tuple, build) -> bytes:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+import activity
+import database
+import jsonutil
+import models
+
+# Günün içeriği (kelime destesi, günün hikayesi) kullanıcı başına değil, seviye
+# başına günde bir kez üretilir. Zamanlanmış parti her seviye için eksik olanları
+# üretir ve JSON'a çevrilmiş halini saklar; istekler bu kopyayı olduğu gibi döner.
+# Aynı kaydı birden fazla worker/instance üretmesin diye önce veritabanında
+# "pending" satırıyla sahiplenilir.
+
+DAILY_BATCH_ENABLED = os.getenv("DAILY_BATCH_ENABLED", "1") == "1"
+DAILY_BATCH_INTERVAL_SECONDS = float(os.getenv("DAILY_BATCH_INTERVAL_SECONDS", "900"))
+# Gece yarısına bu kadar kala ertesi günün içeriği de hazırlanır.
+DAILY_BATCH_LEAD_SECONDS = float(os.getenv("DAILY_BATCH_LEAD_SECONDS", str(2 * 3600)))
+DAILY_RETENTION_DAYS = int(os.getenv("DAILY_RETENTION_DAYS", "7"))
+# Sahiplenen süreç bu sürede bitirmediyse (çöktü vb.) başkası devralır.
+DAILY_CLAIM_TIMEOUT_SECONDS = float(os.getenv("DAILY_CLAIM_TIMEOUT_SECONDS", "600"))
+# Başka bir süreç üretirken isteğin en fazla bekleyeceği süre
+DAILY_WAIT_SECONDS = float(os.getenv("DAILY_WAIT_SECONDS", "60"))
+_POLL_SECONDS = 0.5
+
+KINDS = ("deck", "story")
+
+# (seviye, gün) -> içerik
+Generator = Callable[[int, date], Awaitable[dict]]
+
+
+def _load(day: date, level: int, kind: str) -> tuple[bytes, str] | None:
+    with database.SessionLocal() as db:
+        row = db.get(models.DailyContent, (day, level, kind))
+        if row is None or row.status != "ready":
+            return None
+        return row.body, row.etag
+
+
+def _claim(day: date, level: int, kind: str) -> bool:
+    with database.SessionLocal() as db:
+        db.add(models.DailyContent(day=day, level=level, kind=kind, status="pending", created_at=datetime.utcnow()))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+        # Yarım kalmış bir sahiplenmeyi devral.
+        stale = datetime.utcnow() - timedelta(seconds=DAILY_CLAIM_TIMEOUT_SECONDS)
+        taken = (
+            db.query(models.DailyContent)
+            .filter(
+                models.DailyContent.day == day,
+                models.DailyContent.level == level,
+                models.DailyContent.kind == kind,
+                models.DailyContent.status == "pending",
+                models.DailyContent.created_at < stale,
+            )
+            .update({"created_at": datetime.utcnow()}, synchronize_session=False)
+        )
+        db.commit()
+        return taken == 1
+
+
+def _store(day: date, level: int, kind: str, body: bytes, etag: str) -> None:
+    with database.SessionLocal() as db:
+        row = db.get(models.DailyContent, (day, level, kind))
+        row.status = "ready"
+        row.body = body
+        row.etag = etag
+        db.commit()
+
+
+def _release(day: date, level: int, kind: str) -> None:
+    with database.SessionLocal() as db:
+        db.execute(
+            delete(models.DailyContent).where(
+                models.DailyContent.day == day,
+                models.DailyContent.level == level,
+                models.DailyContent.kind == kind,
+                models.DailyContent.status == "pending",
+            )
+        )
+        db.commit()
+
+
+def _purge_before(day: date) -> None:
+    with database.SessionLocal() as db:
+        db.execute(delete(models.DailyContent).where(models.DailyContent.day < day))
+        db.commit()
+
+
+class DailyContent:
+    def __init__(self, generators: dict[str, Generator], levels: list[int]):
+        self.generators = generators
+        self.levels = levels
+        # Süreç içi kopya: (gün, seviye, tür) -> (gövde, etag)
+        self._memo: dict[tuple[date, int, str], tuple[bytes, str]] = {}
+        self._inflight: dict[tuple[date, int, str], asyncio.Future] = {}
+        self._task: asyncio.Task | None = None
+
+    async def get(self, level: int, kind: str, day: date | None = None) -> tuple[bytes, str]:
+        """Saklanan gövde ve ETag'i döner; parti henüz üretmediyse şimdi üretir."""
+        day = day or activity.today()
+        key = (day, level, kind)
+        found = self._memo.get(key)
+        if found is None:
+            found = await asyncio.to_thread(_load, day, level, kind)
+            if found is None:
+                found = await self._produce(day, level, kind)
+            self._remember(key, found)
+        return found
+
+    def _remember(self, key: tuple[date, int, str], value: tuple[bytes, str]) -> None:
+        # Sadece dün ve sonrası tutulur; bellek seviye x tür x ~2 günle sınırlı.
+        oldest = key[0] - timedelta(days=1)
+        for old in [k for k in self._memo if k[0] < oldest]:
+            del self._memo[old]
+        self._memo[key] = value
+
+    async def _produce(self, day: date, level: int, kind: str) -> tuple[bytes, str]:
+        key = (day, level, kind)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._produce_shared(day, level, kind)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _produce_shared(self, day: date, level: int, kind: str) -> tuple[bytes, str]:
+        deadline = time.monotonic() + DAILY_WAIT_SECONDS
+        while not await asyncio.to_thread(_claim, day, level, kind):
+            # Başka bir süreç üretiyor ya da bitirdi.
+            found = await asyncio.to_thread(_load, day, level, kind)
+            if found is not None:
+                return found
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Günün içeriği hazır değil ({kind}, seviye {level})")
+            await asyncio.sleep(_POLL_SECONDS)
+
+        try:
+            payload = await self.generators[kind](level, day)
+            body = jsonutil.dumps(payload)
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            await asyncio.to_thread(_store, day, level, kind, body, etag)
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(_release, day, level, kind))
+            raise
+        print(f"Günün içeriği üretildi: {day} seviye {level} {kind}")
+        return body, etag
+
+    async def run_batch(self, day: date) -> None:
+        for level in self.levels:
+            for kind in KINDS:
+                try:
+                    await self.get(level, kind, day)
+                except Exception as e:
+                    # Bir sonraki turda tekrar denenir; istekler de kendisi üretebilir.
+                    print(f"Günün içeriği üretilemedi ({day} seviye {level} {kind}): {e}")
+
+    async def _loop(self) -> None:
+        while True:
+            today = activity.today()
+            await self.run_batch(today)
+            now = datetime.now(activity.ACTIVITY_TIMEZONE)
+            midnight = datetime.combine(today + timedelta(days=1), datetime.min.time(), now.tzinfo)
+            if (midnight - now).total_seconds() < DAILY_BATCH_LEAD_SECONDS:
+                await self.run_batch(today + timedelta(days=1))
+            try:
+                await asyncio.to_thread(_purge_before, today - timedelta(days=DAILY_RETENTION_DAYS))
+            except Exception as e:
+                print(f"Eski günlük içerik silinemedi: {e}")
+            await asyncio.sleep(DAILY_BATCH_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -1,7 +1,14 @@
+from types import SimpleNamespace
+
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+from dotenv import load_dotenv
+
+# main.py'den önce import edildiği için .env burada da yüklenmeli.
+load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv(
     "SQLALCHEMY_DATABASE_URL",
@@ -20,3 +27,32 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def upsert(db, table, values: dict, keys: list[str], increments: dict) -> None:
+    """Satır yoksa ekler, varsa tek ifadeyle günceller.
+
+    increments: sütun adı -> f(mevcut, gelen); mevcut tablo sütunları, gelen
+    eklenmeye çalışılan değerlerdir (ör. lambda cur, new: cur.xp + new.xp).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(**values)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c[key] for key in keys],
+                set_={name: update(table.c, stmt.excluded) for name, update in increments.items()},
+            )
+        )
+        return
+
+    # Diğer veritabanları: önce güncelle, satır yoksa ekle.
+    incoming = SimpleNamespace(**values)
+    updated = db.execute(
+        table.update()
+        .where(*[table.c[key] == values[key] for key in keys])
+        .values(**{name: update(table.c, incoming) for name, update in increments.items()})
+    ).rowcount
+    if not updated:
+        db.execute(table.insert().values(**values))
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, update
+
+import database
+import metrics
+import models
+
+# Uzun süren üretimler (hikaye, seviye testi) için iş kuyruğu. İstek hemen bir
+# job_id ile döner; iş bu süreçteki sınırlı sayıda worker'da çalışır, sonuç
+# veritabanına yazılır. Sonuç hangi süreçten sorulursa sorulsun okunabilir; ama
+# yalnızca işi gönderen kullanıcıya gösterilir.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "200"))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "600"))
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "120"))
+# Long-poll isteğinin en fazla bekleyeceği süre
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "25"))
+# Başka bir süreçteki işi beklerken veritabanını yoklama aralığı
+JOB_POLL_INTERVAL_SECONDS = 0.5
+_PURGE_INTERVAL_SECONDS = 60
+
+PENDING = ("queued", "running")
+
+Runner = Callable[[], Awaitable[dict]]
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def _insert(job_id: str, kind: str, user_id: int) -> None:
+    now = datetime.utcnow()
+    with database.SessionLocal() as db:
+        db.add(
+            models.Job(
+                id=job_id,
+                kind=kind,
+                user_id=user_id,
+                status="queued",
+                created_at=now,
+                # Hiç bitmese bile (süreç öldü vb.) sonunda silinir.
+                expires_at=now + timedelta(seconds=JOB_TIMEOUT_SECONDS * 2 + JOB_RESULT_TTL_SECONDS),
+            )
+        )
+        db.commit()
+
+
+def _set_status(job_id: str, **values) -> None:
+    with database.SessionLocal() as db:
+        db.execute(update(models.Job).where(models.Job.id == job_id).values(**values))
+        db.commit()
+
+
+def _finish(job_id: str, status: str, result: dict | None, error: str | None) -> None:
+    now = datetime.utcnow()
+    _set_status(
+        job_id,
+        status=status,
+        result=result,
+        error=error[:500] if error else None,
+        finished_at=now,
+        expires_at=now + timedelta(seconds=JOB_RESULT_TTL_SECONDS),
+    )
+
+
+def _load(job_id: str, user_id: int) -> dict | None:
+    with database.SessionLocal() as db:
+        job = db.get(models.Job, job_id)
+        # Başkasının işi yokmuş gibi davranılır; varlığı da sızmasın.
+        if job is None or job.user_id != user_id or job.expires_at < datetime.utcnow():
+            return None
+        data = {"job_id": job.id, "kind": job.kind, "status": job.status}
+        if job.status == "done":
+            data["result"] = job.result
+        elif job.status == "failed":
+            data["error"] = job.error
+        elif job.created_at < datetime.utcnow() - timedelta(seconds=JOB_TIMEOUT_SECONDS * 2):
+            # Çalıştıran süreç yeniden başlamış olabilir; sonsuza dek beklemesin.
+            data.update(status="failed", error="İş zaman aşımına uğradı")
+        return data
+
+
+def _purge_expired() -> int:
+    with database.SessionLocal() as db:
+        deleted = db.execute(delete(models.Job).where(models.Job.expires_at < datetime.utcnow())).rowcount
+        db.commit()
+    return deleted
+
+
+def _error_message(error: Exception) -> str:
+    # HTTPException'ların detail'i kullanıcıya gösterilebilir mesajdır.
+    if isinstance(error, asyncio.TimeoutError):
+        return "İş zaman aşımına uğradı"
+    return str(getattr(error, "detail", None) or error or type(error).__name__)
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_MAX):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: asyncio.Queue | None = None
+        self._reserved = 0
+        self._tasks: list[asyncio.Task] = []
+        # Bu süreçte bekleyen/çalışan işler; long-poll bunları olayla bekler.
+        self._done: dict[str, asyncio.Event] = {}
+
+    def start(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def submit(self, kind: str, run: Runner, user_id: int) -> str:
+        self.start()
+        # Yer, kayıt yazılırken gelen diğer isteklere karşı önceden ayrılır.
+        if self._queue.qsize() + self._reserved >= self.max_queued:
+            metrics.JOBS.inc(kind, "rejected")
+            raise QueueFullError("İş kuyruğu dolu")
+
+        job_id = uuid.uuid4().hex
+        self._reserved += 1
+        try:
+            await asyncio.to_thread(_insert, job_id, kind, user_id)
+        finally:
+            self._reserved -= 1
+        self._done[job_id] = asyncio.Event()
+        self._queue.put_nowait((job_id, kind, run))
+        metrics.JOBS.inc(kind, "queued")
+        metrics.JOB_QUEUE_DEPTH.set(value=self._queue.qsize())
+        return job_id
+
+    async def get(self, job_id: str, user_id: int, wait: float = 0) -> dict | None:
+        job = await asyncio.to_thread(_load, job_id, user_id)
+        wait = min(max(wait, 0.0), JOB_MAX_WAIT_SECONDS)
+        if job is None or job["status"] not in PENDING or wait <= 0:
+            return job
+
+        event = self._done.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            return await asyncio.to_thread(_load, job_id, user_id)
+
+        # İş başka bir worker sürecinde: veritabanını aralıklarla yokla.
+        deadline = time.monotonic() + wait
+        while job is not None and job["status"] in PENDING and time.monotonic() < deadline:
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+            job = await asyncio.to_thread(_load, job_id, user_id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, kind, run = await self._queue.get()
+            metrics.JOB_QUEUE_DEPTH.set(value=self._queue.qsize())
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(_set_status, job_id, status="running")
+                try:
+                    result = await asyncio.wait_for(run(), JOB_TIMEOUT_SECONDS)
+                except Exception as e:
+                    print(f"İş hatası ({kind} {job_id}): {e}")
+                    metrics.JOBS.inc(kind, "failed")
+                    await asyncio.to_thread(_finish, job_id, "failed", None, _error_message(e))
+                else:
+                    metrics.JOBS.inc(kind, "done")
+                    await asyncio.to_thread(_finish, job_id, "done", result, None)
+            except Exception as e:
+                # Sonuç yazılamadı (DB hatası vb.); worker ayakta kalmalı.
+                print(f"İş kaydı güncellenemedi ({kind} {job_id}): {e}")
+            finally:
+                metrics.JOB_DURATION.observe(kind, value=time.perf_counter() - start)
+                event = self._done.pop(job_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_PURGE_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(_purge_expired)
+            except Exception as e:
+                print(f"Süresi dolan işler silinemedi: {e}")
@@ -0,0 +1,27 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+# orjson varsa LLM çıktısını ayrıştırmak ve cevapları kodlamak için onu kullan;
+# yoksa standart kütüphaneye düş.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: str | bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,282 @@
+import argparse
+import mmap
+import os
+import sys
+
+import metrics
+
+# /define için yerel İngilizce-Türkçe sözlük. Sık kelimeler LLM'e gitmeden
+# buradan cevaplanır; bulunamayanlar LLM'e düşer.
+#
+# Dosya başlık kelimesine göre (UTF-8 bayt sırasıyla) sıralı, satır başına bir
+# kayıt tutan bir TSV'dir:
+#
+#   kelime <TAB> tür <TAB> Türkçe anlam <TAB> örnek cümle
+#
+# İlk aramada mmap ile açılır ve satırlar üzerinde ikili arama yapılır; dosya
+# belleğe okunmaz, sayfaları tüm worker'lar arasında işletim sisteminin sayfa
+# önbelleğinden paylaşılır. Kayıt ekledikten sonra:
+#
+#   python lexicon.py --sort        # sırala, tekrarları at ve doğrula
+#   python lexicon.py went cities   # arama sonucunu göster
+
+LEXICON_PATH = os.getenv(
+    "DEFINE_LEXICON_PATH", os.path.join(os.path.dirname(__file__), "data", "lexicon_en_tr.tsv")
+)
+
+POS_TAGS = {"n", "v", "adj", "adv", "prep", "pron", "conj", "det", "int"}
+
+# Düzenli eklerle çözülemeyen çekimli biçimler -> kök
+IRREGULAR_FORMS = {
+    "am": "be", "is": "be", "are": "be", "was": "be", "were": "be", "been": "be",
+    "has": "have", "had": "have",
+    "does": "do", "did": "do", "done": "do",
+    "went": "go", "gone": "go",
+    "came": "come",
+    "got": "get", "gotten": "get",
+    "made": "make",
+    "took": "take", "taken": "take",
+    "gave": "give", "given": "give",
+    "saw": "see", "seen": "see",
+    "knew": "know", "known": "know",
+    "thought": "think",
+    "said": "say",
+    "told": "tell",
+    "spoke": "speak", "spoken": "speak",
+    "ate": "eat", "eaten": "eat",
+    "drank": "drink", "drunk": "drink",
+    "slept": "sleep",
+    "woke": "wake", "woken": "wake",
+    "taught": "teach",
+    "wrote": "write", "written": "write",
+    "heard": "hear",
+    "ran": "run",
+    "swam": "swim", "swum": "swim",
+    "drove": "drive", "driven": "drive",
+    "rode": "ride", "ridden": "ride",
+    "flew": "fly", "flown": "fly",
+    "left": "leave",
+    "began": "begin", "begun": "begin",
+    "bought": "buy",
+    "sold": "sell",
+    "paid": "pay",
+    "found": "find",
+    "lost": "lose",
+    "won": "win",
+    "brought": "bring",
+    "sent": "send",
+    "met": "meet",
+    "felt": "feel",
+    "understood": "understand",
+    "forgot": "forget", "forgotten": "forget",
+    "chose": "choose", "chosen": "choose",
+    "sat": "sit",
+    "stood": "stand",
+    "wore": "wear", "worn": "wear",
+    "sang": "sing", "sung": "sing",
+    "built": "build",
+    "broke": "break", "broken": "break",
+    "fell": "fall", "fallen": "fall",
+    "grew": "grow", "grown": "grow",
+    "kept": "keep",
+    "became": "become",
+    "meant": "mean",
+    "spent": "spend",
+    "lent": "lend",
+    "caught": "catch",
+    "threw": "throw", "thrown": "throw",
+    "held": "hold",
+    "drew": "draw", "drawn": "draw",
+    "children": "child",
+    "men": "man",
+    "women": "woman",
+    "people": "person",
+    "feet": "foot",
+    "teeth": "tooth",
+    "better": "good", "best": "good",
+    "worse": "bad", "worst": "bad",
+    "farther": "far", "further": "far",
+    "more": "much", "most": "much",
+}
+
+# (ek, yerine gelen, kökün olabileceği türler). Tür kısıtı "teacher" gibi
+# kelimelerin "teach"e bağlanmasını engeller.
+_SUFFIX_RULES = [
+    ("ies", "y", ("n", "v")),
+    ("ves", "f", ("n",)),
+    ("ves", "fe", ("n",)),
+    ("es", "", ("n", "v")),
+    ("s", "", ("n", "v")),
+    ("ied", "y", ("v",)),
+    ("ed", "", ("v",)),
+    ("ed", "e", ("v",)),
+    ("ying", "ie", ("v",)),
+    ("ing", "", ("v",)),
+    ("ing", "e", ("v",)),
+    ("ier", "y", ("adj",)),
+    ("iest", "y", ("adj",)),
+    ("er", "", ("adj",)),
+    ("er", "e", ("adj",)),
+    ("est", "", ("adj",)),
+    ("est", "e", ("adj",)),
+]
+# Bu eklerden önce ünsüz ikilenebilir: stopped -> stop, bigger -> big
+_DOUBLING_SUFFIXES = {"ed", "ing", "er", "est"}
+# -ed/-ing'den önce "e" eklenen kök kısa ve sesliyle bitiyorsa ek değil kelimenin
+# kendisidir: seed -> see, need -> nee olmaz; agreed -> agree, used -> use kalır.
+_VERB_SUFFIXES = {"ed", "ing"}
+_VOWELS = set("aeiou")
+_MIN_VOWEL_STEM = 4
+
+_STRIP_CHARS = " \t\r\n.,!?;:\"'()[]“”‘’"
+
+
+def normalize(word: str) -> str:
+    return word.strip(_STRIP_CHARS).replace("’", "'").lower()
+
+
+def lemma_candidates(word: str):
+    """(kök, izin verilen türler) adaylarını olasılık sırasıyla üretir."""
+    irregular = IRREGULAR_FORMS.get(word)
+    if irregular is not None:
+        yield irregular, None
+    for suffix, replacement, pos in _SUFFIX_RULES:
+        if not word.endswith(suffix) or len(word) - len(suffix) < 2:
+            continue
+        stem = word[: -len(suffix)]
+        if (
+            replacement == "e"
+            and suffix in _VERB_SUFFIXES
+            and stem[-1] in _VOWELS
+            and len(stem) < _MIN_VOWEL_STEM
+        ):
+            continue
+        yield stem + replacement, pos
+        if suffix in _DOUBLING_SUFFIXES and not replacement and len(stem) >= 3 and stem[-1] == stem[-2]:
+            yield stem[:-1], pos
+
+
+class Lexicon:
+    def __init__(self, path: str = LEXICON_PATH):
+        self.path = path
+        self.entries = 0
+        self._mm: mmap.mmap | None = None
+        self._opened = False
+
+    def _map(self) -> mmap.mmap | None:
+        if not self._opened:
+            self._opened = True
+            try:
+                with open(self.path, "rb") as f:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                print(f"UYARI: Sözlük dosyası açılamadı ({self.path}): {e}")
+                return None
+            self.entries = sum(1 for _ in iter(self._mm.readline, b""))
+            metrics.LEXICON_ENTRIES.set(value=self.entries)
+        return self._mm
+
+    def _find(self, word: str) -> list[str] | None:
+        mm = self._map()
+        if mm is None:
+            return None
+        key = word.encode("utf-8")
+        # lo ve hi her zaman bir satır başını gösterir.
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", lo, mid) + 1 or lo
+            end = mm.find(b"\n", start, hi)
+            if end == -1:
+                end = hi
+            line = mm[start:end]
+            head = line.split(b"\t", 1)[0]
+            if head < key:
+                lo = end + 1
+            elif head > key:
+                hi = start
+            else:
+                return line.decode("utf-8").split("\t")
+        return None
+
+    def lookup(self, word: str) -> dict | None:
+        """Kelimeyi ya da çekimli halinin kökünü arar; bulunamazsa None döner."""
+        word = normalize(word)
+        if not word or " " in word:
+            return None
+
+        fields = self._find(word)
+        if fields is not None:
+            return _entry(word, fields)
+        for lemma, allowed in lemma_candidates(word):
+            fields = self._find(lemma)
+            if fields is not None and (allowed is None or fields[1] in allowed):
+                return {**_entry(word, fields), "lemma": fields[0]}
+        return None
+
+
+def _entry(word: str, fields: list[str]) -> dict:
+    return {"word": word, "meaning": fields[2], "example": fields[3]}
+
+
+_lexicon: Lexicon | None = None
+
+
+def get_lexicon() -> Lexicon:
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = Lexicon()
+    return _lexicon
+
+
+def lookup(word: str) -> dict | None:
+    return get_lexicon().lookup(word)
+
+
+def _validate(lines: list[str]) -> list[str]:
+    errors = []
+    previous = b""
+    for number, line in enumerate(lines, 1):
+        fields = line.split("\t")
+        if len(fields) != 4 or not all(fields):
+            errors.append(f"{number}: dört dolu alan olmalı")
+            continue
+        if fields[1] not in POS_TAGS:
+            errors.append(f"{number}: bilinmeyen tür {fields[1]!r}")
+        head = fields[0].encode("utf-8")
+        if fields[0] != normalize(fields[0]):
+            errors.append(f"{number}: kelime küçük harf ve noktalamasız olmalı")
+        if head <= previous:
+            errors.append(f"{number}: sıralı değil ya da tekrar ({fields[0]})")
+        previous = head
+    return errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Yerel İngilizce-Türkçe sözlük")
+    parser.add_argument("words", nargs="*", help="aranacak kelimeler")
+    parser.add_argument("--sort", action="store_true", help="dosyayı sırala ve tekrarları at")
+    args = parser.parse_args()
+
+    with open(LEXICON_PATH, encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    if args.sort:
+        unique = {}
+        for line in lines:
+            unique.setdefault(line.split("\t", 1)[0], line)
+        lines = [unique[head] for head in sorted(unique, key=lambda head: head.encode("utf-8"))]
+        with open(LEXICON_PATH, "w", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(lines) + "\n")
+
+    errors = _validate(lines)
+    for error in errors:
+        print(error)
+    print(f"{len(lines)} kayıt, {len(errors)} hata")
+
+    for word in args.words:
+        print(f"{word}: {lookup(word)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
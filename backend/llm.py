@@ -0,0 +1,287 @@
+import asyncio
+import contextlib
+import os
+import re
+import time
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+import cassette
+import jsonutil
+import metrics
+import schemas
+
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+TRANSCRIPTION_MODEL = "whisper-large-v3"
+
+# Tekrar denemeleri SDK yerine burada yapıyoruz ki her biri sayılabilsin.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+# Worker başına aynı anda açık en fazla LLM çağrısı; paralel parçalı işler
+# (ör. çeviri) rate limit'i tek başına tüketmesin.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+_REPLY_KEY = re.compile(r'"reply"\s*:\s*"')
+
+# Groq SDK'sı ve istemci ilk çağrıda oluşturulur; import ve worker açılışı hızlı kalır.
+client = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+def get_client():
+    global client
+    if client is None:
+        from groq import AsyncGroq
+
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            print("UYARI: GROQ_API_KEY bulunamadı!")
+        client = AsyncGroq(api_key=api_key, max_retries=0)
+    return client
+
+
+def _limit() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _is_retryable(error: Exception) -> bool:
+    from groq import APIConnectionError, InternalServerError, RateLimitError
+
+    return isinstance(error, (APIConnectionError, RateLimitError, InternalServerError))
+
+
+def _upstream(kind: str, endpoint: str, kwargs: dict, create):
+    if cassette.is_enabled():
+        return cassette.call(kind, endpoint, kwargs, lambda: create(**kwargs))
+    return create(**kwargs)
+
+
+async def _call_with_retries(endpoint: str, model: str, call, limited: bool = True):
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            # limited=False: çağıran slotu zaten tutuyor (ör. akış boyunca).
+            async with _limit() if limited else contextlib.nullcontext():
+                # Sırada bekleme süresi LLM gecikmesine sayılmaz.
+                start = time.perf_counter()
+                metrics.LLM_IN_FLIGHT.inc()
+                try:
+                    result = await call()
+                finally:
+                    metrics.LLM_IN_FLIGHT.dec()
+        except Exception as e:
+            latency = time.perf_counter() - start
+            metrics.LLM_REQUESTS.inc(endpoint, model, "error")
+            metrics.LLM_ERRORS.inc(endpoint, model, type(e).__name__)
+            metrics.LLM_LATENCY.observe(endpoint, model, value=latency)
+            metrics.LLM_SUMMARY.add(endpoint, model, 0, 0, latency, False)
+            if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            attempt += 1
+            metrics.LLM_RETRIES.inc(endpoint, model)
+            await asyncio.sleep(LLM_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+            continue
+        return result, time.perf_counter() - start
+
+
+async def chat_completion(endpoint: str, **kwargs):
+    model = kwargs.get("model", DEFAULT_MODEL)
+    completion, latency = await _call_with_retries(
+        endpoint, model, lambda: _upstream("chat", endpoint, kwargs, get_client().chat.completions.create)
+    )
+
+    usage = getattr(completion, "usage", None)
+    prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+    completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+    total_tokens = int(getattr(usage, "total_tokens", 0) or prompt_tokens + completion_tokens)
+
+    metrics.LLM_REQUESTS.inc(endpoint, model, "ok")
+    metrics.LLM_LATENCY.observe(endpoint, model, value=latency)
+    metrics.LLM_PROMPT_TOKENS.inc(endpoint, model, amount=prompt_tokens)
+    metrics.LLM_COMPLETION_TOKENS.inc(endpoint, model, amount=completion_tokens)
+    metrics.LLM_TOTAL_TOKENS.inc(endpoint, model, amount=total_tokens)
+    metrics.LLM_SUMMARY.add(endpoint, model, prompt_tokens, completion_tokens, latency, True)
+    return completion
+
+
+async def chat_completion_stream(endpoint: str, **kwargs):
+    """Cevabı parça parça (içerik delta'ları) üretir.
+
+    Tüketen görev iptal edilirse ya da üreteç erken kapatılırsa upstream akış
+    kapatılır; Groq bağlantısı kesilir ve kalan token'lar üretilmez.
+    """
+    model = kwargs.get("model", DEFAULT_MODEL)
+    if cassette.is_enabled():
+        # Kayıtlar tek parça cevap tutar; akış tek delta olarak taklit edilir.
+        completion = await chat_completion(endpoint, **kwargs)
+        yield completion.choices[0].message.content or ""
+        return
+
+    # Eşzamanlılık slotu akış bitene kadar tutulur.
+    async with _limit():
+        stream, _ = await _call_with_retries(
+            endpoint,
+            model,
+            lambda: get_client().chat.completions.create(stream=True, **kwargs),
+            limited=False,
+        )
+        start = time.perf_counter()
+        prompt_tokens = completion_tokens = 0
+        status = "error"
+        metrics.LLM_IN_FLIGHT.inc()
+        try:
+            async for chunk in stream:
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+                    completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            status = "ok"
+        except (asyncio.CancelledError, GeneratorExit):
+            status = "cancelled"
+            raise
+        except Exception as e:
+            metrics.LLM_ERRORS.inc(endpoint, model, type(e).__name__)
+            raise
+        finally:
+            metrics.LLM_IN_FLIGHT.dec()
+            if status != "ok":
+                await asyncio.shield(stream.close())
+            latency = time.perf_counter() - start
+            metrics.LLM_REQUESTS.inc(endpoint, model, status)
+            metrics.LLM_LATENCY.observe(endpoint, model, value=latency)
+            metrics.LLM_PROMPT_TOKENS.inc(endpoint, model, amount=prompt_tokens)
+            metrics.LLM_COMPLETION_TOKENS.inc(endpoint, model, amount=completion_tokens)
+            metrics.LLM_TOTAL_TOKENS.inc(endpoint, model, amount=prompt_tokens + completion_tokens)
+            metrics.LLM_SUMMARY.add(endpoint, model, prompt_tokens, completion_tokens, latency, status == "ok")
+
+
+async def transcription(endpoint: str, **kwargs):
+    model = kwargs.get("model", TRANSCRIPTION_MODEL)
+    result, latency = await _call_with_retries(
+        endpoint, model, lambda: _upstream(
+            "transcription", endpoint, kwargs, get_client().audio.transcriptions.create
+        )
+    )
+    metrics.LLM_REQUESTS.inc(endpoint, model, "ok")
+    metrics.LLM_LATENCY.observe(endpoint, model, value=latency)
+    metrics.LLM_SUMMARY.add(endpoint, model, 0, 0, latency, True)
+    return result
+
+
+def parse_json(content: str, endpoint: str, model: str = DEFAULT_MODEL):
+    try:
+        return jsonutil.loads(content)
+    except ValueError:
+        metrics.LLM_JSON_FAILURES.inc(endpoint, model)
+        raise
+
+
+def parse_chat_reply(content: str, endpoint: str, model: str = DEFAULT_MODEL) -> schemas.ChatReply:
+    # Hızlı yol: pydantic-core JSON'u tek geçişte ayrıştırıp doğrular.
+    try:
+        return schemas.ChatReply.model_validate_json(content)
+    except ValidationError:
+        pass
+
+    try:
+        data = parse_json(content, endpoint, model)
+    except ValueError:
+        return schemas.ChatReply(reply=content)
+    if not isinstance(data, dict):
+        return schemas.ChatReply(reply=str(data))
+
+    # Alan tipleri bozuksa (ör. reply bir liste) en yakın değere zorla.
+    return schemas.ChatReply(
+        reply=str(data.get("reply") or ""),
+        has_mistake=bool(data.get("has_mistake")),
+        correction=str(data.get("correction") or ""),
+        explanation_tr=str(data.get("explanation_tr") or ""),
+    )
+
+
+class ReplyExtractor:
+    """Akan JSON sohbet cevabından "reply" alanının metnini geldikçe çıkarır.
+
+    Model JSON yerine düz metin dönerse metin olduğu gibi aktarılır.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.buffer = ""
+        # Şimdiye kadar çıkarılan cevap metni (iptalde yarım cevap olarak saklanır)
+        self.text = ""
+        self._pos = 0
+        self._state = "start"  # start -> seek -> reply -> done | plain
+
+    def feed(self, delta: str) -> str:
+        self.buffer += delta
+        out = []
+        while True:
+            if self._state == "start":
+                stripped = self.buffer.lstrip()
+                if not stripped:
+                    return ""
+                self._state = "seek" if stripped.startswith("{") else "plain"
+            elif self._state == "plain":
+                out.append(self.buffer[self._pos:])
+                self._pos = len(self.buffer)
+                break
+            elif self._state == "seek":
+                match = _REPLY_KEY.search(self.buffer, self._pos)
+                if match is None:
+                    break
+                self._pos = match.end()
+                self._state = "reply"
+            elif self._state == "reply":
+                char = self.buffer[self._pos:self._pos + 1]
+                if not char:
+                    break
+                if char == '"':
+                    self._pos += 1
+                    self._state = "done"
+                elif char == "\\":
+                    escape = self.buffer[self._pos + 1:self._pos + 2]
+                    if not escape:
+                        break
+                    if escape == "u":
+                        decoded = self._unicode_escape()
+                        if decoded is None:
+                            break
+                        out.append(decoded)
+                    else:
+                        out.append(self._ESCAPES.get(escape, escape))
+                        self._pos += 2
+                else:
+                    out.append(char)
+                    self._pos += 1
+            else:
+                break
+        visible = "".join(out)
+        self.text += visible
+        return visible
+
+    def _unicode_escape(self) -> str | None:
+        # \uXXXX; emojiler gibi vekil çiftler (\uD83D\uDE00) birlikte çözülür.
+        code = self.buffer[self._pos + 2:self._pos + 6]
+        if len(code) < 4:
+            return None
+        point = int(code, 16)
+        if 0xD800 <= point < 0xDC00:
+            low = self.buffer[self._pos + 6:self._pos + 12]
+            if len(low) < 6:
+                return None
+            if low.startswith("\\u"):
+                self._pos += 12
+                return chr(0x10000 + ((point - 0xD800) << 10) + (int(low[2:], 16) - 0xDC00))
+        self._pos += 6
+        return chr(point)
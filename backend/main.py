@@ -1,56 +1,104 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Header
+import time
+
+# Açılış süresi bütçesi için: ağır importlardan önce saymaya başla.
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Header, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
 from pydantic import BaseModel
-from groq import AsyncGroq
 import os
-import json
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
-import shutil
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+import asyncio
+import hashlib
+import random
+from contextlib import asynccontextmanager
 
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, text
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 
 import models
 import schemas
+import activity
+import cache
+import chunking
+import compression
+import daily
 import database
+import jobs
+import jsonutil
+import lexicon
+import llm
+import metrics
+import middleware
+import migrations
+import openings
+import placement
+import prefetch
+import profiling
+import quizzes
+import ratelimit
+import segmenter
+import sessions
+import stories
 
 load_dotenv()
 
-api_key = os.getenv("GROQ_API_KEY")
-if not api_key:
-    print("UYARI: GROQ_API_KEY bulunamadı!")
-
-client = AsyncGroq(api_key=api_key)
-
-app = FastAPI()
-
-models.Base.metadata.create_all(bind=database.engine)
-
-
-def _ensure_users_current_unit_column() -> None:
-    try:
-        inspector = inspect(database.engine)
-        if "users" not in inspector.get_table_names():
-            return
-
-        columns = {col["name"] for col in inspector.get_columns("users")}
-        if "current_unit" in columns:
-            return
-
-        with database.engine.begin() as conn:
-            conn.execute(
-                text(
-                    "ALTER TABLE users ADD COLUMN current_unit INTEGER DEFAULT 1"
-                )
-            )
-    except Exception as e:
-        print(f"UYARI: current_unit migration uygulanamadı: {e}")
+# Worker açılışı (import + lifespan) bu süreyi geçerse uyarı verilir.
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+# Sadece yerel geliştirme/benchmark için; production'da migration'lar
+# deploy adımında `python migrations.py` ile bir kez çalıştırılır.
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "0") == "1"
+# Uzun çeviriler bu boyutta parçalara bölünüp paralel çevrilir.
+TRANSLATE_CHUNK_CHARS = int(os.getenv("TRANSLATE_CHUNK_CHARS", "500"))
+# Her parça ayrı bir LLM çağrısıdır ve hız sınırından parça başına token düşer;
+# kullanıcı kovasının kapasitesini (RATE_LIMIT_USER_BURST) aşmamalı.
+TRANSLATE_MAX_CHUNKS = int(os.getenv("TRANSLATE_MAX_CHUNKS", "10"))
+TRANSLATE_MAX_CHARS = int(os.getenv("TRANSLATE_MAX_CHARS", str(TRANSLATE_CHUNK_CHARS * TRANSLATE_MAX_CHUNKS)))
+# Zayıf ağda zaman aşımından sonra aynı kaydın tekrar gönderilmesi bu süre içinde
+# önbellekten cevaplanır.
+VOICE_CACHE_TTL_SECONDS = float(os.getenv("VOICE_CACHE_TTL_SECONDS", "300"))
+# Sözlük ve çeviri cevapları neredeyse deterministik; uzun süre paylaşılabilir.
+DEFINE_CACHE_TTL_SECONDS = float(os.getenv("DEFINE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+TRANSLATE_CACHE_TTL_SECONDS = float(os.getenv("TRANSLATE_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AUTO_MIGRATE:
+        await asyncio.to_thread(migrations.migrate)
+    middleware.preallocate_route_metrics(app)
+    # Sözlük açılışı bekletmeden arka planda bir kez yüklenir.
+    warmup = asyncio.create_task(asyncio.to_thread(segmenter.get_segmenter))
+
+    startup_seconds = time.perf_counter() - _IMPORT_STARTED
+    metrics.APP_STARTUP_SECONDS.set(value=startup_seconds)
+    if startup_seconds * 1000 > STARTUP_BUDGET_MS:
+        print(
+            f"UYARI: Açılış {startup_seconds * 1000:.0f} ms sürdü "
+            f"(bütçe {STARTUP_BUDGET_MS:.0f} ms)"
+        )
+    if openings.OPENING_POOL_WARMUP:
+        opening_pool.warmup(SCENARIOS)
+    job_queue.start()
+    if daily.DAILY_BATCH_ENABLED:
+        daily_content.start()
+    streak_reset = (
+        asyncio.create_task(activity.reset_loop()) if activity.STREAK_RESET_INTERVAL_SECONDS > 0 else None
+    )
+    yield
+    warmup.cancel()
+    opening_pool.cancel()
+    prefetcher.cancel()
+    daily_content.cancel()
+    if streak_reset is not None:
+        streak_reset.cancel()
+    await job_queue.stop()
 
 
-_ensure_users_current_unit_column()
+app = FastAPI(lifespan=lifespan, default_response_class=jsonutil.FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -59,6 +107,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if profiling.is_enabled():
+    app.add_middleware(middleware.ProfilingMiddleware)
+# Profil/CORS'tan sonra, ölçümden önce: metrikler istemciye giden (sıkıştırılmış) boyutu görür.
+app.add_middleware(middleware.CompressionMiddleware)
+# En dışta olmalı ki CORS dahil tüm istek süresini ölçsün.
+app.add_middleware(middleware.HTTPMetricsMiddleware)
 
 # --- GÜVENLİK AYARLARI ---
 SECRET_KEY = os.getenv("SECRET_KEY", "cok_gizli_bir_anahtar_buraya_yaz")
@@ -115,6 +169,71 @@ def current_user_dep(
     return get_current_user(token, db)
 
 
+def optional_user_dep(
+    authorization: str | None = Header(default=None),
+    db: Session = Depends(database.get_db),
+) -> models.User | None:
+    # Girişsiz de kullanılabilen uç noktalar için; token gönderildiyse doğrulanır.
+    if not authorization:
+        return None
+    return get_current_user(_extract_bearer_token(authorization), db)
+
+
+# --- İSTEK SINIRLAMA ---
+# LLM kullanan uç noktalar paylaşılan Groq kotasını tüketir. Token gönderildiyse
+# kullanıcı kovası, her durumda da IP kovası düşülür; biri boşsa 429 döner.
+# Kullanıcı kimliği DB'ye gitmeden token'dan okunur; geçersiz token'ı uç
+# noktanın kendi doğrulaması reddeder.
+user_rate_limiter = ratelimit.TokenBucketLimiter(
+    ratelimit.RATE_LIMIT_USER_PER_MINUTE, ratelimit.RATE_LIMIT_USER_BURST
+)
+ip_rate_limiter = ratelimit.TokenBucketLimiter(
+    ratelimit.RATE_LIMIT_IP_PER_MINUTE, ratelimit.RATE_LIMIT_IP_BURST
+)
+
+
+def _token_subject(authorization: str | None) -> str | None:
+    parts = (authorization or "").split(" ")
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    try:
+        return jwt.decode(parts[1], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def charge_rate_limit(request: Request, authorization: str | None, endpoint: str, cost: float = 1.0) -> None:
+    """Kullanıcı ve IP kovalarından `cost` token düşer; yetmezse 429 atar."""
+    if not ratelimit.RATE_LIMIT_ENABLED:
+        return
+    username = _token_subject(authorization)
+    checks = [("ip", ip_rate_limiter, ratelimit.client_ip(request.scope))]
+    if username is not None:
+        checks.insert(0, ("user", user_rate_limiter, username))
+    # Önce hepsine bakılır, token yalnızca hepsi izin verirse harcanır; IP'de
+    # reddedilen istek kullanıcının kovasından düşmez.
+    for scope, limiter, key in checks:
+        wait = limiter.peek(key, cost)
+        if wait > 0:
+            metrics.RATE_LIMITED.inc(endpoint, scope)
+            retry_after = ratelimit.retry_after_header(wait)
+            raise HTTPException(
+                status_code=429,
+                detail=f"Çok fazla istek gönderildi, lütfen {retry_after} saniye sonra tekrar deneyin",
+                headers={"Retry-After": retry_after},
+            )
+    for scope, limiter, key in checks:
+        limiter.acquire(key, cost)
+        metrics.RATE_LIMIT_KEYS.set(scope, value=len(limiter))
+
+
+def rate_limit_dep(endpoint: str, cost: float = 1.0):
+    async def _check(request: Request, authorization: str | None = Header(default=None)) -> None:
+        charge_rate_limit(request, authorization, endpoint, cost)
+
+    return _check
+
+
 @app.post("/register", response_model=schemas.Token)
 def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
     db_user = db.query(models.User).filter(models.User.username == user.username).first()
@@ -148,6 +267,9 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(database.ge
     if not verify_password(user_credentials.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Kullanıcı adı veya şifre hatalı")
 
+    user.last_login = datetime.utcnow()
+    db.commit()
+
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -162,56 +284,6 @@ def read_users_me(
     return user
 
 
-PLACEMENT_SYSTEM_PROMPT = """
-Sen uzman bir İngilizce sınav hazırlayıcısısın.
-Görevin: Kullanıcının seviyesini belirlemek için 10 adet çoktan seçmeli soru hazırla.
-Sorular A1 seviyesinden başlayıp C1 seviyesine kadar kademeli olarak zorlaşmalı.
-
-KESİNLİKLE ŞU JSON FORMATINDA CEVAP VER:
-{
-    "questions": [
-        {
-            "id": 1,
-            "question": "İngilizce soru metni",
-            "question_tr": "Sorunun Türkçe çevirisi",
-            "options": ["A şıkkı", "B şıkkı", "C şıkkı", "D şıkkı"],
-            "correct_answer": "Doğru olan şıkkın tam metni"
-        }
-    ]
-}
-"""
-
-
-@app.get("/generate_placement_test", response_model=schemas.PlacementTest)
-async def generate_placement_test(current_user: models.User = Depends(current_user_dep)):
-    try:
-        completion = await client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": PLACEMENT_SYSTEM_PROMPT},
-                {
-                    "role": "user",
-                    "content": "Generate a 10-question placement test ranging from A1 to C1.",
-                },
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=2048,
-            response_format={"type": "json_object"},
-        )
-
-        content = completion.choices[0].message.content or "{}"
-        data = json.loads(content)
-        if not isinstance(data, dict) or "questions" not in data:
-            raise HTTPException(status_code=500, detail="Test formatı geçersiz")
-        return data
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Test Hatası: {e}")
-        raise HTTPException(status_code=500, detail="Test oluşturulamadı")
-
-
 @app.get("/profile", response_model=schemas.UserOut)
 async def get_profile(
     current_user: models.User = Depends(current_user_dep),
@@ -221,42 +293,65 @@ async def get_profile(
         username=current_user.username,
         xp=current_user.xp,
         level=current_user.level,
-        streak=current_user.streak,
+        streak=activity.current_streak(current_user),
     )
 
 
-@app.post("/submit_placement_test")
-async def submit_placement_test(
-    result: schemas.TestResult,
+# Eski LLM üretimli test: sorular hiçbir yerde puanlanamaz (seviyeyi istemcinin
+# gönderdiği puandan atıyordu), sadece LLM bütçesi yakıyordu. Eski uygulama
+# sürümleri güncellemeye yönlendirilir.
+@app.get("/generate_placement_test", status_code=410)
+@app.post("/submit_placement_test", status_code=410)
+@app.post("/jobs/placement_test", status_code=410)
+def legacy_placement_test():
+    raise HTTPException(
+        status_code=410,
+        detail="Bu test sürümü kaldırıldı, lütfen uygulamayı güncelleyin (/placement_test/start)",
+    )
+
+
+# --- UYARLANABİLİR SEVİYE TESTİ ---
+# Sorular seviye etiketli sabit bir bankadan gelir (LLM çağrısı yok); her
+# cevap sunucuda puanlanır ve tahmin yeterince kesinleşince test biter.
+# Eski /generate_placement_test, /submit_placement_test ve /jobs/placement_test
+# 410 döner; seviye yalnızca buradan atanır.
+def _placement_error(e: placement.PlacementError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@app.post("/placement_test/start")
+def start_placement_test(
     current_user: models.User = Depends(current_user_dep),
     db: Session = Depends(database.get_db),
 ):
-    score = result.correct_count
-    new_level = "A1"
-
-    if score >= 9:
-        new_level = "C1"
-    elif score >= 7:
-        new_level = "B2"
-    elif score >= 5:
-        new_level = "B1"
-    elif score >= 3:
-        new_level = "A2"
-    else:
-        new_level = "A1"
+    return placement.start(db, current_user.id)
 
-    level_map = {"A1": 1, "A2": 2, "B1": 3, "B2": 4, "C1": 5}
-    current_user.level = level_map[new_level]
-    current_user.xp = int(current_user.xp or 0) + 100
 
-    db.add(current_user)
+@app.post("/placement_test/{test_id}/answer")
+def answer_placement_test(
+    test_id: str,
+    body: schemas.PlacementAnswer,
+    current_user: models.User = Depends(current_user_dep),
+    db: Session = Depends(database.get_db),
+):
+    try:
+        result = placement.answer(db, test_id, current_user.id, body.item_id, body.answer)
+    except placement.PlacementError as e:
+        db.rollback()
+        raise _placement_error(e)
+
+    if result["done"]:
+        new_level = result["assigned_level"]
+        current_user.level = placement.LEVEL_NUMBERS[new_level]
+        current_user.xp = int(current_user.xp or 0) + 100
+        activity.record(db, current_user, xp=100)
+        db.add(current_user)
+        metrics.PLACEMENT_ITEMS.observe(value=result["answered"])
+        metrics.PLACEMENT_RESULTS.inc(new_level)
+        result["message"] = f"Tebrikler! Seviyen {new_level} olarak belirlendi."
     db.commit()
+    return result
 
-    return {
-        "score": score,
-        "assigned_level": new_level,
-        "message": f"Tebrikler! Seviyen {new_level} olarak belirlendi.",
-    }
 
 # 1. SENARYO KİMLİKLERİ (AI Personaları)
 SCENARIOS = {
@@ -323,8 +418,106 @@ SCENARIOS = {
         Ciddi ve otoriter ol. Gülümseme.
         SADECE İngilizce konuş.
     """,
+    "directions": """
+        ROLEPLAY STARTS. YOU ARE A LOCAL PERSON ON A BUSY CITY STREET.
+        The user is a tourist who looks lost.
+        Offer help, ask where they want to go, and give simple directions (left, right, straight, next to).
+        Speak ONLY in English. Short, friendly and clear.
+    """,
+    "daily_routine": """
+        ROLEPLAY STARTS. YOU ARE A NEW FRIEND FROM A LANGUAGE EXCHANGE.
+        Ask the user about their daily routine: when they wake up, work or school, meals, evenings.
+        Share a little about your own day too. Use simple present tense.
+        Speak ONLY in English. Warm and curious.
+    """,
+    "weather": """
+        ROLEPLAY STARTS. YOU ARE A NEIGHBOUR MEETING THE USER OUTSIDE.
+        Chat about today's weather, the forecast, and favourite seasons.
+        Ask simple questions and react naturally.
+        Speak ONLY in English. Casual and short.
+    """,
+    "travel": """
+        ROLEPLAY STARTS. YOU ARE A TRAVEL AGENT.
+        The customer wants to plan a holiday.
+        Ask about destination, dates, budget, and preferences, and suggest options.
+        Speak ONLY in English. Helpful and enthusiastic.
+    """,
+    "job_interview": """
+        ROLEPLAY STARTS. YOU ARE A HIRING MANAGER AT A MID-SIZED COMPANY.
+        The candidate (user) has arrived for a job interview.
+        Greet them professionally, then ask about their experience, strengths, and why they want the job.
+        Never say this is practice; act like a real interview.
+        Speak ONLY in English.
+    """,
+    "business_meeting": """
+        ROLEPLAY STARTS. YOU ARE A PROJECT MANAGER OPENING A TEAM MEETING.
+        The user is a colleague attending the meeting.
+        Set the agenda, ask for a status update, and discuss next steps and deadlines.
+        Speak ONLY in English. Professional and concise.
+    """,
+    "presentation": """
+        ROLEPLAY STARTS. YOU ARE THE HOST OF A SMALL CONFERENCE SESSION.
+        The user is about to give a short presentation.
+        Introduce them, then ask questions from the audience about their topic.
+        Speak ONLY in English. Polite and professional.
+    """,
+    "negotiation": """
+        ROLEPLAY STARTS. YOU ARE A SUPPLIER NEGOTIATING A CONTRACT.
+        The user is a buyer who wants a better price and delivery terms.
+        Defend your offer, make counter-offers, and look for a compromise.
+        Speak ONLY in English. Firm but friendly.
+    """,
+    "academic": """
+        ROLEPLAY STARTS. YOU ARE A UNIVERSITY PROFESSOR DURING OFFICE HOURS.
+        The student (user) came to discuss a research paper or assignment.
+        Ask about their thesis, sources, and arguments, and give academic feedback.
+        Speak ONLY in English. Formal and precise.
+    """,
+    "debate": """
+        ROLEPLAY STARTS. YOU ARE A DEBATE PARTNER.
+        Propose a debatable topic (e.g. remote work, social media, school uniforms) and take the opposite side to the user.
+        Challenge their arguments politely and ask for evidence.
+        Speak ONLY in English. Sharp but respectful.
+    """,
+    "cultural": """
+        ROLEPLAY STARTS. YOU ARE A FOREIGN FRIEND CURIOUS ABOUT TURKISH CULTURE.
+        Ask the user about traditions, food, holidays, and daily life in Türkiye, and compare with your own culture.
+        Speak ONLY in English. Open-minded and engaging.
+    """,
 }
 
+OPENINGS_SYSTEM_SUFFIX = """
+
+        GÖREVİN: Bu senaryo için birbirinden farklı {count} adet İLK AÇILIŞ CÜMLESİ yaz.
+        Her biri tek başına sohbeti başlatabilmeli, kısa ve doğal olmalı.
+
+        KESİNLİKLE ŞU JSON FORMATINDA CEVAP VER:
+        {{
+            "openings": ["Açılış cümlesi 1", "Açılış cümlesi 2"]
+        }}
+        """
+
+
+async def _generate_openings(scenario: str, count: int) -> list[str]:
+    completion = await llm.chat_completion(
+        "start_chat_pool",
+        messages=[
+            {"role": "system", "content": SCENARIOS[scenario] + OPENINGS_SYSTEM_SUFFIX.format(count=count)},
+            {"role": "user", "content": "Write the openings now."},
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.9,
+        max_tokens=1024,
+        response_format={"type": "json_object"},
+    )
+    content = completion.choices[0].message.content or "{}"
+    data = llm.parse_json(content, "start_chat_pool")
+    openings_list = data.get("openings") if isinstance(data, dict) else None
+    return openings_list if isinstance(openings_list, list) else []
+
+
+opening_pool = openings.OpeningPool(_generate_openings)
+
 
 # Seviyelere göre öğrenme yolu
 LEVEL_CURRICULUM = {
@@ -584,6 +777,7 @@ LEVEL_CURRICULUM = {
 CURRICULUM = []
 for level_units in LEVEL_CURRICULUM.values():
     CURRICULUM.extend(level_units)
+UNITS_BY_ID = {unit["id"]: unit for unit in CURRICULUM}
 
 
 class QuizQuestion(BaseModel):
@@ -594,22 +788,32 @@ class QuizQuestion(BaseModel):
 
 
 class QuizResponse(BaseModel):
+    quiz_id: str | None = None
+    topic: str = ""
     questions: list[QuizQuestion]
 
 
 class QuizRequest(BaseModel):
-    topic: str
+    # Boş bırakılırsa kullanıcının en zayıf konusu seçilir.
+    topic: str = ""
 
 
-@app.post("/generate_quiz", response_model=QuizResponse)
-async def generate_quiz(
-    req: QuizRequest,
-    current_user: models.User = Depends(current_user_dep),
-):
-    try:
-        system_prompt = f"""
+QUIZ_DEFAULT_TOPIC = "general English grammar"
+
+# complete_unit sonrası sıradaki quiz ünitesinin soruları kullanıcı başına
+# önceden üretilip burada bekletilir; tek kullanımlıktır.
+quiz_prefetch_cache = cache.Cache("quiz_prefetch", prefetch.PREFETCH_TTL_SECONDS)
+prefetcher = prefetch.Prefetcher()
+
+
+def _quiz_prefetch_key(user_id: int, topic: str) -> str:
+    return f"{user_id}:{stories.normalize_topic(topic)}"
+
+
+async def _generate_quiz_questions(topic: str) -> list[dict]:
+    system_prompt = f"""
 Sen bir İngilizce öğretmenisin.
-Görevin: '{req.topic}' konusu hakkında A1-A2 seviyesinde 5 adet çoktan seçmeli soru hazırla.
+Görevin: '{topic}' konusu hakkında A1-A2 seviyesinde 5 adet çoktan seçmeli soru hazırla.
 Sorular kısa ve net olsun.
 
 JSON FORMATI:
@@ -625,19 +829,44 @@ JSON FORMATI:
 }}
 """
 
-        completion = await client.chat.completions.create(
-            messages=[{"role": "system", "content": system_prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=1024,
-            response_format={"type": "json_object"},
-        )
+    completion = await llm.chat_completion(
+        "quiz",
+        messages=[{"role": "system", "content": system_prompt}],
+        model="llama-3.3-70b-versatile",
+        temperature=0.3,
+        max_tokens=1024,
+        response_format={"type": "json_object"},
+    )
 
-        content = completion.choices[0].message.content or "{}"
-        data = json.loads(content)
-        if not isinstance(data, dict) or "questions" not in data:
-            raise HTTPException(status_code=500, detail="Quiz formatı geçersiz")
-        return data
+    content = completion.choices[0].message.content or "{}"
+    data = llm.parse_json(content, "quiz")
+    if not isinstance(data, dict) or "questions" not in data:
+        raise HTTPException(status_code=500, detail="Quiz formatı geçersiz")
+    return QuizResponse.model_validate({"questions": data["questions"]}).model_dump()["questions"]
+
+
+@app.post("/generate_quiz", response_model=QuizResponse, dependencies=[Depends(rate_limit_dep("generate_quiz"))])
+async def generate_quiz(
+    req: QuizRequest,
+    current_user: models.User = Depends(current_user_dep),
+):
+    try:
+        topic = req.topic.strip()
+        if not topic:
+            topic = await asyncio.to_thread(quizzes.weakest_topic_name, current_user.id) or QUIZ_DEFAULT_TOPIC
+
+        # Önceden üretildiyse hazır set, üretim sürüyorsa onun sonucu alınır;
+        # burada canlı üretilen set saklanmaz.
+        key = _quiz_prefetch_key(current_user.id, topic)
+        questions, source = await quiz_prefetch_cache.get_or_compute(
+            key, lambda: _generate_quiz_questions(topic), cacheable=lambda value: False
+        )
+        metrics.PREFETCH_SERVED.inc("quiz", source)
+        if source != "miss":
+            await quiz_prefetch_cache.delete(key)
+        # Gönderim sunucudaki bu kopyaya göre puanlanır.
+        quiz_id = await asyncio.to_thread(quizzes.save, current_user.id, topic, questions)
+        return {"quiz_id": quiz_id, "topic": topic, "questions": questions}
     except HTTPException:
         raise
     except Exception as e:
@@ -645,6 +874,35 @@ JSON FORMATI:
         raise HTTPException(status_code=500, detail="Quiz oluşturulamadı")
 
 
+@app.post("/quiz/{quiz_id}/submit")
+def submit_quiz(
+    quiz_id: str,
+    body: schemas.QuizResponse,
+    current_user: models.User = Depends(current_user_dep),
+    db: Session = Depends(database.get_db),
+):
+    try:
+        result = quizzes.grade(db, quiz_id, current_user.id, body.answers)
+    except quizzes.QuizError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    activity.record(db, current_user)
+    db.commit()
+    return result
+
+
+@app.get("/progress/topics")
+def get_topic_progress(
+    current_user: models.User = Depends(current_user_dep),
+    db: Session = Depends(database.get_db),
+):
+    weak = quizzes.weakest_topic(db, current_user.id)
+    return {
+        "topics": quizzes.topic_accuracy(db, current_user.id),
+        "weak_topic": weak.topic if weak is not None else None,
+    }
+
+
 class Flashcard(BaseModel):
     term: str
     meaning: str
@@ -657,31 +915,43 @@ class FlashcardsResponse(BaseModel):
     cards: list[Flashcard]
 
 
-@app.get("/generate_flashcards", response_model=FlashcardsResponse)
-async def generate_flashcards(current_user: models.User = Depends(current_user_dep)):
-    try:
-        import random
-        import datetime
-        
-        # Rastgele kategoriler seçerek çeşitlilik sağla
-        categories = [
-            "daily conversations and social interactions",
-            "business and work situations", 
-            "emotions and feelings",
-            "travel and transportation",
-            "food and dining",
-            "technology and modern life",
-            "health and wellness",
-            "education and learning",
-            "weather and nature",
-            "money and finance"
-        ]
-        
-        selected_categories = random.sample(categories, 3)
-        
-        system_prompt = f"""
+FLASHCARD_CATEGORIES = [
+    "daily conversations and social interactions",
+    "business and work situations",
+    "emotions and feelings",
+    "travel and transportation",
+    "food and dining",
+    "technology and modern life",
+    "health and wellness",
+    "education and learning",
+    "weather and nature",
+    "money and finance",
+]
+
+DAILY_STORY_TOPICS = [
+    "a day at the market",
+    "a lost phone",
+    "a new neighbour",
+    "a weekend trip",
+    "cooking for friends",
+    "a job interview",
+    "a rainy day",
+    "a football match",
+    "a visit to the doctor",
+    "learning to swim",
+    "a birthday surprise",
+    "moving to a new city",
+]
+
+
+async def _generate_daily_deck(level: int, day) -> dict:
+    level_name = placement.LEVELS[level - 1]
+    # Aynı gün aynı seviyeye aynı kategoriler; günler arasında çeşitlilik.
+    selected_categories = random.Random(f"{day.isoformat()}:{level}").sample(FLASHCARD_CATEGORIES, 3)
+
+    system_prompt = f"""
 You are an English teacher.
-Create 7 daily English idiom/phrase flashcards for learners (A2-B2 level).
+Create 7 daily English idiom/phrase flashcards for {level_name} level learners.
 
 Focus on these categories: {", ".join(selected_categories)}
 Use different idioms each time - be creative and varied!
@@ -702,20 +972,53 @@ Return ONLY valid JSON with this format:
 IMPORTANT: Always generate DIFFERENT idioms each time. Don't repeat the same ones.
 """
 
-        completion = await client.chat.completions.create(
-            messages=[{"role": "system", "content": system_prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.9,  # Artırılmış rastgelelik
-            max_tokens=1200,
-            response_format={"type": "json_object"},
-        )
+    completion = await llm.chat_completion(
+        "flashcards",
+        messages=[{"role": "system", "content": system_prompt}],
+        model="llama-3.3-70b-versatile",
+        temperature=0.9,  # Artırılmış rastgelelik
+        max_tokens=1200,
+        response_format={"type": "json_object"},
+    )
+
+    content = completion.choices[0].message.content or "{}"
+    data = llm.parse_json(content, "flashcards")
+    if not isinstance(data, dict) or "cards" not in data:
+        raise HTTPException(status_code=500, detail="Flashcard formatı geçersiz")
+    return FlashcardsResponse.model_validate(data).model_dump()
+
+
+async def _generate_daily_story(level: int, day) -> dict:
+    level_name = placement.LEVELS[level - 1]
+    topic = DAILY_STORY_TOPICS[(day.toordinal() + level) % len(DAILY_STORY_TOPICS)]
+    data = await _generate_story(topic, level_name)
+    return {"topic": topic, "level": level_name, **data}
+
+
+# Günün destesi ve hikayesi seviye başına günde bir kez üretilir; LLM maliyeti
+# kullanıcı sayısından bağımsızdır.
+daily_content = daily.DailyContent(
+    {"deck": _generate_daily_deck, "story": _generate_daily_story},
+    levels=sorted(LEVEL_CURRICULUM),
+)
+
+
+async def _daily_response(user: models.User, kind: str, if_none_match: str | None) -> Response:
+    level = min(max(int(getattr(user, "level", 1) or 1), 1), len(placement.LEVELS))
+    body, etag = await daily_content.get(level, kind)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if etag in _parse_if_none_match(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-        content = completion.choices[0].message.content or "{}"
-        data = json.loads(content)
-        if not isinstance(data, dict) or "cards" not in data:
-            raise HTTPException(status_code=500, detail="Flashcard formatı geçersiz")
-        return data
 
+@app.get("/generate_flashcards", response_model=FlashcardsResponse)
+async def generate_flashcards(
+    current_user: models.User = Depends(current_user_dep),
+    if_none_match: str | None = Header(default=None),
+):
+    try:
+        return await _daily_response(current_user, "deck", if_none_match)
     except HTTPException:
         raise
     except Exception as e:
@@ -723,130 +1026,188 @@ IMPORTANT: Always generate DIFFERENT idioms each time. Don't repeat the same one
         raise HTTPException(status_code=500, detail="Flashcards oluşturulamadı")
 
 
+@app.get("/daily/story")
+async def get_daily_story(
+    current_user: models.User = Depends(current_user_dep),
+    if_none_match: str | None = Header(default=None),
+):
+    try:
+        return await _daily_response(current_user, "story", if_none_match)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Günün Hikayesi Hatası: {e}")
+        raise HTTPException(status_code=500, detail="Günün hikayesi yüklenemedi")
+
+
+# Boşluk doldurma soruları havuzu
+DAILY_TEST_QUESTIONS = [
+    {
+        "sentence": "She ___ to school every day.",
+        "answer": "goes",
+        "turkish": "O her gün okula gider.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "They ___ playing football now.",
+        "answer": "are",
+        "turkish": "Onlar şimdi futbol oynuyorlar.",
+        "topic": "present continuous"
+    },
+    {
+        "sentence": "I ___ my homework yesterday.",
+        "answer": "did",
+        "turkish": "Ben dün ödevimi yaptım.",
+        "topic": "past simple"
+    },
+    {
+        "sentence": "We will ___ to the cinema tomorrow.",
+        "answer": "go",
+        "turkish": "Biz yarın sinemaya gideceğiz.",
+        "topic": "future"
+    },
+    {
+        "sentence": "He ___ English very well.",
+        "answer": "speaks",
+        "turkish": "O İngilizceyi çok iyi konuşur.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "The cat ___ on the table.",
+        "answer": "is",
+        "turkish": "Kedi masanın üzerindedir.",
+        "topic": "to be"
+    },
+    {
+        "sentence": "They ___ finished their work.",
+        "answer": "have",
+        "turkish": "Onlar işlerini bitirdiler.",
+        "topic": "present perfect"
+    },
+    {
+        "sentence": "She ___ coffee in the morning.",
+        "answer": "drinks",
+        "turkish": "O sabah kahve içer.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "I ___ reading a book now.",
+        "answer": "am",
+        "turkish": "Ben şimdi bir kitap okuyorum.",
+        "topic": "present continuous"
+    },
+    {
+        "sentence": "He ___ to music every evening.",
+        "answer": "listens",
+        "turkish": "O her akşam müzik dinler.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "We ___ at home last night.",
+        "answer": "were",
+        "turkish": "Biz dün gece evdeydik.",
+        "topic": "past simple"
+    },
+    {
+        "sentence": "She ___ her nails every week.",
+        "answer": "cuts",
+        "turkish": "O her hafta tırnaklarını keser.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "They ___ going to visit us.",
+        "answer": "are",
+        "turkish": "Onlar bizi ziyaret edecekler.",
+        "topic": "future"
+    },
+    {
+        "sentence": "I ___ a new car last month.",
+        "answer": "bought",
+        "turkish": "Ben geçen ay yeni bir araba aldım.",
+        "topic": "past simple"
+    },
+    {
+        "sentence": "The sun ___ in the east.",
+        "answer": "rises",
+        "turkish": "Güneş doğudan doğar.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "She ___ French and Spanish.",
+        "answer": "speaks",
+        "turkish": "O Fransızca ve İspanyolca konuşur.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "We ___ dinner at 7 PM.",
+        "answer": "have",
+        "turkish": "Biz akşam 7'de yemek yeriz.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "He ___ his glasses every day.",
+        "answer": "wears",
+        "turkish": "O her gün gözlük takar.",
+        "topic": "present simple"
+    },
+    {
+        "sentence": "They ___ married last year.",
+        "answer": "got",
+        "turkish": "Onlar geçen yıl evlendiler.",
+        "topic": "past simple"
+    },
+    {
+        "sentence": "I ___ to the store yesterday.",
+        "answer": "went",
+        "turkish": "Ben dün mağazaya gittim.",
+        "topic": "past simple"
+    }
+]
+
+
+# Quiz konuları (müfredattaki quiz_topic'ler) ile günlük test soru etiketleri
+# farklı adlandırılıyor; zayıf konu bu eşleme üzerinden günlük teste yansır.
+QUIZ_TOPIC_DAILY_TAGS = {
+    "Basic Greetings and Verb To Be": ("to be",),
+    "Present Tense Review": ("present simple", "present continuous"),
+    "Past Tense Review": ("past simple",),
+    "Advanced Grammar Review": ("present perfect", "future"),
+}
+DAILY_FOCUS_TAGS = {stories.normalize_topic(topic): tags for topic, tags in QUIZ_TOPIC_DAILY_TAGS.items()}
+# Serbest yazılmış quiz konusu doğrudan bir etiketse ("past simple") o da eşleşir.
+for _tag in {q["topic"] for q in DAILY_TEST_QUESTIONS}:
+    DAILY_FOCUS_TAGS.setdefault(stories.normalize_topic(_tag), (_tag,))
+
+
+def _daily_test_payload(user_level: int, rng=random, focus_topic_key: str | None = None) -> dict:
+    # Seviyeye göre soru havuzu ayarla
+    if user_level <= 2:  # A1-A2
+        selected_questions = DAILY_TEST_QUESTIONS[:15]
+    elif user_level <= 3:  # B1
+        selected_questions = DAILY_TEST_QUESTIONS[:18]
+    else:  # B2-C1
+        selected_questions = DAILY_TEST_QUESTIONS
+
+    # Rastgele 10 soru seç; zayıf konudan olanlar (en fazla 4) öne alınır.
+    questions = rng.sample(selected_questions, min(10, len(selected_questions)))
+    focus_tags = DAILY_FOCUS_TAGS.get(focus_topic_key or "")
+    if focus_tags:
+        focus = [q for q in selected_questions if q["topic"] in focus_tags]
+        focus = rng.sample(focus, min(4, len(focus)))
+        questions = (focus + [q for q in questions if q not in focus])[: len(questions)]
+    return {"questions": questions}
+
+
 @app.get("/daily_test")
-def get_daily_test(current_user: models.User = Depends(current_user_dep)):
+def get_daily_test(
+    current_user: models.User = Depends(current_user_dep),
+    db: Session = Depends(database.get_db),
+):
     try:
-        import random
-        
-        # Boşluk doldurma soruları havuzu
-        fill_blank_questions = [
-            {
-                "sentence": "She ___ to school every day.",
-                "answer": "goes",
-                "turkish": "O her gün okula gider."
-            },
-            {
-                "sentence": "They ___ playing football now.",
-                "answer": "are",
-                "turkish": "Onlar şimdi futbol oynuyorlar."
-            },
-            {
-                "sentence": "I ___ my homework yesterday.",
-                "answer": "did",
-                "turkish": "Ben dün ödevimi yaptım."
-            },
-            {
-                "sentence": "We will ___ to the cinema tomorrow.",
-                "answer": "go",
-                "turkish": "Biz yarın sinemaya gideceğiz."
-            },
-            {
-                "sentence": "He ___ English very well.",
-                "answer": "speaks",
-                "turkish": "O İngilizceyi çok iyi konuşur."
-            },
-            {
-                "sentence": "The cat ___ on the table.",
-                "answer": "is",
-                "turkish": "Kedi masanın üzerindedir."
-            },
-            {
-                "sentence": "They ___ finished their work.",
-                "answer": "have",
-                "turkish": "Onlar işlerini bitirdiler."
-            },
-            {
-                "sentence": "She ___ coffee in the morning.",
-                "answer": "drinks",
-                "turkish": "O sabah kahve içer."
-            },
-            {
-                "sentence": "I ___ reading a book now.",
-                "answer": "am",
-                "turkish": "Ben şimdi bir kitap okuyorum."
-            },
-            {
-                "sentence": "He ___ to music every evening.",
-                "answer": "listens",
-                "turkish": "O her akşam müzik dinler."
-            },
-            {
-                "sentence": "We ___ at home last night.",
-                "answer": "were",
-                "turkish": "Biz dün gece evdeydik."
-            },
-            {
-                "sentence": "She ___ her nails every week.",
-                "answer": "cuts",
-                "turkish": "O her hafta tırnaklarını keser."
-            },
-            {
-                "sentence": "They ___ going to visit us.",
-                "answer": "are",
-                "turkish": "Onlar bizi ziyaret edecekler."
-            },
-            {
-                "sentence": "I ___ a new car last month.",
-                "answer": "bought",
-                "turkish": "Ben geçen ay yeni bir araba aldım."
-            },
-            {
-                "sentence": "The sun ___ in the east.",
-                "answer": "rises",
-                "turkish": "Güneş doğudan doğar."
-            },
-            {
-                "sentence": "She ___ French and Spanish.",
-                "answer": "speaks",
-                "turkish": "O Fransızca ve İspanyolca konuşur."
-            },
-            {
-                "sentence": "We ___ dinner at 7 PM.",
-                "answer": "have",
-                "turkish": "Biz akşam 7'de yemek yeriz."
-            },
-            {
-                "sentence": "He ___ his glasses every day.",
-                "answer": "wears",
-                "turkish": "O her gün gözlük takar."
-            },
-            {
-                "sentence": "They ___ married last year.",
-                "answer": "got",
-                "turkish": "Onlar geçen yıl evlendiler."
-            },
-            {
-                "sentence": "I ___ to the store yesterday.",
-                "answer": "went",
-                "turkish": "Ben dün mağazaya gittim."
-            }
-        ]
-        
         # Kullanıcı seviyesine göre soru seçimi
         user_level = int(getattr(current_user, "level", 1) or 1)
-        
-        # Seviyeye göre soru havuzu ayarla
-        if user_level <= 2:  # A1-A2
-            selected_questions = fill_blank_questions[:15]
-        elif user_level <= 3:  # B1
-            selected_questions = fill_blank_questions[:18]
-        else:  # B2-C1
-            selected_questions = fill_blank_questions
-        
-        # Rastgele 10 soru seç
-        questions = random.sample(selected_questions, min(10, len(selected_questions)))
-        
-        return {"questions": questions}
+        weak = quizzes.weakest_topic(db, current_user.id)
+        return _daily_test_payload(user_level, focus_topic_key=weak.topic_key if weak is not None else None)
         
     except Exception as e:
         print(f"Daily Test Hatası: {e}")
@@ -869,7 +1230,8 @@ def complete_daily_test(current_user: models.User = Depends(current_user_dep), d
             level_up = True
         else:
             level_up = False
-        
+
+        streak = activity.record(db, current_user, xp=50)
         db.add(current_user)
         db.commit()
         
@@ -877,7 +1239,8 @@ def complete_daily_test(current_user: models.User = Depends(current_user_dep), d
             "message": "Daily test completed! +50 XP",
             "new_level": new_level,
             "level_up": level_up,
-            "total_xp": current_user.xp
+            "total_xp": current_user.xp,
+            "streak": streak,
         }
         
     except Exception as e:
@@ -885,11 +1248,12 @@ def complete_daily_test(current_user: models.User = Depends(current_user_dep), d
         raise HTTPException(status_code=500, detail="Test tamamlanamadı")
 
 
-@app.get("/roadmap")
-def get_roadmap(current_user: models.User = Depends(current_user_dep)):
-    user_level = int(getattr(current_user, "level", 1) or 1)
-    current_unit = int(getattr(current_user, "current_unit", 1) or 1)
-    
+# Roadmap yalnızca (current_unit, user_level) ikilisine bağlı; gövde ve sıkıştırılmış
+# halleri bir kez üretilip saklanır.
+roadmap_cache = compression.CompressedCache()
+
+
+def _build_roadmap(current_unit: int, user_level: int) -> dict:
     # Tüm unit'leri 1-30 sıralı şekilde göster
     roadmap_data = []
     
@@ -909,8 +1273,99 @@ def get_roadmap(current_user: models.User = Depends(current_user_dep)):
     }
 
 
+@app.get("/roadmap")
+def get_roadmap(
+    current_user: models.User = Depends(current_user_dep),
+    accept_encoding: str | None = Header(default=None),
+):
+    user_level = int(getattr(current_user, "level", 1) or 1)
+    current_unit = int(getattr(current_user, "current_unit", 1) or 1)
+    return roadmap_cache.response(
+        (current_unit, user_level),
+        lambda: _build_roadmap(current_unit, user_level),
+        accept_encoding,
+    )
+
+
+BOOTSTRAP_SECTIONS = ("profile", "roadmap", "daily_test")
+
+
+def _section_etag(name: str, payload) -> str:
+    digest = hashlib.blake2b(jsonutil.dumps(payload), digest_size=8).hexdigest()
+    return f'"{name}-{digest}"'
+
+
+def _parse_if_none_match(value: str | None) -> set[str]:
+    if not value:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in value.split(",") if tag.strip()}
+
+
+@app.get("/bootstrap")
+def bootstrap(
+    response: Response,
+    current_user: models.User = Depends(current_user_dep),
+    db: Session = Depends(database.get_db),
+    if_none_match: str | None = Header(default=None),
+):
+    # Açılışta /profile, /roadmap ve /daily_test yerine tek istek: kullanıcı bir kez
+    # doğrulanır ve yüklenir. İstemci elindeki bölüm ETag'lerini If-None-Match ile
+    # gönderir; değişmeyen bölümler gövdeye konmaz, "unchanged" listesinde döner.
+    # Bölüm ETag'lerinden türeyen birleşik ETag başlığı 200 ve 304'te de gönderilir;
+    # If-None-Match'te o da kabul edilir.
+    user_level = int(getattr(current_user, "level", 1) or 1)
+    current_unit = int(getattr(current_user, "current_unit", 1) or 1)
+
+    # Açılış testi gün boyu aynı kalır ki ETag'i işe yarasın; sonraki turlar
+    # /daily_test'ten her seferinde yeni sorularla gelir.
+    daily_rng = random.Random(f"{current_user.id}:{datetime.utcnow().date().isoformat()}:{user_level}")
+    weak = quizzes.weakest_topic(db, current_user.id)
+    sections = {
+        "profile": {
+            **schemas.UserOut.model_validate(current_user).model_dump(),
+            "streak": activity.current_streak(current_user),
+        },
+        "roadmap": _build_roadmap(current_unit, user_level),
+        "daily_test": _daily_test_payload(
+            user_level, daily_rng, focus_topic_key=weak.topic_key if weak is not None else None
+        ),
+    }
+
+    known = _parse_if_none_match(if_none_match)
+    etags = {name: _section_etag(name, sections[name]) for name in BOOTSTRAP_SECTIONS}
+    combined = _section_etag("bootstrap", [etags[name] for name in BOOTSTRAP_SECTIONS])
+    unchanged = [name for name in BOOTSTRAP_SECTIONS if etags[name] in known]
+    if combined in known or len(unchanged) == len(BOOTSTRAP_SECTIONS):
+        return Response(status_code=304, headers={"ETag": combined})
+
+    body = {name: sections[name] for name in BOOTSTRAP_SECTIONS if name not in unchanged}
+    body["etags"] = etags
+    body["unchanged"] = unchanged
+    response.headers["ETag"] = combined
+    return body
+
+
+async def _prefetch_unit(user_id: int, unit_id: int) -> None:
+    unit = UNITS_BY_ID.get(unit_id)
+    if unit is None:
+        return
+    if unit["type"] == "quiz":
+        topic = unit["quiz_topic"]
+        key = _quiz_prefetch_key(user_id, topic)
+        prefetcher.schedule(
+            "quiz",
+            key,
+            lambda: quiz_prefetch_cache.get_or_compute(key, lambda: _generate_quiz_questions(topic)),
+        )
+    else:
+        # Açılış cümleleri senaryo başına ortak havuzda; havuz doluysa LLM çağrılmaz.
+        scenario = unit.get("scenario_id")
+        opening_pool.refill(scenario if scenario in SCENARIOS else "default")
+
+
 @app.post("/complete_unit")
 def complete_unit(
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(current_user_dep),
     db: Session = Depends(database.get_db),
 ):
@@ -942,23 +1397,34 @@ def complete_unit(
         else:
             current_user.current_unit = current_unit
 
+    streak = activity.record(db, current_user, xp=50)
     db.add(current_user)
     db.commit()
 
+    new_unit = int(current_user.current_unit or current_unit)
+    if new_unit != current_unit:
+        # Kullanıcının açacağı ünite belli; içeriği cevap gönderildikten sonra hazırlanır.
+        background_tasks.add_task(_prefetch_unit, current_user.id, new_unit)
+
     return {
         "message": "Unit completed!",
-        "new_unit": int(current_user.current_unit or current_unit),
+        "new_unit": new_unit,
         "new_level": int(current_user.level or user_level),
         "level_up": new_level > user_level,
+        "streak": streak,
     }
 
 class UserMessage(BaseModel):
     message: str
     scenario: str = "default"  # Varsayılan olarak normal hoca
+    # /start_chat'in döndürdüğü oturum; yoksa sohbet geçmişsizdir.
+    session_id: str | None = None
 
 
 class StartChatRequest(BaseModel):
     scenario: str
+    # Girişli kullanıcı isterse sunucu geçmişi tutar ve session_id döner.
+    keep_history: bool = False
 
 
 class WordRequest(BaseModel):
@@ -967,6 +1433,8 @@ class WordRequest(BaseModel):
 
 class TranslateRequest(BaseModel):
     text: str
+    # True ise parçalar bittikçe NDJSON satırı olarak akıtılır.
+    stream: bool = False
 
 
 class TranslateResponse(BaseModel):
@@ -1023,17 +1491,81 @@ KRİTİK YAZIM KURALI (story alanı için):
 }
 """
 
+CHAT_SUMMARY_SYSTEM_PROMPT = """
+You summarize an ongoing English-practice roleplay between a student (user) and an AI partner (assistant).
+Merge the previous summary and the new turns into ONE short summary (max 80 words).
+Keep names, facts, decisions, and the current state of the roleplay. Plain text only.
+"""
+
+
+async def _summarize_chat(summary: str, turns: list[dict]) -> str:
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    completion = await llm.chat_completion(
+        "chat_summary",
+        messages=[
+            {"role": "system", "content": CHAT_SUMMARY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Previous summary: {summary or '-'}\n\nNew turns:\n{transcript}",
+            },
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.2,
+        max_tokens=200,
+    )
+    return (completion.choices[0].message.content or "").strip()
+
+
+chat_sessions = sessions.SessionStore()
+
+
 @app.get("/")
 def read_root():
     return {"status": "Backend Hazır", "features": ["Chat", "Voice"]}
 
-# 1. METİN SOHBETİ (Eski Endpoint)
-@app.post("/chat")
-async def chat_endpoint(user_input: UserMessage):
-    try:
-        system_instruction = SCENARIOS.get(user_input.scenario, SCENARIOS["default"])
 
-        full_system_prompt = system_instruction + """
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+def profile_admin_dep(x_profile_token: str | None = Header(default=None)) -> None:
+    if not profiling.is_admin(x_profile_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/admin/profiles", dependencies=[Depends(profile_admin_dep)])
+def list_profiles():
+    return {"profiles": profiling.PROFILES.list()}
+
+
+@app.get(
+    "/admin/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(profile_admin_dep)],
+)
+def download_profile(profile_id: str):
+    profile = profiling.PROFILES.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    # Folded stacks: flamegraph.pl / speedscope doğrudan açabilir.
+    return PlainTextResponse(
+        profile["folded"],
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'},
+    )
+
+
+@app.get("/metrics/summary")
+def read_metrics_summary():
+    return {
+        "llm": metrics.LLM_SUMMARY.snapshot(),
+        "http": metrics.http_latency_summary(),
+        "voice": metrics.voice_duplicate_summary(),
+    }
+
+CHAT_JSON_INSTRUCTIONS = """
 
         KESİNLİKLE ŞU JSON FORMATINDA CEVAP VER:
         {
@@ -1043,12 +1575,40 @@ async def chat_endpoint(user_input: UserMessage):
             "explanation_tr": "Hatayı Türkçe açıkla"
         }
         """
+# Senaryo promptları bir kez birleştirilir.
+CHAT_SYSTEM_PROMPTS = {scenario: prompt + CHAT_JSON_INSTRUCTIONS for scenario, prompt in SCENARIOS.items()}
 
-        completion = await client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": full_system_prompt},
-                {"role": "user", "content": user_input.message},
-            ],
+
+def _chat_system_prompt(scenario: str) -> str:
+    return CHAT_SYSTEM_PROMPTS.get(scenario, CHAT_SYSTEM_PROMPTS["default"])
+
+
+# 1. METİN SOHBETİ (Eski Endpoint)
+@app.post(
+    "/chat",
+    response_model=schemas.ChatResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(rate_limit_dep("chat"))],
+)
+async def chat_endpoint(
+    user_input: UserMessage,
+    current_user: models.User | None = Depends(optional_user_dep),
+):
+    session = None
+    if user_input.session_id:
+        owner = current_user.id if current_user is not None else None
+        session = chat_sessions.get(user_input.session_id, owner, user_input.scenario)
+        if session is None:
+            # Süresi dolmuş ya da başkasına ait; istemci sohbeti yeniden başlatır.
+            raise HTTPException(status_code=404, detail="Sohbet oturumu bulunamadı")
+    try:
+        full_system_prompt = _chat_system_prompt(user_input.scenario)
+
+        completion = await llm.chat_completion(
+            "chat",
+            messages=chat_sessions.build_messages(
+                session, full_system_prompt, user_input.message
+            ),
             model="llama-3.3-70b-versatile",
             temperature=0.7,
             max_tokens=1024,
@@ -1056,184 +1616,391 @@ async def chat_endpoint(user_input: UserMessage):
         )
 
         response_content = completion.choices[0].message.content or "{}"
+        reply = llm.parse_chat_reply(response_content, "chat")
+
+        if session is None:
+            return schemas.ChatResponse(response=reply)
+        chat_sessions.append(session, "user", user_input.message)
+        chat_sessions.append(session, "assistant", reply.reply)
+        chat_sessions.maybe_compact(session, _summarize_chat)
+
+        return schemas.ChatResponse(response=reply, session_id=session.id)
+    except Exception as e:
+        print(f"Chat Hatası: {e}")
+        return schemas.ChatResponse(
+            response=schemas.ChatReply(reply="Bağlantı hatası oluştu.")
+        )
+
+
+# --- WEBSOCKET SOHBET ---
+# Bağlantı başında bir kez doğrulanır; senaryo, prompt ve oturum bağlantı
+# boyunca tutulur. Cevap parça parça akar; istemci {"type": "cancel"} gönderirse
+# ya da yeni mesaj yazarsa akış kesilir ve Groq isteği de iptal edilir.
+#
+# İstemci -> {"type": "message", "text": ...} | {"type": "cancel"}
+#            | {"type": "scenario", "scenario": ...} | {"type": "ping"}
+# Sunucu  -> ready | delta {"text"} | done {"response", "session_id"}
+#            | cancelled | error {"detail", "code"} | pong
+WS_CHAT_MAX_MESSAGE_CHARS = int(os.getenv("WS_CHAT_MAX_MESSAGE_CHARS", "2000"))
+
+
+async def _ws_user(websocket: WebSocket) -> models.User | None:
+    # Tarayıcılar WebSocket'e header ekleyemediği için ?token= de kabul edilir.
+    token = websocket.query_params.get("token")
+    if not token:
+        parts = (websocket.headers.get("authorization") or "").split(" ")
+        if len(parts) == 2 and parts[0].lower() == "bearer":
+            token = parts[1]
+    if not token:
+        return None
+
+    def load() -> models.User:
+        with database.SessionLocal() as db:
+            return get_current_user(token, db)
+
+    try:
+        return await asyncio.to_thread(load)
+    except HTTPException:
+        return None
+
+
+async def _ws_stream_reply(websocket: WebSocket, session, system_prompt: str, text: str) -> None:
+    extractor = llm.ReplyExtractor()
+    try:
+        # JSON modu akışla birlikte kullanılamıyor; biçim prompt ile istenir.
+        async for delta in llm.chat_completion_stream(
+            "chat_stream",
+            messages=chat_sessions.build_messages(session, system_prompt, text),
+            model="llama-3.3-70b-versatile",
+            temperature=0.7,
+            max_tokens=1024,
+        ):
+            visible = extractor.feed(delta)
+            if visible:
+                await websocket.send_json({"type": "delta", "text": visible})
+    except asyncio.CancelledError:
+        # Yarım cevap da geçmişe girer ki model kaldığı yeri bilsin.
+        chat_sessions.append(session, "user", text)
+        if extractor.text:
+            chat_sessions.append(session, "assistant", extractor.text)
+        metrics.WS_CHAT_REPLIES.inc("cancelled")
         try:
-            response_json = json.loads(response_content)
+            await websocket.send_json({"type": "cancelled"})
         except Exception:
-            response_json = {
-                "reply": response_content,
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-
-        if not isinstance(response_json, dict):
-            response_json = {
-                "reply": str(response_json),
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-
-        response_json.setdefault("reply", "")
-        response_json.setdefault("has_mistake", False)
-        response_json.setdefault("correction", "")
-        response_json.setdefault("explanation_tr", "")
-
-        return {"response": response_json}
+            pass
+        raise
     except Exception as e:
-        print(f"Chat Hatası: {e}")
-        return {
-            "response": {
-                "reply": "Bağlantı hatası oluştu.",
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-        }
+        print(f"WS Chat Hatası: {e}")
+        metrics.WS_CHAT_REPLIES.inc("error")
+        await websocket.send_json({"type": "error", "detail": "Bağlantı hatası oluştu."})
+        return
+
+    reply = llm.parse_chat_reply(extractor.buffer, "chat_stream")
+    chat_sessions.append(session, "user", text)
+    chat_sessions.append(session, "assistant", reply.reply)
+    chat_sessions.maybe_compact(session, _summarize_chat)
+    metrics.WS_CHAT_REPLIES.inc("done")
+    await websocket.send_json({"type": "done", "response": reply.model_dump(), "session_id": session.id})
+
+
+async def _ws_interrupt(task: asyncio.Task | None) -> None:
+    if task is not None and not task.done():
+        task.cancel()
+        # İptal işlenip "cancelled" gönderilmeden yeni cevap başlamasın.
+        await asyncio.wait({task})
 
 
-@app.post("/start_chat")
-async def start_chat_endpoint(request: StartChatRequest):
+@app.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket):
+    user = await _ws_user(websocket)
+    if user is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    metrics.WS_CHAT_CONNECTIONS.inc()
+
+    scenario = websocket.query_params.get("scenario", "default")
+    scenario = scenario if scenario in SCENARIOS else "default"
+    # Yeniden bağlanan istemci kendi oturumuna döner; bilinmeyen ya da başkasına
+    # ait id yok sayılır ve yeni oturum açılır.
+    requested_id = websocket.query_params.get("session_id")
+    session = chat_sessions.get(requested_id, user.id, scenario) if requested_id else None
+    if session is None:
+        session = chat_sessions.start(user.id, scenario)
+    system_prompt = _chat_system_prompt(scenario)
+    reply_task: asyncio.Task | None = None
     try:
-        scenario_prompt = SCENARIOS.get(request.scenario, SCENARIOS["default"])
+        await websocket.send_json({"type": "ready", "session_id": session.id, "scenario": scenario})
+        while True:
+            data = await websocket.receive_json()
+            kind = data.get("type") if isinstance(data, dict) else None
+
+            if kind == "message":
+                text = str(data.get("text") or "").strip()[:WS_CHAT_MAX_MESSAGE_CHARS]
+                if not text:
+                    continue
+                if ratelimit.RATE_LIMIT_ENABLED:
+                    wait = user_rate_limiter.acquire(user.username)
+                    if wait > 0:
+                        metrics.RATE_LIMITED.inc("ws_chat", "user")
+                        await websocket.send_json(
+                            {
+                                "type": "error",
+                                "code": 429,
+                                "detail": "Çok fazla mesaj gönderildi, lütfen biraz bekleyin",
+                                "retry_after": int(ratelimit.retry_after_header(wait)),
+                            }
+                        )
+                        continue
+                await _ws_interrupt(reply_task)
+                reply_task = asyncio.create_task(_ws_stream_reply(websocket, session, system_prompt, text))
+            elif kind == "cancel":
+                await _ws_interrupt(reply_task)
+            elif kind == "scenario":
+                await _ws_interrupt(reply_task)
+                requested = str(data.get("scenario") or "default")
+                scenario = requested if requested in SCENARIOS else "default"
+                session = chat_sessions.start(user.id, scenario)
+                system_prompt = _chat_system_prompt(scenario)
+                await websocket.send_json({"type": "ready", "session_id": session.id, "scenario": scenario})
+            elif kind == "ping":
+                await websocket.send_json({"type": "pong"})
+            else:
+                await websocket.send_json({"type": "error", "code": 400, "detail": "Bilinmeyen mesaj tipi"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if reply_task is not None:
+            reply_task.cancel()
+        metrics.WS_CHAT_CONNECTIONS.dec()
+
+
+async def _live_opening(scenario: str) -> schemas.ChatReply:
+    system_instruction = SCENARIOS[scenario] + """
+
+    GÖREVİN: Bu senaryoya uygun İLK AÇILIŞ CÜMLESİNİ kur.
+
+    KESİNLİKLE ŞU JSON FORMATINDA CEVAP VER:
+    {
+        "reply": "Senin açılış cümlen",
+        "has_mistake": false,
+        "correction": "",
+        "explanation_tr": ""
+    }
+    """
+
+    completion = await llm.chat_completion(
+        "start_chat",
+        messages=[
+            {"role": "system", "content": system_instruction},
+            {"role": "user", "content": "Start the conversation now."},
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.8,
+        max_tokens=500,
+        response_format={"type": "json_object"},
+    )
 
-        system_instruction = scenario_prompt + """
+    response_content = completion.choices[0].message.content or "{}"
+    return llm.parse_chat_reply(response_content, "start_chat")
 
-        GÖREVİN: Bu senaryoya uygun İLK AÇILIŞ CÜMLESİNİ kur.
 
-        KESİNLİKLE ŞU JSON FORMATINDA CEVAP VER:
-        {
-            "reply": "Senin açılış cümlen",
-            "has_mistake": false,
-            "correction": "",
-            "explanation_tr": ""
-        }
-        """
+@app.post(
+    "/start_chat",
+    response_model=schemas.ChatResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(rate_limit_dep("start_chat"))],
+)
+async def start_chat_endpoint(
+    request: StartChatRequest,
+    current_user: models.User | None = Depends(optional_user_dep),
+):
+    try:
+        scenario = request.scenario if request.scenario in SCENARIOS else "default"
 
-        completion = await client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_instruction},
-                {"role": "user", "content": "Start the conversation now."},
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.8,
-            max_tokens=500,
-            response_format={"type": "json_object"},
-        )
+        # Hazır havuzdan anında; havuz henüz boşsa (soğuk açılış) canlı üret.
+        opening = opening_pool.take(scenario)
+        if opening is not None:
+            metrics.CHAT_OPENINGS.inc(scenario, "pool")
+            reply = schemas.ChatReply(reply=opening)
+        else:
+            metrics.CHAT_OPENINGS.inc(scenario, "live")
+            reply = await _live_opening(scenario)
+            opening_pool.add(scenario, [reply.reply])
 
-        response_content = completion.choices[0].message.content or "{}"
-        try:
-            response_json = json.loads(response_content)
-        except Exception:
-            response_json = {
-                "reply": response_content,
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-
-        if not isinstance(response_json, dict):
-            response_json = {
-                "reply": str(response_json),
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-
-        response_json.setdefault("reply", "")
-        response_json.setdefault("has_mistake", False)
-        response_json.setdefault("correction", "")
-        response_json.setdefault("explanation_tr", "")
-
-        return {"response": response_json}
+        if not request.keep_history or current_user is None:
+            return schemas.ChatResponse(response=reply)
+        # Açılış cümlesi yeni oturumun ilk turu olur.
+        session = chat_sessions.start(current_user.id, scenario)
+        chat_sessions.append(session, "assistant", reply.reply)
+
+        return schemas.ChatResponse(response=reply, session_id=session.id)
 
     except Exception as e:
         print(f"Start Chat Hatası: {e}")
-        return {
-            "response": {
-                "reply": "Hello! Ready to start?",
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-        }
+        return schemas.ChatResponse(
+            response=schemas.ChatReply(reply="Hello! Ready to start?")
+        )
 
 
-@app.post("/define")
-async def define_word(request: WordRequest):
-    try:
-        system_prompt = """
-        Sen bir İngilizce-Türkçe sözlüksün.
-        Görevin: Verilen İngilizce kelimenin Türkçe anlamını ve basit bir İngilizce örnek cümlesini JSON olarak vermek.
+DEFINE_ERROR_MEANING = "Hata oluştu"
 
-        FORMAT:
-        {
-            "word": "kelime",
-            "meaning": "Türkçe karşılığı (kısa)",
-            "example": "İngilizce örnek cümle."
-        }
-        """
+define_cache = cache.Cache("define", DEFINE_CACHE_TTL_SECONDS)
 
-        completion = await client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Define: {request.word}"},
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=200,
-            response_format={"type": "json_object"},
-        )
 
-        response_content = completion.choices[0].message.content or "{}"
-        try:
-            data = json.loads(response_content)
-        except Exception:
-            data = {"word": request.word, "meaning": "Hata oluştu", "example": "-"}
+async def _define_word(word: str) -> dict:
+    system_prompt = """
+    Sen bir İngilizce-Türkçe sözlüksün.
+    Görevin: Verilen İngilizce kelimenin Türkçe anlamını ve basit bir İngilizce örnek cümlesini JSON olarak vermek.
+
+    FORMAT:
+    {
+        "word": "kelime",
+        "meaning": "Türkçe karşılığı (kısa)",
+        "example": "İngilizce örnek cümle."
+    }
+    """
+
+    completion = await llm.chat_completion(
+        "define",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Define: {word}"},
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.3,
+        max_tokens=200,
+        response_format={"type": "json_object"},
+    )
+
+    response_content = completion.choices[0].message.content or "{}"
+    try:
+        data = llm.parse_json(response_content, "define")
+    except Exception:
+        data = {"word": word, "meaning": DEFINE_ERROR_MEANING, "example": "-"}
+
+    if not isinstance(data, dict):
+        data = {"word": word, "meaning": DEFINE_ERROR_MEANING, "example": "-"}
 
-        if not isinstance(data, dict):
-            data = {"word": request.word, "meaning": "Hata oluştu", "example": "-"}
+    data.setdefault("word", word)
+    data.setdefault("meaning", "")
+    data.setdefault("example", "")
+    return data
 
-        data.setdefault("word", request.word)
-        data.setdefault("meaning", "")
-        data.setdefault("example", "")
+
+@app.post("/define", dependencies=[Depends(rate_limit_dep("define"))])
+async def define_word(request: WordRequest):
+    try:
+        # Sık kelimeler (ve çekimli halleri) yerel sözlükten, LLM'siz.
+        entry = lexicon.lookup(request.word)
+        if entry is not None:
+            metrics.DEFINE_REQUESTS.inc("lemma" if "lemma" in entry else "lexicon")
+            return entry
+
+        data, source = await define_cache.get_or_compute(
+            request.word.strip().lower(),
+            lambda: _define_word(request.word),
+            cacheable=lambda value: value.get("meaning") not in ("", DEFINE_ERROR_MEANING),
+        )
+        metrics.DEFINE_REQUESTS.inc("llm" if source == "miss" else "cache")
         return data
 
     except Exception as e:
         print(f"Sözlük Hatası: {e}")
-        return {"word": request.word, "meaning": "Hata oluştu", "example": "-"}
+        return {"word": request.word, "meaning": DEFINE_ERROR_MEANING, "example": "-"}
 
 
-@app.post("/translate", response_model=TranslateResponse)
-async def translate_text(request: TranslateRequest):
-    try:
-        system_prompt = """
+TRANSLATE_SYSTEM_PROMPT = """
 You are a professional translator.
 Translate the given English text into natural Turkish.
+The text may be one part of a longer story; translate only this part.
 Return ONLY valid JSON with this format:
 {
   \"translation\": \"...\"
 }
 """
 
-        completion = await client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": request.text},
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.2,
-            max_tokens=2048,
-            response_format={"type": "json_object"},
-        )
 
-        response_content = completion.choices[0].message.content or "{}"
-        data = json.loads(response_content)
-        if not isinstance(data, dict):
-            raise HTTPException(status_code=500, detail="Invalid translation")
+translate_cache = cache.Cache("translate", TRANSLATE_CACHE_TTL_SECONDS)
+
+
+async def _translate_chunk(text: str) -> str:
+    # Aynı hikayenin parçaları farklı kullanıcılarca tekrar tekrar çevrilir.
+    translation, _ = await translate_cache.get_or_compute(
+        hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        lambda: _llm_translate_chunk(text),
+        cacheable=bool,
+    )
+    return translation
+
+
+async def _llm_translate_chunk(text: str) -> str:
+    completion = await llm.chat_completion(
+        "translate",
+        messages=[
+            {"role": "system", "content": TRANSLATE_SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.2,
+        max_tokens=2048,
+        response_format={"type": "json_object"},
+    )
+
+    response_content = completion.choices[0].message.content or "{}"
+    data = llm.parse_json(response_content, "translate")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=500, detail="Invalid translation")
+    return (data.get("translation") or "").strip()
+
+
+async def _stream_translation(chunks: list[tuple[str, str]]):
+    async def _indexed(index: int, text: str) -> tuple[int, str]:
+        return index, await _translate_chunk(text)
+
+    tasks = [asyncio.create_task(_indexed(i, text)) for i, (text, _) in enumerate(chunks)]
+    outputs = [""] * len(chunks)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, translation = await next_done
+            outputs[index] = translation
+            yield jsonutil.dumps(
+                {"index": index, "translation": translation, "separator": chunks[index][1]}
+            ) + b"\n"
+        full = chunking.join(outputs, [sep for _, sep in chunks])
+        yield jsonutil.dumps({"done": True, "count": len(chunks), "translation": full}) + b"\n"
+    except Exception as e:
+        print(f"Translate Hatası: {e}")
+        yield jsonutil.dumps({"error": "Çeviri yapılamadı"}) + b"\n"
+    finally:
+        # İstemci koptuysa veya bir parça hata verdiyse kalanları beklemeyiz.
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/translate", response_model=TranslateResponse)
+async def translate_text(
+    request: TranslateRequest,
+    http_request: Request,
+    authorization: str | None = Header(default=None),
+):
+    # Paragraf/cümle sınırlarından bölünen parçalar global LLM limiti altında
+    # paralel çevrilir; toplam süre en yavaş parçaya yaklaşır.
+    too_long = HTTPException(
+        status_code=413, detail=f"Metin çok uzun (en fazla {TRANSLATE_MAX_CHARS} karakter)"
+    )
+    if len(request.text) > TRANSLATE_MAX_CHARS:
+        raise too_long
+    chunks = chunking.split_text(request.text, TRANSLATE_CHUNK_CHARS)
+    if len(chunks) > TRANSLATE_MAX_CHUNKS:
+        raise too_long
+    charge_rate_limit(http_request, authorization, "translate", cost=max(1, len(chunks)))
+    if request.stream:
+        return StreamingResponse(_stream_translation(chunks), media_type="application/x-ndjson")
 
-        translation = (data.get("translation") or "").strip()
-        return {"translation": translation}
+    try:
+        translations = await asyncio.gather(*(_translate_chunk(text) for text, _ in chunks))
+        return {"translation": chunking.join(translations, [sep for _, sep in chunks])}
     except HTTPException:
         raise
     except Exception as e:
@@ -1241,104 +2008,64 @@ Return ONLY valid JSON with this format:
         raise HTTPException(status_code=500, detail="Çeviri yapılamadı")
 
 # 2. SESLİ SOHBET ENDPOINT'İ
-@app.post("/voice")
+voice_cache = cache.Cache("voice", VOICE_CACHE_TTL_SECONDS)
+
+
+async def _voice_reply(upload_name: str, audio: bytes, lang: str) -> dict:
+    # Groq Whisper Çağrısı
+    transcription = await llm.transcription(
+        "voice",
+        file=(upload_name, audio),
+        model="whisper-large-v3",
+        
+        # BURASI KRİTİK: Dili Flutter'dan gelen bilgiye göre zorluyoruz
+        language=lang, 
+        
+        response_format="json",
+        temperature=0.0
+    )
+    
+    user_text = transcription.text
+
+    # AI Cevabı
+    full_ai_data = await get_ai_response(user_text)
+    ai_response = full_ai_data["response"]
+
+    return {
+        "user_text": user_text,  # Senin dediğini de geri dönelim ki ekranda gösterelim
+        "response": ai_response
+    }
+
+
+@app.post("/voice", dependencies=[Depends(rate_limit_dep("voice", cost=2))])
 async def voice_endpoint(
     file: UploadFile = File(...),
     lang: str = Form(...) # YENİ: Flutter'dan dil kodunu (tr veya en) alıyoruz
 ):
     try:
-        temp_filename = f"temp_{file.filename}"
-        if not temp_filename.endswith(".m4a"):
-            temp_filename += ".m4a"
-
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Groq Whisper Çağrısı
-        with open(temp_filename, "rb") as audio_file:
-            transcription = await client.audio.transcriptions.create(
-                file=(temp_filename, audio_file.read()),
-                model="whisper-large-v3",
-                
-                # BURASI KRİTİK: Dili Flutter'dan gelen bilgiye göre zorluyoruz
-                language=lang, 
-                
-                response_format="json",
-                temperature=0.0
-            )
-        
-        user_text = transcription.text
-        
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-
-        # AI Cevabı
-        full_ai_data = await get_ai_response(user_text)
-        ai_response = full_ai_data["response"]
-
-        return {
-            "user_text": user_text,  # Senin dediğini de geri dönelim ki ekranda gösterelim
-            "response": ai_response
-        }
+        upload_name = f"temp_{file.filename}"
+        if not upload_name.endswith(".m4a"):
+            upload_name += ".m4a"
+
+        audio = await file.read()
+        key = f"{hashlib.sha256(audio).hexdigest()}:{lang}"
+
+        # Aynı kayıt tekrar gelirse (istemci tekrar denemesi) transkripsiyon ve
+        # cevap yeniden üretilmez; hâlâ işleniyorsa onun sonucu beklenir.
+        result, source = await voice_cache.get_or_compute(
+            key,
+            lambda: _voice_reply(upload_name, audio, lang),
+            cacheable=lambda value: value["response"]["reply"] != AI_ERROR_REPLY,
+        )
+        metrics.VOICE_UPLOADS.inc(source)
+        return result
 
     except Exception as e:
         print(f"Ses hatası: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/story")
-async def generate_story(request: StoryRequest):
-    try:
-        user_prompt = f"Topic: {request.topic}, Level: {request.level}. Create a story."
-
-        completion = await client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": STORY_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            max_tokens=2048,
-            response_format={"type": "json_object"}
-        )
-
-        response_content = completion.choices[0].message.content or "{}"
-        try:
-            data = json.loads(response_content)
-        except Exception:
-            raise HTTPException(status_code=500, detail="Invalid JSON returned from model")
-
-        if not isinstance(data, dict):
-            raise HTTPException(status_code=500, detail="Invalid JSON returned from model")
-
-        story_text = (data.get("story") or "").strip()
-
-        def _needs_spacing_fix(text: str) -> bool:
-            if not text:
-                return False
-            letters = sum(1 for c in text if c.isalpha())
-            spaces = text.count(" ")
-            longest_run = 0
-            run = 0
-            for c in text:
-                if c.isalpha():
-                    run += 1
-                    if run > longest_run:
-                        longest_run = run
-                else:
-                    run = 0
-
-            # Heuristics: very few spaces compared to letters, or extremely long alpha runs.
-            if letters >= 80 and spaces <= 3:
-                return True
-            if letters > 0 and spaces / max(letters, 1) < 0.03:
-                return True
-            if longest_run >= 35:
-                return True
-            return False
-
-        if _needs_spacing_fix(story_text):
-            fix_system_prompt = """
+STORY_FIX_SYSTEM_PROMPT = """
 You are a text cleaner.
 The given English story has missing spaces or poor formatting.
 Rewrite the SAME story in natural English with proper spacing and punctuation.
@@ -1352,29 +2079,95 @@ Return ONLY valid JSON:
 { "story": "..." }
 """
 
-            fix_completion = await client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": fix_system_prompt},
-                    {"role": "user", "content": story_text},
-                ],
-                model="llama-3.3-70b-versatile",
-                temperature=0.0,
-                max_tokens=2048,
-                response_format={"type": "json_object"},
-            )
 
-            fix_content = fix_completion.choices[0].message.content or "{}"
-            try:
-                fix_data = json.loads(fix_content)
-            except Exception:
-                fix_data = {}
+async def _llm_fix_story_spacing(story_text: str) -> str:
+    fix_completion = await llm.chat_completion(
+        "story_fix",
+        messages=[
+            {"role": "system", "content": STORY_FIX_SYSTEM_PROMPT},
+            {"role": "user", "content": story_text},
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.0,
+        max_tokens=2048,
+        response_format={"type": "json_object"},
+    )
+
+    fix_content = fix_completion.choices[0].message.content or "{}"
+    try:
+        fix_data = llm.parse_json(fix_content, "story_fix")
+    except Exception:
+        fix_data = {}
+
+    if not isinstance(fix_data, dict):
+        return ""
+    return (fix_data.get("story") or "").strip()
+
+
+async def _generate_story(topic: str, level: str) -> dict:
+    user_prompt = f"Topic: {topic}, Level: {level}. Create a story."
+
+    completion = await llm.chat_completion(
+        "story",
+        messages=[
+            {"role": "system", "content": STORY_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.7,
+        max_tokens=2048,
+        response_format={"type": "json_object"}
+    )
 
-            if isinstance(fix_data, dict):
-                fixed_story = (fix_data.get("story") or "").strip()
-                if fixed_story:
-                    data["story"] = fixed_story
+    response_content = completion.choices[0].message.content or "{}"
+    try:
+        data = llm.parse_json(response_content, "story")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Invalid JSON returned from model")
+
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=500, detail="Invalid JSON returned from model")
+
+    story_text = (data.get("story") or "").strip()
+    if not story_text:
+        raise HTTPException(status_code=500, detail="Empty story returned from model")
+
+    if segmenter.needs_spacing_fix(story_text):
+        # CPU işi; event loop'u bekletmesin.
+        fixed_story, confidence = await asyncio.to_thread(segmenter.fix_spacing, story_text)
+        if confidence >= segmenter.MIN_CONFIDENCE and not segmenter.needs_spacing_fix(fixed_story):
+            data["story"] = fixed_story
+        else:
+            # Yerel onarım emin değilse LLM ile düzeltmeye düş.
+            fixed_story = await _llm_fix_story_spacing(story_text)
+            if fixed_story:
+                data["story"] = fixed_story
+
+    return data
 
-        return data
+
+async def _story_for(topic: str, level: str, user_id: int | None) -> dict:
+    level = level.strip().upper()[:20]
+
+    # Önce kütüphane: kullanıcının okumadığı bir hikaye varsa tek DB okuması.
+    topic_key, story, grow = await asyncio.to_thread(stories.serve, topic, level, user_id)
+    if grow:
+        stories.schedule_growth(topic, topic_key, level, _generate_story)
+    if story is not None:
+        return story
+
+    data = await _generate_story(topic, level)
+    return await asyncio.to_thread(stories.add, topic, topic_key, level, data, user_id)
+
+
+@app.post("/story", dependencies=[Depends(rate_limit_dep("story", cost=2))])
+async def generate_story(
+    request: StoryRequest,
+    current_user: models.User | None = Depends(optional_user_dep),
+):
+    try:
+        user_id = current_user.id if current_user is not None else None
+        return await _story_for(request.topic, request.level, user_id)
 
     except HTTPException:
         raise
@@ -1382,10 +2175,59 @@ Return ONLY valid JSON:
         print(f"Hikaye Hatası: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+# --- ARKA PLAN İŞLERİ ---
+# Uzun üretimler için: istek hemen job_id ile döner, sonuç GET /jobs/{job_id}
+# ile (isteğe bağlı ?wait=N long-poll) alınır.
+job_queue = jobs.JobQueue()
+
+
+async def _submit_job(kind: str, run, user_id: int) -> Response:
+    try:
+        job_id = await job_queue.submit(kind, run, user_id)
+    except jobs.QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Sunucu yoğun, lütfen biraz sonra tekrar deneyin",
+            headers={"Retry-After": "5"},
+        )
+    return jsonutil.FastJSONResponse(
+        {"job_id": job_id, "status": "queued"},
+        status_code=202,
+        headers={"Location": f"/jobs/{job_id}"},
+    )
+
+
+@app.post("/jobs/story", status_code=202, dependencies=[Depends(rate_limit_dep("jobs_story", cost=2))])
+async def submit_story_job(
+    request: StoryRequest,
+    current_user: models.User = Depends(current_user_dep),
+):
+    # Sonuç işi gönderen kullanıcıya bağlıdır; bu yüzden giriş zorunlu.
+    user_id = current_user.id
+    return await _submit_job("story", lambda: _story_for(request.topic, request.level, user_id), user_id)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = 0,
+    current_user: models.User = Depends(current_user_dep),
+):
+    job = await job_queue.get(job_id, current_user.id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı veya süresi doldu")
+    return job
+
+
+AI_ERROR_REPLY = "Üzgünüm, şu an bağlantımda bir sorun var."
+
+
 # Yardımcı Fonksiyon (Kod tekrarını önlemek için)
 async def get_ai_response(text: str):
     try:
-        completion = await client.chat.completions.create(
+        completion = await llm.chat_completion(
+            "voice_reply",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": text}
@@ -1396,37 +2238,10 @@ async def get_ai_response(text: str):
             response_format={"type": "json_object"},
         )
         response_content = completion.choices[0].message.content or "{}"
+        reply = llm.parse_chat_reply(response_content, "voice_reply")
 
-        try:
-            response_json = json.loads(response_content)
-        except Exception:
-            response_json = {
-                "reply": response_content,
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-
-        if not isinstance(response_json, dict):
-            response_json = {
-                "reply": str(response_json),
-                "has_mistake": False,
-                "correction": "",
-                "explanation_tr": "",
-            }
-
-        response_json.setdefault("reply", "")
-        response_json.setdefault("has_mistake", False)
-        response_json.setdefault("correction", "")
-        response_json.setdefault("explanation_tr", "")
-
-        return {"response": response_json}
+        return {"response": reply.model_dump()}
     except Exception as e:
         print(f"AI Hatası: {e}")
-        error_json = {
-            "reply": "Üzgünüm, şu an bağlantımda bir sorun var.",
-            "has_mistake": False,
-            "correction": "",
-            "explanation_tr": "",
-        }
-        return {"response": error_json}
+        error_reply = schemas.ChatReply(reply=AI_ERROR_REPLY)
+        return {"response": error_reply.model_dump()}
@@ -0,0 +1,394 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+
+# Sync uç noktalar ve asyncio.to_thread işleri metrikleri thread pool'dan da
+# günceller; her metriğin kendi kilidi vardır (kısa, çekişmesiz tutulur).
+# Etiket kümeleri ilk kullanımda bir kez oluşturulur, sonrasında sadece artırılır.
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+SIZE_BUCKETS = (
+    100, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 10_000_000,
+)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self.values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # etiketler -> [kova sayaçları (+Inf dahil), toplam, adet]
+        self.values: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def preallocate(self, *labels: str) -> None:
+        with self._lock:
+            if labels not in self.values:
+                self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def observe(self, *labels: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _snapshot(self, labels: tuple[str, ...]) -> list | None:
+        with self._lock:
+            series = self.values.get(labels)
+            return None if series is None else [list(series[0]), series[1], series[2]]
+
+    def counts(self) -> dict[tuple[str, ...], int]:
+        with self._lock:
+            return {labels: series[2] for labels, series in self.values.items()}
+
+    def quantile(self, q: float, *labels: str) -> float | None:
+        series = self._snapshot(labels)
+        if not series or not series[2]:
+            return None
+        counts, _, total = series
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i >= len(self.buckets):
+                    # +Inf kovası: en büyük sınırı döndür.
+                    return self.buckets[-1]
+                upper = self.buckets[i]
+                # Kova içinde doğrusal enterpolasyon (Prometheus histogram_quantile gibi).
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(labels, list(counts), total_sum, count) for labels, (counts, total_sum, count) in self.values.items()]
+        lines = []
+        for labels, counts, total_sum, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# --- LLM (Groq) ÇAĞRILARI ---
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Upstream LLM calls by outcome.", ("endpoint", "model", "status")
+)
+LLM_PROMPT_TOKENS = REGISTRY.counter(
+    "llm_prompt_tokens_total", "Prompt tokens reported by the upstream.", ("endpoint", "model")
+)
+LLM_COMPLETION_TOKENS = REGISTRY.counter(
+    "llm_completion_tokens_total", "Completion tokens reported by the upstream.", ("endpoint", "model")
+)
+LLM_TOTAL_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Total tokens reported by the upstream.", ("endpoint", "model")
+)
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Upstream LLM call latency.", ("endpoint", "model")
+)
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total", "Retried upstream LLM calls.", ("endpoint", "model")
+)
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total", "Failed upstream LLM calls by error type.", ("endpoint", "model", "error")
+)
+LLM_JSON_FAILURES = REGISTRY.counter(
+    "llm_json_parse_failures_total", "LLM replies that were not valid JSON.", ("endpoint", "model")
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_requests_in_flight", "LLM calls currently holding a concurrency slot."
+)
+
+
+# --- HTTP İSTEKLERİ ---
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+HTTP_REQUEST_SIZE = REGISTRY.histogram(
+    "http_request_size_bytes", "HTTP request body size.", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes", "HTTP response body size.", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method",)
+)
+
+
+APP_STARTUP_SECONDS = REGISTRY.gauge(
+    "app_startup_seconds", "Worker startup time from first import to ready."
+)
+
+
+# --- SESLİ SOHBET ---
+VOICE_UPLOADS = REGISTRY.counter(
+    "voice_uploads_total",
+    "Voice uploads by cache result (miss, hit = recent duplicate, inflight = duplicate of a running upload).",
+    ("result",),
+)
+
+
+# --- ARKA PLAN İŞLERİ ---
+JOBS = REGISTRY.counter(
+    "jobs_total", "Background jobs by kind and outcome (queued, done, failed, rejected).", ("kind", "status")
+)
+JOB_QUEUE_DEPTH = REGISTRY.gauge("job_queue_depth", "Jobs waiting for a worker in this process.")
+JOB_DURATION = REGISTRY.histogram(
+    "job_duration_seconds", "Background job run time (excluding queue wait).", ("kind",)
+)
+
+
+# --- SOHBET AÇILIŞ HAVUZU ---
+CHAT_OPENINGS = REGISTRY.counter(
+    "chat_openings_total", "start_chat openings by source (pool or live LLM call).", ("scenario", "source")
+)
+CHAT_OPENING_POOL_SIZE = REGISTRY.gauge(
+    "chat_opening_pool_size", "Validated openings currently pooled.", ("scenario",)
+)
+
+
+# --- UYARLANABİLİR SEVİYE TESTİ ---
+PLACEMENT_ITEMS = REGISTRY.histogram(
+    "placement_items_answered",
+    "Questions answered before an adaptive placement test finished.",
+    buckets=(4, 5, 6, 7, 8, 10, 12, 15),
+)
+PLACEMENT_RESULTS = REGISTRY.counter(
+    "placement_results_total", "Finished adaptive placement tests by assigned level.", ("level",)
+)
+
+
+# --- WEBSOCKET SOHBET ---
+WS_CHAT_CONNECTIONS = REGISTRY.gauge("ws_chat_connections", "Open WebSocket chat connections.")
+WS_CHAT_REPLIES = REGISTRY.counter(
+    "ws_chat_replies_total", "Streamed WebSocket chat replies by outcome (done, cancelled, error).", ("outcome",)
+)
+
+# --- ÖNCEDEN ÜRETİM (PREFETCH) ---
+PREFETCH_JOBS = REGISTRY.counter(
+    "prefetch_jobs_total", "Speculative next-unit prefetches by kind and outcome (ok, error, skipped).", ("kind", "outcome")
+)
+PREFETCH_SERVED = REGISTRY.counter(
+    "prefetch_served_total",
+    "Next-unit content requests by kind and source (hit, inflight, miss).",
+    ("kind", "source"),
+)
+
+# --- SÖZLÜK ---
+DEFINE_REQUESTS = REGISTRY.counter(
+    "define_requests_total",
+    "/define lookups by source (lexicon, lemma, cache, llm); lexicon + lemma is the share kept off the LLM.",
+    ("source",),
+)
+LEXICON_ENTRIES = REGISTRY.gauge("lexicon_entries", "Headwords in the local EN-TR lexicon.")
+
+# --- İSTEK SINIRLAMA ---
+RATE_LIMITED = REGISTRY.counter(
+    "rate_limited_total", "Requests rejected with 429 by endpoint and bucket scope (user, ip).", ("endpoint", "scope")
+)
+RATE_LIMIT_KEYS = REGISTRY.gauge(
+    "rate_limit_tracked_keys", "Token buckets currently held in memory.", ("scope",)
+)
+
+
+def http_latency_summary() -> list[dict]:
+    routes = []
+    for (method, route), count in sorted(HTTP_LATENCY.counts().items()):
+        if not count:
+            continue
+        routes.append(
+            {
+                "method": method,
+                "route": route,
+                "count": count,
+                "p50": HTTP_LATENCY.quantile(0.50, method, route),
+                "p95": HTTP_LATENCY.quantile(0.95, method, route),
+                "p99": HTTP_LATENCY.quantile(0.99, method, route),
+            }
+        )
+    return routes
+
+
+def voice_duplicate_summary() -> dict:
+    uploads = {result: VOICE_UPLOADS.get(result) for result in ("miss", "hit", "inflight")}
+    total = sum(uploads.values())
+    duplicates = uploads["hit"] + uploads["inflight"]
+    return {
+        "uploads": total,
+        "duplicates": duplicates,
+        "duplicate_rate": duplicates / total if total else 0.0,
+    }
+
+
+class RollingSummary:
+    """Son `window_seconds` içindeki LLM çağrılarının uç nokta bazında özeti."""
+
+    def __init__(self, window_seconds: int = 900, max_events: int = 50_000):
+        self.window_seconds = window_seconds
+        # (zaman, endpoint, model, prompt, completion, süre, başarılı mı)
+        self.events: deque = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, model: str, prompt: int, completion: int, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.events.append((time.time(), endpoint, model, prompt, completion, latency, ok))
+
+    def snapshot(self) -> dict:
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            while self.events and self.events[0][0] < cutoff:
+                self.events.popleft()
+            events = list(self.events)
+
+        grouped: dict[tuple[str, str], list] = {}
+        for _, endpoint, model, prompt, completion, latency, ok in events:
+            grouped.setdefault((endpoint, model), []).append((prompt, completion, latency, ok))
+
+        endpoints = []
+        for (endpoint, model), rows in sorted(grouped.items()):
+            latencies = sorted(row[2] for row in rows)
+            endpoints.append(
+                {
+                    "endpoint": endpoint,
+                    "model": model,
+                    "calls": len(rows),
+                    "errors": sum(1 for row in rows if not row[3]),
+                    "prompt_tokens": sum(row[0] for row in rows),
+                    "completion_tokens": sum(row[1] for row in rows),
+                    "total_tokens": sum(row[0] + row[1] for row in rows),
+                    "latency_p50": _percentile(latencies, 0.50),
+                    "latency_p95": _percentile(latencies, 0.95),
+                    "latency_max": round(latencies[-1], 4),
+                }
+            )
+        return {"window_seconds": self.window_seconds, "endpoints": endpoints}
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return round(sorted_values[index], 4)
+
+
+LLM_SUMMARY = RollingSummary()
+
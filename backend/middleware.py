@@ -0,0 +1,200 @@
+import asyncio
+import time
+import uuid
+
+import compression
+import metrics
+import profiling
+
+# Eşleşmeyen yollar (404, tarayıcı taramaları vb.) tek etikette toplanır ki
+# metrik kardinalitesi sınırlı kalsın.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class HTTPMetricsMiddleware:
+    """Saf ASGI middleware: rota bazında süre, durum kodu ve gövde boyutlarını kaydeder.
+
+    Ayrı bir istek kilidi yok; her güncelleme metriğin kendi kısa kilidini alır
+    (aynı metrikler thread pool'daki kodlardan da güncellenir).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_wrapper():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.HTTP_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            metrics.HTTP_IN_FLIGHT.dec(method)
+            route = route_label(scope)
+            metrics.HTTP_LATENCY.observe(method, route, value=time.perf_counter() - start)
+            metrics.HTTP_REQUESTS.inc(method, route, str(status))
+            metrics.HTTP_REQUEST_SIZE.observe(method, route, value=request_size)
+            metrics.HTTP_RESPONSE_SIZE.observe(method, route, value=response_size)
+
+
+def preallocate_route_metrics(app) -> None:
+    # Bilinen rotaların histogram serilerini açılışta oluştur; sıcak yolda
+    # sadece sayaç artırımı kalsın.
+    for route in app.routes:
+        path = getattr(route, "path_format", None) or getattr(route, "path", None)
+        for method in getattr(route, "methods", None) or ():
+            metrics.HTTP_LATENCY.preallocate(method, path)
+            metrics.HTTP_REQUEST_SIZE.preallocate(method, path)
+            metrics.HTTP_RESPONSE_SIZE.preallocate(method, path)
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """Admin başlığı taşıyan ya da örnekleme oranına denk gelen istekleri profiller.
+
+    Sadece profiling.is_enabled() iken eklenir.
+    """
+
+    def __init__(self, app, max_concurrent: int = 2):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.active = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        forced = profiling.is_admin(_header(scope, profiling.PROFILE_HEADER.encode()))
+        if not forced and (self.active >= self.max_concurrent or not profiling.should_sample()):
+            await self.app(scope, receive, send)
+            return
+
+        # Depo anahtarı her zaman sunucuda üretilir; istemcinin x-request-id'si
+        # başka bir profilin üzerine yazamasın diye yalnızca yanında saklanır.
+        profile_id = uuid.uuid4().hex
+        client_request_id = (_header(scope, b"x-request-id") or "")[:64] or None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = profiling.StackSampler()
+        self.active += 1
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            folded = await asyncio.to_thread(sampler.stop)
+            self.active -= 1
+            profiling.PROFILES.add(
+                profile_id, scope["method"], scope["path"], duration, sampler, folded,
+                client_request_id=client_request_id,
+            )
+
+
+class CompressionMiddleware:
+    """Accept-Encoding'e göre br/gzip sıkıştırması.
+
+    Tek parça gönderilen ve COMPRESSION_MIN_SIZE'dan büyük cevaplar sıkıştırılır;
+    akış (streaming) cevapları ve zaten sıkıştırılmış cevaplar olduğu gibi geçer.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = compression.negotiate(_header(scope, b"accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body") or not _should_compress(start, body):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compression.compress(body, encoding)
+            headers = []
+            vary = b"Accept-Encoding"
+            for key, value in start.get("headers") or []:
+                if key == b"vary":
+                    vary = value + b", " + vary
+                elif key != b"content-length":
+                    headers.append((key, value))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            headers.append((b"vary", vary))
+            await send({**start, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _should_compress(start, body: bytes) -> bool:
+    if len(body) < compression.COMPRESSION_MIN_SIZE:
+        return False
+    content_type = b""
+    for key, value in start.get("headers") or []:
+        if key == b"content-encoding":
+            return False
+        if key == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").startswith(compression.COMPRESSIBLE_TYPES)
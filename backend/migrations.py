@@ -0,0 +1,175 @@
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+import database
+import models
+
+# Şema değişiklikleri burada sürümlü olarak tutulur ve deploy başına bir kez
+# çalıştırılır (uygulama açılışında değil):
+#
+#   python migrations.py            # bekleyen migration'ları uygula
+#   python migrations.py --status   # durumu göster
+#   python migrations.py --check    # bekleyen varsa 1 ile çık (CI/deploy kontrolü)
+#
+# Yeni bir migration eklerken listenin sonuna yeni bir sürüm numarasıyla ekleyin;
+# uygulanmış migration'ları değiştirmeyin.
+
+# Postgres'te aynı anda iki runner çalışırsa biri diğerini bekler.
+_ADVISORY_LOCK_KEY = 7_302_026
+
+
+def _create_users(conn) -> None:
+    models.User.__table__.create(conn, checkfirst=True)
+
+
+def _add_users_current_unit(conn) -> None:
+    columns = {col["name"] for col in inspect(conn).get_columns("users")}
+    if "current_unit" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN current_unit INTEGER DEFAULT 1"))
+
+
+def _create_story_library(conn) -> None:
+    models.Story.__table__.create(conn, checkfirst=True)
+    models.StoryRead.__table__.create(conn, checkfirst=True)
+    if conn.dialect.name != "postgresql":
+        return
+    # Yakın konu eşleştirmesi için trigram indeksi. Eklenti kurulamıyorsa
+    # (yetki yok vb.) eşleştirme uygulama tarafında yapılır.
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_stories_topic_key_trgm "
+                    "ON stories USING gin (topic_key gin_trgm_ops)"
+                )
+            )
+    except Exception as e:
+        print(f"UYARI: pg_trgm indeksi oluşturulamadı: {e}")
+
+
+def _create_jobs(conn) -> None:
+    models.Job.__table__.create(conn, checkfirst=True)
+
+
+def _create_user_activity(conn) -> None:
+    columns = {col["name"] for col in inspect(conn).get_columns("users")}
+    if "last_active_date" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN last_active_date DATE"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_last_active_date ON users (last_active_date)"))
+    models.UserActivity.__table__.create(conn, checkfirst=True)
+
+
+def _create_placement_tests(conn) -> None:
+    models.PlacementTest.__table__.create(conn, checkfirst=True)
+
+
+def _create_quiz_grading(conn) -> None:
+    models.Quiz.__table__.create(conn, checkfirst=True)
+    models.QuizAnswer.__table__.create(conn, checkfirst=True)
+    models.TopicStat.__table__.create(conn, checkfirst=True)
+
+
+def _create_daily_content(conn) -> None:
+    models.DailyContent.__table__.create(conn, checkfirst=True)
+
+
+def _add_jobs_user_id(conn) -> None:
+    # Eski satırlar sahipsiz kalır ve kimse okuyamaz; birkaç dakikada silinirler.
+    columns = {col["name"] for col in inspect(conn).get_columns("jobs")}
+    if "user_id" not in columns:
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN user_id INTEGER REFERENCES users(id) ON DELETE CASCADE"))
+
+
+MIGRATIONS = [
+    (1, "create_users", _create_users),
+    (2, "users_current_unit", _add_users_current_unit),
+    (3, "story_library", _create_story_library),
+    (4, "jobs", _create_jobs),
+    (5, "user_activity", _create_user_activity),
+    (6, "placement_tests", _create_placement_tests),
+    (7, "quiz_grading", _create_quiz_grading),
+    (8, "daily_content", _create_daily_content),
+    (9, "jobs_user_id", _add_jobs_user_id),
+]
+
+
+def _ensure_version_table(conn) -> None:
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR(200) NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL)"
+        )
+    )
+
+
+def _lock(conn) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def applied_versions(engine=None) -> set[int]:
+    engine = engine or database.engine
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        rows = conn.execute(text("SELECT version FROM schema_migrations")).fetchall()
+    return {row[0] for row in rows}
+
+
+def pending(engine=None) -> list[tuple[int, str]]:
+    done = applied_versions(engine)
+    return [(version, name) for version, name, _ in MIGRATIONS if version not in done]
+
+
+def migrate(engine=None) -> list[int]:
+    engine = engine or database.engine
+    applied = []
+    for version, name, upgrade in MIGRATIONS:
+        # Her migration kendi transaction'ında; yarıda kalan deploy kaldığı yerden devam eder.
+        with engine.begin() as conn:
+            _lock(conn)
+            _ensure_version_table(conn)
+            exists = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE version = :version"),
+                {"version": version},
+            ).first()
+            if exists:
+                continue
+            upgrade(conn)
+            conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, name, applied_at) "
+                    "VALUES (:version, :name, :applied_at)"
+                ),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()},
+            )
+            applied.append(version)
+            print(f"Migration uygulandı: {version} {name}")
+    return applied
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Veritabanı migration'ları")
+    parser.add_argument("--status", action="store_true", help="Uygulanmış/bekleyen migration'ları göster")
+    parser.add_argument("--check", action="store_true", help="Bekleyen migration varsa 1 ile çık")
+    args = parser.parse_args()
+
+    if args.status or args.check:
+        waiting = pending()
+        for version, name in waiting:
+            print(f"Bekliyor: {version} {name}")
+        if not waiting:
+            print("Şema güncel.")
+        return 1 if args.check and waiting else 0
+
+    migrate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
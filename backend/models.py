@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text
 from database import Base
 import datetime
 
@@ -15,5 +15,143 @@ class User(Base):
     level = Column(Integer, default=1)
     streak = Column(Integer, default=0)
     last_login = Column(DateTime, default=datetime.datetime.utcnow)
+    # Seri yazma anında bu güne göre güncellenir (bkz. activity.py).
+    last_active_date = Column(Date, nullable=True, index=True)
 
     current_unit = Column(Integer, default=1)
+
+
+class Story(Base):
+    __tablename__ = "stories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Kullanıcının yazdığı konu ve eşleştirmede kullanılan normalize hali
+    topic = Column(String(200), nullable=False)
+    topic_key = Column(String(200), nullable=False)
+    level = Column(String(20), nullable=False)
+
+    title = Column(String(300), nullable=False, default="")
+    story = Column(Text, nullable=False)
+    keywords = Column(JSON, nullable=False, default=list)
+    quiz = Column(JSON, nullable=False, default=list)
+
+    served_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (Index("ix_stories_level_topic_key", "level", "topic_key"),)
+
+
+class StoryRead(Base):
+    __tablename__ = "story_reads"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    story_id = Column(Integer, ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True)
+    read_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(40), nullable=False)
+    # Sonucu yalnızca işi gönderen kullanıcı okuyabilir.
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    # queued -> running -> done | failed
+    status = Column(String(16), nullable=False, default="queued")
+    result = Column(JSON, nullable=True)
+    error = Column(String(500), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    # Sonuç bu zamandan sonra silinir.
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class UserActivity(Base):
+    # Kullanıcı başına günde tek satır; ilerleme uç noktaları upsert ile artırır.
+    __tablename__ = "user_activity"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    xp = Column(Integer, nullable=False, default=0)
+    events = Column(Integer, nullable=False, default=0)
+
+
+class PlacementTest(Base):
+    # Uyarlanabilir seviye testinin sunucudaki durumu (bkz. placement.py).
+    __tablename__ = "placement_tests"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # active -> done
+    status = Column(String(16), nullable=False, default="active")
+    # [{"item_id": ..., "correct": bool}, ...]
+    responses = Column(JSON, nullable=False, default=list)
+    current_item = Column(String(20), nullable=True)
+    theta = Column(Float, nullable=False, default=0.0)
+    se = Column(Float, nullable=False, default=1.0)
+    assigned_level = Column(String(2), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class Quiz(Base):
+    # Üretilen quiz doğru cevaplarıyla sunucuda saklanır, gönderim buna göre puanlanır.
+    __tablename__ = "quizzes"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    topic = Column(String(200), nullable=False)
+    topic_key = Column(String(200), nullable=False)
+    questions = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    graded_at = Column(DateTime, nullable=True)
+
+
+class QuizAnswer(Base):
+    __tablename__ = "quiz_answers"
+
+    id = Column(Integer, primary_key=True)
+    quiz_id = Column(String(32), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    topic_key = Column(String(200), nullable=False)
+    position = Column(Integer, nullable=False)
+    answer = Column(String(300), nullable=False, default="")
+    correct = Column(Boolean, nullable=False)
+    answered_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (Index("ix_quiz_answers_user_topic", "user_id", "topic_key"),)
+
+
+class TopicStat(Base):
+    # Kullanıcı/konu başına doğruluk; her gönderimde artırılır, ham cevaplardan yeniden hesaplanmaz.
+    __tablename__ = "topic_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    topic_key = Column(String(200), primary_key=True)
+    topic = Column(String(200), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    # (correct + 1) / (attempts + 2): az denemeli konular uç değerlere kaçmaz.
+    accuracy = Column(Float, nullable=False, default=0.5)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    # En zayıf konu tek bir indeks taramasıyla bulunur.
+    __table_args__ = (Index("ix_topic_stats_user_accuracy", "user_id", "accuracy"),)
+
+
+class DailyContent(Base):
+    # Seviye başına günde bir kez üretilen içerik, JSON'a çevrilmiş haliyle (bkz. daily.py).
+    __tablename__ = "daily_content"
+
+    day = Column(Date, primary_key=True)
+    level = Column(Integer, primary_key=True)
+    # deck | story
+    kind = Column(String(20), primary_key=True)
+    # pending -> ready
+    status = Column(String(16), nullable=False, default="pending")
+    body = Column(LargeBinary, nullable=True)
+    etag = Column(String(40), nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import metrics
+
+# /start_chat için senaryo başına hazır açılış cümleleri. İstek havuzdan anında
+# karşılanır; eskiyen cümleler arka planda LLM ile yenilenir.
+OPENING_POOL_SIZE = int(os.getenv("OPENING_POOL_SIZE", "8"))
+# Bir açılış cümlesi en fazla bu kadar kez verilir, sonra yenisiyle değiştirilir.
+OPENING_MAX_USES = int(os.getenv("OPENING_MAX_USES", "25"))
+# Havuzlar varsayılan olarak ilk istekte, senaryo senaryo doldurulur. Açılışta
+# doldurma her worker'da ayrı çalışır (worker sayısı x senaryo sayısı kadar LLM
+# çağrısı); yalnızca tek worker'lı kurulumlarda açın.
+OPENING_POOL_WARMUP = os.getenv("OPENING_POOL_WARMUP", "0") == "1"
+OPENING_REFILL_CONCURRENCY = int(os.getenv("OPENING_REFILL_CONCURRENCY", "2"))
+
+# (senaryo, adet) -> aday açılış cümleleri
+Generator = Callable[[str, int], Awaitable[list[str]]]
+
+_TURKISH_CHARS = re.compile(r"[çğıöşüÇĞİÖŞÜ]")
+
+
+def validate_opening(text) -> str | None:
+    """Açılış cümlesini temizler; havuza girmeye uygun değilse None döner."""
+    if not isinstance(text, str):
+        return None
+    text = " ".join(text.split()).strip("\"'“” ")
+    if not 8 <= len(text) <= 300:
+        return None
+    # JSON artığı, yer tutucu veya Türkçe metin (senaryolar SADECE İngilizce)
+    if any(ch in text for ch in "{}[]<>") or _TURKISH_CHARS.search(text):
+        return None
+    if not re.search(r"[A-Za-z]{2}", text):
+        return None
+    return text
+
+
+@dataclass
+class _Opening:
+    text: str
+    uses: int = 0
+
+
+class OpeningPool:
+    def __init__(
+        self,
+        generate: Generator,
+        size: int = OPENING_POOL_SIZE,
+        max_uses: int = OPENING_MAX_USES,
+    ):
+        self.generate = generate
+        self.size = size
+        self.max_uses = max_uses
+        self._pools: dict[str, deque[_Opening]] = {}
+        self._refilling: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def take(self, scenario: str) -> str | None:
+        pool = self._pools.setdefault(scenario, deque())
+        opening = None
+        if pool:
+            # Sırayla döndür; kullanım sınırını dolduran havuzdan çıkar.
+            opening = pool.popleft()
+            opening.uses += 1
+            if opening.uses < self.max_uses:
+                pool.append(opening)
+            metrics.CHAT_OPENING_POOL_SIZE.set(scenario, value=len(pool))
+        if len(pool) < self.size:
+            self.refill(scenario)
+        return opening.text if opening else None
+
+    def add(self, scenario: str, candidates: list) -> int:
+        pool = self._pools.setdefault(scenario, deque())
+        seen = {opening.text.casefold() for opening in pool}
+        added = 0
+        for candidate in candidates:
+            text = validate_opening(candidate)
+            if text is None or text.casefold() in seen or len(pool) >= self.size:
+                continue
+            pool.append(_Opening(text))
+            seen.add(text.casefold())
+            added += 1
+        metrics.CHAT_OPENING_POOL_SIZE.set(scenario, value=len(pool))
+        return added
+
+    def refill(self, scenario: str) -> None:
+        if scenario in self._refilling:
+            return
+        self._refilling.add(scenario)
+        task = asyncio.create_task(self._refill(scenario))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refill(self, scenario: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(OPENING_REFILL_CONCURRENCY)
+        try:
+            async with self._semaphore:
+                needed = self.size - len(self._pools.get(scenario, ()))
+                if needed > 0:
+                    self.add(scenario, await self.generate(scenario, needed))
+        except Exception as e:
+            print(f"Açılış havuzu doldurma hatası ({scenario}): {e}")
+        finally:
+            self._refilling.discard(scenario)
+
+    def warmup(self, scenarios) -> None:
+        for scenario in scenarios:
+            self.refill(scenario)
+
+    def cancel(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,205 @@
+import math
+import os
+import random
+import uuid
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+import models
+
+# Uyarlanabilir seviye testi. Her cevaptan sonra yetenek (theta) tahmini
+# güncellenir ve bankadan bu tahmine en çok bilgi veren soru seçilir; tahminin
+# standart hatası yeterince küçülünce test biter. Sorular ve doğru cevaplar
+# sunucuda durur, puanlama burada yapılır.
+#
+# Model: 3 parametreli lojistik IRT. b zorluk (seviye merkezleri A1=-2 ... C1=2),
+# a ayırt edicilik, c tahmin olasılığı (1 / şık sayısı).
+
+PLACEMENT_MIN_ITEMS = int(os.getenv("PLACEMENT_MIN_ITEMS", "5"))
+PLACEMENT_MAX_ITEMS = int(os.getenv("PLACEMENT_MAX_ITEMS", "12"))
+# Tahminin standart hatası bunun altına inince test biter.
+PLACEMENT_TARGET_SE = float(os.getenv("PLACEMENT_TARGET_SE", "0.55"))
+# Aynı sorular herkese aynı sırayla gelmesin diye en bilgilendirici bu kadar
+# soru arasından rastgele seçilir.
+PLACEMENT_EXPOSURE_TOP = int(os.getenv("PLACEMENT_EXPOSURE_TOP", "3"))
+
+LEVELS = ["A1", "A2", "B1", "B2", "C1"]
+LEVEL_NUMBERS = {name: i + 1 for i, name in enumerate(LEVELS)}
+# Seviye merkezlerinin ortası: theta < -1.5 ise A1, < -0.5 ise A2 ...
+_LEVEL_CUTS = [-1.5, -0.5, 0.5, 1.5]
+
+# EAP için theta ızgarası ve standart normal önsel
+_GRID = [i / 10 for i in range(-40, 41)]
+_PRIOR = [math.exp(-t * t / 2) for t in _GRID]
+
+
+def _item(item_id, level, b, question, question_tr, options, answer, a=1.7):
+    return {
+        "id": item_id,
+        "level": level,
+        "a": a,
+        "b": b,
+        "question": question,
+        "question_tr": question_tr,
+        "options": options,
+        "answer": answer,
+    }
+
+
+ITEM_BANK = [
+    # A1
+    _item("a1-1", "A1", -2.4, "She ___ a teacher.", "O bir öğretmen(dir).", ["is", "are", "am", "be"], "is"),
+    _item("a1-2", "A1", -2.2, "They ___ from Turkey.", "Onlar Türkiye'li(dir).", ["are", "is", "am", "be"], "are"),
+    _item("a1-3", "A1", -2.0, "I ___ two brothers.", "İki erkek kardeşim var.", ["have", "has", "am", "having"], "have"),
+    _item("a1-4", "A1", -2.0, "There ___ a cat on the sofa.", "Kanepenin üstünde bir kedi var.", ["is", "are", "be", "am"], "is"),
+    _item("a1-5", "A1", -1.8, "___ you like coffee?", "Kahve sever misin?", ["Do", "Does", "Are", "Is"], "Do"),
+    _item("a1-6", "A1", -1.6, "He ___ football every Sunday.", "O her pazar futbol oynar.", ["plays", "play", "playing", "is play"], "plays"),
+    # A2
+    _item("a2-1", "A2", -1.4, "I ___ to the cinema last night.", "Dün akşam sinemaya gittim.", ["went", "go", "gone", "going"], "went"),
+    _item("a2-2", "A2", -1.2, "She is ___ than her sister.", "O, kız kardeşinden daha uzun.", ["taller", "tallest", "more tall", "tall"], "taller"),
+    _item("a2-3", "A2", -1.0, "How ___ milk do we need?", "Ne kadar süte ihtiyacımız var?", ["much", "many", "few", "lot"], "much"),
+    _item("a2-4", "A2", -1.0, "I'm going ___ visit my grandmother tomorrow.", "Yarın büyükannemi ziyaret edeceğim.", ["to", "for", "at", "on"], "to"),
+    _item("a2-5", "A2", -0.8, "We ___ dinner when the phone rang.", "Telefon çaldığında akşam yemeği yiyorduk.", ["were having", "have", "had had", "are having"], "were having"),
+    _item("a2-6", "A2", -0.6, "You ___ smoke here. It's forbidden.", "Burada sigara içemezsin. Yasak.", ["mustn't", "don't have to", "needn't", "aren't"], "mustn't"),
+    # B1
+    _item("b1-1", "B1", -0.4, "I have lived here ___ 2015.", "2015'ten beri burada yaşıyorum.", ["since", "for", "from", "during"], "since"),
+    _item("b1-2", "B1", -0.2, "If it rains tomorrow, we ___ at home.", "Yarın yağmur yağarsa evde kalacağız.", ["will stay", "would stay", "stayed", "stay would"], "will stay"),
+    _item("b1-3", "B1", 0.0, "This bridge ___ in 1890.", "Bu köprü 1890'da inşa edildi.", ["was built", "built", "has built", "is building"], "was built"),
+    _item("b1-4", "B1", 0.0, "She asked me where I ___.", "Bana nerede yaşadığımı sordu.", ["lived", "do live", "live", "did live"], "lived"),
+    _item("b1-5", "B1", 0.2, "I'm not used to ___ up so early.", "Bu kadar erken kalkmaya alışkın değilim.", ["getting", "get", "got", "be getting"], "getting"),
+    _item("b1-6", "B1", 0.4, "The man ___ car was stolen called the police.", "Arabası çalınan adam polisi aradı.", ["whose", "who", "which", "whom"], "whose"),
+    # B2
+    _item("b2-1", "B2", 0.6, "You'd better ___ a doctor about that cough.", "O öksürük için bir doktora görünsen iyi olur.", ["see", "to see", "seeing", "saw"], "see"),
+    _item("b2-2", "B2", 0.8, "She denied ___ the money.", "Parayı aldığını inkâr etti.", ["taking", "to take", "take", "to taking"], "taking"),
+    _item("b2-3", "B2", 1.0, "I wish I ___ more time to travel.", "Keşke seyahat etmek için daha çok vaktim olsa.", ["had", "have", "would have", "am having"], "had"),
+    _item("b2-4", "B2", 1.0, "The project, ___ was finished last week, cost a fortune.", "Geçen hafta biten proje bir servete mal oldu.", ["which", "that", "what", "who"], "which"),
+    _item("b2-5", "B2", 1.2, "By the time we arrived, the film ___.", "Biz vardığımızda film çoktan başlamıştı.", ["had already started", "already started", "has already started", "was already starting"], "had already started"),
+    _item("b2-6", "B2", 1.4, "If I ___ about the traffic, I would have left earlier.", "Trafiği bilseydim daha erken çıkardım.", ["had known", "knew", "have known", "would know"], "had known"),
+    # C1
+    _item("c1-1", "C1", 1.6, "It's high time we ___ a decision.", "Artık bir karar vermemizin zamanı geldi.", ["made", "make", "will make", "have made"], "made"),
+    _item("c1-2", "C1", 1.8, "She would rather you ___ smoke in the house.", "Evde sigara içmemeni tercih eder.", ["didn't", "don't", "won't", "haven't"], "didn't"),
+    _item("c1-3", "C1", 2.0, "Hardly ___ sat down when the phone rang.", "Daha yeni oturmuştum ki telefon çaldı.", ["had I", "I had", "did I", "I have"], "had I"),
+    _item("c1-4", "C1", 2.0, "Not only ___ late, but he also forgot the tickets.", "Sadece geç kalmakla kalmadı, biletleri de unuttu.", ["was he", "he was", "he is", "did he"], "was he"),
+    _item("c1-5", "C1", 2.2, "___ they left earlier, they would have caught the train.", "Daha erken çıksalardı treni yakalarlardı.", ["Had", "If", "Were", "Should"], "Had"),
+    _item("c1-6", "C1", 2.4, "The negotiations were ___ by a lack of trust on both sides.", "Müzakereler iki taraftaki güven eksikliği yüzünden sekteye uğradı.", ["hampered", "hammered", "hindering", "hampering"], "hampered"),
+]
+ITEMS = {item["id"]: item for item in ITEM_BANK}
+
+
+def probability(theta: float, item: dict) -> float:
+    guess = 1 / len(item["options"])
+    return guess + (1 - guess) / (1 + math.exp(-item["a"] * (theta - item["b"])))
+
+
+def information(theta: float, item: dict) -> float:
+    guess = 1 / len(item["options"])
+    p = probability(theta, item)
+    return item["a"] ** 2 * ((p - guess) / (1 - guess)) ** 2 * (1 - p) / p
+
+
+def estimate(responses: list[dict]) -> tuple[float, float]:
+    """Beklenen sonsal (EAP) theta ve standart hatası."""
+    weights = list(_PRIOR)
+    for response in responses:
+        item = ITEMS[response["item_id"]]
+        for i, theta in enumerate(_GRID):
+            p = probability(theta, item)
+            weights[i] *= p if response["correct"] else 1 - p
+    total = sum(weights)
+    mean = sum(w * t for w, t in zip(weights, _GRID)) / total
+    variance = sum(w * (t - mean) ** 2 for w, t in zip(weights, _GRID)) / total
+    return mean, math.sqrt(variance)
+
+
+def next_item(theta: float, asked: set[str], rng=random) -> dict | None:
+    remaining = [item for item in ITEM_BANK if item["id"] not in asked]
+    if not remaining:
+        return None
+    remaining.sort(key=lambda item: information(theta, item), reverse=True)
+    return rng.choice(remaining[:PLACEMENT_EXPOSURE_TOP])
+
+
+def is_finished(answered: int, se: float) -> bool:
+    if answered >= min(PLACEMENT_MAX_ITEMS, len(ITEM_BANK)):
+        return True
+    return answered >= PLACEMENT_MIN_ITEMS and se <= PLACEMENT_TARGET_SE
+
+
+def level_for(theta: float) -> str:
+    index = sum(1 for cut in _LEVEL_CUTS if theta >= cut)
+    return LEVELS[index]
+
+
+def public_question(item: dict) -> dict:
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "question_tr": item["question_tr"],
+        "options": item["options"],
+    }
+
+
+class PlacementError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def start(db: Session, user_id: int) -> dict:
+    theta, se = estimate([])
+    item = next_item(theta, set())
+    test = models.PlacementTest(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        responses=[],
+        current_item=item["id"],
+        theta=theta,
+        se=se,
+    )
+    db.add(test)
+    db.commit()
+    return {
+        "test_id": test.id,
+        "done": False,
+        "answered": 0,
+        "max_items": PLACEMENT_MAX_ITEMS,
+        "question": public_question(item),
+    }
+
+
+def answer(db: Session, test_id: str, user_id: int, item_id: str, given: str) -> dict:
+    """Cevabı puanlar; test bittiyse sonuç, bitmediyse sıradaki soru döner."""
+    test = db.query(models.PlacementTest).filter(models.PlacementTest.id == test_id).with_for_update().first()
+    if test is None or test.user_id != user_id:
+        raise PlacementError(404, "Test bulunamadı")
+    if test.status != "active":
+        raise PlacementError(409, "Test zaten tamamlandı")
+    if item_id != test.current_item:
+        raise PlacementError(409, "Bu soru zaten cevaplandı")
+
+    item = ITEMS[item_id]
+    correct = given.strip().lower() == item["answer"].lower()
+    responses = list(test.responses or []) + [{"item_id": item_id, "correct": correct}]
+    theta, se = estimate(responses)
+    test.responses = responses
+    test.theta = theta
+    test.se = se
+
+    result = {"test_id": test.id, "correct": correct, "answered": len(responses), "max_items": PLACEMENT_MAX_ITEMS}
+    following = None
+    if not is_finished(len(responses), se):
+        following = next_item(theta, {r["item_id"] for r in responses})
+
+    if following is None:
+        test.status = "done"
+        test.current_item = None
+        test.assigned_level = level_for(theta)
+        test.finished_at = datetime.utcnow()
+        result.update(done=True, assigned_level=test.assigned_level, theta=round(theta, 2), se=round(se, 2))
+    else:
+        test.current_item = following["id"]
+        result.update(done=False, question=public_question(following))
+    # Commit çağırana kalır; kullanıcı seviyesi aynı transaction'da yazılır.
+    return result
@@ -0,0 +1,49 @@
+import asyncio
+import os
+from typing import Awaitable, Callable
+
+import metrics
+
+# Sıradaki ünitenin içeriğini kullanıcı açmadan önce arka planda üretir.
+# complete_unit commit'ten sonra sıradaki ünitenin quiz'ini ya da sohbet
+# açılışını burada planlar; istek geldiğinde içerik hazırsa anında döner,
+# üretim sürüyorsa ona katılır. Tahmini iş gerçek isteklerle yarışmasın diye
+# aynı anda açık iş sayısı sınırlıdır; sınır doluysa yenisi atlanır.
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+# Önceden üretilen içerik bu süre içinde açılmazsa atılır.
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "1800"))
+# Worker başına aynı anda en fazla bu kadar önceden üretim
+PREFETCH_MAX_IN_FLIGHT = int(os.getenv("PREFETCH_MAX_IN_FLIGHT", "4"))
+
+
+class Prefetcher:
+    def __init__(self, max_in_flight: int = PREFETCH_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        # anahtar -> görev; aynı kullanıcı/içerik için tek iş
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def schedule(self, kind: str, key: str, work: Callable[[], Awaitable]) -> bool:
+        if not PREFETCH_ENABLED or key in self._tasks:
+            return False
+        if len(self._tasks) >= self.max_in_flight:
+            metrics.PREFETCH_JOBS.inc(kind, "skipped")
+            return False
+        task = asyncio.create_task(self._run(kind, key, work))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return True
+
+    async def _run(self, kind: str, key: str, work: Callable[[], Awaitable]) -> None:
+        try:
+            await work()
+        except Exception as e:
+            # Tahmini iş; kullanıcı üniteyi açınca içerik canlı üretilir.
+            print(f"Önceden üretim hatası ({kind} {key}): {e}")
+            metrics.PREFETCH_JOBS.inc(kind, "error")
+        else:
+            metrics.PREFETCH_JOBS.inc(kind, "ok")
+
+    def cancel(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
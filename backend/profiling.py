@@ -0,0 +1,140 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Profil modu varsayılan olarak kapalıdır. İkisinden biri ayarlanmadıkça
+# middleware hiç eklenmez, yani kapalıyken istek başına ek maliyet sıfırdır.
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+
+PROFILE_HEADER = "x-profile-token"
+
+# Boşta bekleyen thread'lerin (event loop select'i, thread pool kuyruğu) örnekleri
+# profile gürültü katmasın.
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+}
+
+
+def is_enabled() -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def is_admin(token: str | None) -> bool:
+    if not PROFILE_ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+
+def should_sample() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frame) -> str | None:
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+        return None
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return ";".join(stack)
+
+
+class StackSampler:
+    """Tüm thread'lerin yığınlarını sabit aralıkla örnekleyen istatistiksel profiler.
+
+    Çıktı "folded stacks" biçimindedir (flamegraph.pl, speedscope, inferno).
+    Aynı anda çalışan diğer isteklerin yığınları da örneklere girebilir.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.counts: dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "\n".join(
+            f"{stack} {count}"
+            for stack, count in sorted(self.counts.items(), key=lambda item: -item[1])
+        )
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _fold(frame)
+                if stack is None:
+                    continue
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+                self.samples += 1
+
+
+class ProfileStore:
+    def __init__(self, max_profiles: int = PROFILE_MAX_STORED):
+        self.max_profiles = max_profiles
+        self._profiles: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        profile_id: str,
+        method: str,
+        path: str,
+        duration: float,
+        sampler: StackSampler,
+        folded: str,
+        client_request_id: str | None = None,
+    ) -> None:
+        with self._lock:
+            self._profiles[profile_id] = {
+                "profile_id": profile_id,
+                "client_request_id": client_request_id,
+                "method": method,
+                "path": path,
+                "created_at": time.time(),
+                "duration_seconds": round(duration, 4),
+                "samples": sampler.samples,
+                "interval_seconds": sampler.interval,
+                "folded": folded,
+            }
+            self._profiles.move_to_end(profile_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key != "folded"}
+                for profile in reversed(self._profiles.values())
+            ]
+
+    def get(self, profile_id: str) -> dict | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+PROFILES = ProfileStore()
@@ -0,0 +1,141 @@
+import os
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import database
+import models
+from stories import normalize_topic
+
+# Quiz puanlama ve konu bazlı doğruluk. generate_quiz ürettiği soruları doğru
+# cevaplarıyla saklar; gönderim buna göre puanlanır, cevaplar toplu eklenir ve
+# kullanıcı/konu toplamları aynı transaction'da artırılır. En zayıf konu bu
+# toplamlardan (user_id, accuracy) indeksiyle tek satır okunarak bulunur.
+
+# Bu doğruluğun altındaki konular "zayıf" sayılır.
+QUIZ_WEAK_ACCURACY = float(os.getenv("QUIZ_WEAK_ACCURACY", "0.7"))
+# Zayıf konu seçilirken en az bu kadar cevaplanmış soru aranır.
+QUIZ_WEAK_MIN_ATTEMPTS = int(os.getenv("QUIZ_WEAK_MIN_ATTEMPTS", "3"))
+
+
+class QuizError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _same_answer(given: str, expected: str) -> bool:
+    return given.strip().casefold() == str(expected).strip().casefold()
+
+
+def save(user_id: int, topic: str, questions: list[dict]) -> str:
+    with database.SessionLocal() as db:
+        quiz = models.Quiz(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            topic=topic[:200],
+            topic_key=normalize_topic(topic),
+            questions=questions,
+        )
+        db.add(quiz)
+        db.commit()
+        return quiz.id
+
+
+def grade(db: Session, quiz_id: str, user_id: int, answers: list[str]) -> dict:
+    """Cevapları puanlar ve konu toplamını günceller; commit çağırana kalır."""
+    quiz = db.query(models.Quiz).filter(models.Quiz.id == quiz_id).with_for_update().first()
+    if quiz is None or quiz.user_id != user_id:
+        raise QuizError(404, "Quiz bulunamadı")
+    if quiz.graded_at is not None:
+        raise QuizError(409, "Quiz zaten gönderildi")
+
+    now = datetime.utcnow()
+    rows = []
+    results = []
+    for position, question in enumerate(quiz.questions):
+        given = answers[position] if position < len(answers) else ""
+        correct = _same_answer(given, question.get("correct_answer", ""))
+        rows.append(
+            {
+                "quiz_id": quiz.id,
+                "user_id": user_id,
+                "topic_key": quiz.topic_key,
+                "position": position,
+                "answer": given[:300],
+                "correct": correct,
+                "answered_at": now,
+            }
+        )
+        results.append(
+            {"id": question.get("id", position + 1), "correct": correct, "correct_answer": question.get("correct_answer")}
+        )
+    if rows:
+        # Tek executemany; soru başına ayrı INSERT yok.
+        db.execute(insert(models.QuizAnswer), rows)
+
+    score = sum(1 for row in rows if row["correct"])
+    table = models.TopicStat.__table__
+    database.upsert(
+        db,
+        table,
+        {
+            "user_id": user_id,
+            "topic_key": quiz.topic_key,
+            "topic": quiz.topic,
+            "attempts": len(rows),
+            "correct": score,
+            "accuracy": (score + 1) / (len(rows) + 2),
+            "updated_at": now,
+        },
+        keys=["user_id", "topic_key"],
+        increments={
+            "attempts": lambda cur, new: cur.attempts + new.attempts,
+            "correct": lambda cur, new: cur.correct + new.correct,
+            "accuracy": lambda cur, new: (cur.correct + new.correct + 1) * 1.0 / (cur.attempts + new.attempts + 2),
+            "updated_at": lambda cur, new: new.updated_at,
+        },
+    )
+    quiz.graded_at = now
+
+    return {"quiz_id": quiz.id, "topic": quiz.topic, "score": score, "total": len(rows), "results": results}
+
+
+def weakest_topic(db: Session, user_id: int) -> models.TopicStat | None:
+    return (
+        db.query(models.TopicStat)
+        .filter(
+            models.TopicStat.user_id == user_id,
+            models.TopicStat.accuracy < QUIZ_WEAK_ACCURACY,
+            models.TopicStat.attempts >= QUIZ_WEAK_MIN_ATTEMPTS,
+        )
+        .order_by(models.TopicStat.accuracy)
+        .first()
+    )
+
+
+def weakest_topic_name(user_id: int) -> str | None:
+    with database.SessionLocal() as db:
+        stat = weakest_topic(db, user_id)
+        return stat.topic if stat is not None else None
+
+
+def topic_accuracy(db: Session, user_id: int) -> list[dict]:
+    stats = (
+        db.query(models.TopicStat)
+        .filter(models.TopicStat.user_id == user_id)
+        .order_by(models.TopicStat.accuracy)
+        .all()
+    )
+    return [
+        {
+            "topic": stat.topic,
+            "attempts": stat.attempts,
+            "correct": stat.correct,
+            "accuracy": round(stat.correct / stat.attempts, 3) if stat.attempts else None,
+        }
+        for stat in stats
+    ]
@@ -0,0 +1,83 @@
+import math
+import os
+import time
+from collections import OrderedDict
+
+# LLM kullanan uç noktalar için kullanıcı ve IP başına token bucket. Kovalar
+# istekte tembel doldurulur; tamamen dolmuş (boşta kalmış) kovalar kayıt
+# tutmakla aynı anlama geldiği için silinir, bellek aktif anahtar sayısıyla sınırlı kalır.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_USER_PER_MINUTE = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "30"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "10"))
+# Aynı IP arkasında (NAT, okul ağı) birden çok kullanıcı olabilir; daha geniş tutulur.
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "90"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "30"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# X-Forwarded-For'da sağdan kaç proxy'ye güvenilir (Render önünde bir tane var).
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+
+
+class TokenBucketLimiter:
+    def __init__(self, per_minute: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        # anahtar -> [token, son güncelleme]; en eski erişim başta
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        # Boş bir kova bu sürede tamamen dolar.
+        self._refill_seconds = burst / self.rate if self.rate > 0 else math.inf
+
+    def peek(self, key: str, cost: float = 1.0) -> float:
+        """acquire gibi bekleme süresini döner ama token harcamaz."""
+        return self._wait(self._tokens(key, time.monotonic()), cost)
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """İzin verilirse 0, verilmezse tekrar denemeden önce beklenecek saniye."""
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        tokens = self._tokens(key, now)
+        wait = self._wait(tokens, cost)
+        if wait == 0:
+            tokens -= cost
+        self._buckets[key] = [tokens, now]
+        self._buckets.move_to_end(key)
+        return wait
+
+    def _tokens(self, key: str, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.burst
+        return min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def _wait(self, tokens: float, cost: float) -> float:
+        if tokens >= cost:
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (cost - tokens) / self.rate
+
+    def _evict_idle(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self._refill_seconds and len(self._buckets) < self.max_keys:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def client_ip(scope: dict) -> str:
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        for name, value in scope.get("headers") or []:
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if hops:
+                    return hops[-min(RATE_LIMIT_PROXY_HOPS, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
@@ -28,20 +28,9 @@ class UserOut(BaseModel):
         from_attributes = True
 
 
-class TestQuestion(BaseModel):
-    id: int
-    question: str
-    question_tr: str
-    options: list[str]
-    correct_answer: str
-
-
-class PlacementTest(BaseModel):
-    questions: list[TestQuestion]
-
-
-class TestResult(BaseModel):
-    correct_count: int
+class PlacementAnswer(BaseModel):
+    item_id: str
+    answer: str
 
 
 class QuizQuestion(BaseModel):
@@ -70,3 +59,15 @@ class Flashcard(BaseModel):
 
 class FlashcardsResponse(BaseModel):
     flashcards: list[Flashcard]
+
+
+class ChatReply(BaseModel):
+    reply: str = ""
+    has_mistake: bool = False
+    correction: str = ""
+    explanation_tr: str = ""
+
+
+class ChatResponse(BaseModel):
+    response: ChatReply
+    session_id: str | None = None
@@ -0,0 +1,243 @@
+import gzip
+import math
+import os
+import re
+from functools import lru_cache
+
+# Sıklık sırasına göre dizilmiş İngilizce kelime listesi (en sık kullanılan en üstte).
+# wordfreq'in "en" listesinden, yalnızca harf (ve tek kesme işareti) içeren ilk
+# 30.000 kelime alınarak üretildi.
+LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "words_en.txt.gz")
+
+# Yerel onarımın kabul edilmesi için gereken minimum güven (bilinen kelimelerle
+# kapsanan harf oranı). Altında kalırsa LLM ile düzeltmeye düşülür.
+MIN_CONFIDENCE = float(os.getenv("SEGMENTER_MIN_CONFIDENCE", "0.97"))
+# Bundan uzun metin yerelde onarılmaz (güven 0 döner, LLM'e düşülür); çalışma
+# süresi metin uzunluğuyla doğrusal olsa da üst sınırı olsun.
+MAX_FIX_CHARS = int(os.getenv("SEGMENTER_MAX_CHARS", "20000"))
+
+# Sözlükte olsalar da bölmeden çıkan 1-2 harflik parçalar çoğunlukla yanlış
+# kesimdir ("Ke rem", "pp lay ed"); bunlar dışındakiler bilinmeyen sayılır.
+SHORT_WORDS = frozenset(
+    "a i i'm i'd am an as at be by do go he hi if in is it me my no of oh ok on or so to up us we".split()
+)
+# Büyük harfle başlayan bilinmeyen parça isim + kelimeler olarak bölünürken
+# ismin harf başına maliyeti: "Keremand" -> "Kerem and" (ve "Ke remand" değil),
+# "Ayşewholived" -> "Ayşe who lived" (ve "Ayşewho lived" değil).
+NAME_LETTER_COST = 2.5
+# Bundan uzun "isim" büyük ihtimalle bölünemeyen bitişik metindir; güvene sayılır.
+NAME_MAX_LETTERS = 12
+
+_ALPHA_RUN = re.compile(r"[^\W\d_]+")
+_WORD_RUN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+_MISSING_SPACE_AFTER_PUNCT = re.compile(r"([a-z][.,!?;:])([A-Za-z])")
+
+
+def needs_spacing_fix(text: str) -> bool:
+    if not text:
+        return False
+
+    runs = _ALPHA_RUN.findall(text)
+    if not runs:
+        return False
+    lengths = list(map(len, runs))
+    letters = sum(lengths)
+    spaces = text.count(" ")
+
+    # Heuristics: very few spaces compared to letters, or extremely long alpha runs.
+    if letters >= 80 and spaces <= 3:
+        return True
+    if spaces / letters < 0.03:
+        return True
+    if max(lengths) >= 35:
+        return True
+    return False
+
+
+class WordSegmenter:
+    def __init__(self, words: list[str]):
+        # Zipf yasası: k. sıradaki kelimenin maliyeti log(k * log(N)).
+        log_n = math.log(len(words))
+        self.costs = {
+            word: math.log((rank + 1) * log_n) for rank, word in enumerate(words)
+        }
+        self.max_len = max(map(len, words))
+        # Bilinmeyen bir harfin maliyeti en nadir kelimeden bile pahalı olmalı.
+        self.unknown_cost = math.log(len(words) * log_n) + 10.0
+
+    def split(self, run: str, before_punct: bool = False) -> tuple[list[str], int]:
+        """Bitişik yazılmış bir harf dizisini kelimelere ayırır.
+
+        Dönüş: (kelimeler, bilinen bir kelimeyle eşleşmeyen harf sayısı).
+        """
+        lower = run.lower()
+        n = len(lower)
+        # best[i] = (maliyet, son parçanın uzunluğu, son parça bilinmiyor mu)
+        best: list[tuple[float, int, bool]] = [(0.0, 0, False)]
+        for i in range(1, n + 1):
+            # Bilinmeyen tek harf her zaman bir çıkış yoludur.
+            candidate = (best[i - 1][0] + self.unknown_cost, 1, True)
+            for k in range(1, min(i, self.max_len) + 1):
+                cost = self.costs.get(lower[i - k:i])
+                if cost is None:
+                    continue
+                total = best[i - k][0] + cost
+                if _suspicious(lower[i - k:i]):
+                    total += self.unknown_cost
+                if before_punct and i == n and k == 1:
+                    # Noktalamadan hemen önce tek harflik kelime ("a.") neredeyse
+                    # her zaman yanlış bölmedir: "thesea." -> "these a."
+                    total += self.unknown_cost
+                if total < candidate[0]:
+                    candidate = (total, k, False)
+            best.append(candidate)
+
+        words: list[str] = []
+        unknown = 0
+        pending = ""
+        i = n
+        while i > 0:
+            _, k, is_unknown = best[i]
+            piece = run[i - k:i]
+            if is_unknown:
+                # Ardışık bilinmeyen harfleri tek parça olarak tut.
+                pending = piece + pending
+                unknown += k
+            else:
+                if pending:
+                    words.append(pending)
+                    pending = ""
+                words.append(piece)
+                if _suspicious(piece.lower()):
+                    unknown += k
+            i -= k
+        if pending:
+            words.append(pending)
+        words.reverse()
+        return words, unknown
+
+    def _clean_suffixes(self, lower: str, before_punct: bool) -> list[tuple[float, int] | None]:
+        """suffix[j] = lower[j:] yalnızca bilinen (şüpheli olmayan) kelimelere
+        bölünebiliyorsa (en düşük maliyet, ilk kelimenin uzunluğu), yoksa None."""
+        n = len(lower)
+        suffix: list[tuple[float, int] | None] = [None] * n + [(0.0, 0)]
+        for j in range(n - 1, -1, -1):
+            for k in range(1, min(n - j, self.max_len) + 1):
+                rest = suffix[j + k]
+                if rest is None:
+                    continue
+                word = lower[j:j + k]
+                cost = self.costs.get(word)
+                if cost is None or _suspicious(word):
+                    continue
+                total = cost + rest[0]
+                if before_punct and j + k == n and k == 1:
+                    total += self.unknown_cost
+                if suffix[j] is None or total < suffix[j][0]:
+                    suffix[j] = (total, k)
+        return suffix
+
+    def split_name(self, part: str, before_punct: bool = False) -> list[str] | None:
+        """Büyük harfle başlayan parçayı isim + bilinen kelimeler olarak böler.
+
+        İsim hiç bölünmez; kalan kısım temiz bölünemiyorsa None döner. Kalan
+        kısımların en iyi bölümü tek bir sondan-başa DP ile bulunur.
+        """
+        suffix = self._clean_suffixes(part.lower(), before_punct)
+        best: tuple[float, int] | None = None
+        for length in range(2, len(part) + 1):
+            if not part[:length].isalpha():
+                break
+            rest = suffix[length]
+            if rest is None:
+                continue
+            cost = NAME_LETTER_COST * length + rest[0]
+            if best is None or cost < best[0]:
+                best = (cost, length)
+        if best is None:
+            return None
+
+        words = [part[:best[1]]]
+        i = best[1]
+        while i < len(part):
+            k = suffix[i][1]
+            words.append(part[i:i + k])
+            i += k
+        return words
+
+    def fix_spacing(self, text: str) -> tuple[str, float]:
+        """Metindeki bitişik kelimeleri ayırır.
+
+        Dönüş: (düzeltilmiş metin, güven). Güven, yeniden bölünen harflerin ne
+        kadarının sözlükteki kelimelerle kapsandığıdır (0.0 - 1.0).
+        """
+        if len(text) > MAX_FIX_CHARS:
+            return text, 0.0
+        text = _MISSING_SPACE_AFTER_PUNCT.sub(r"\1 \2", text)
+
+        touched = 0
+        unknown = 0
+
+        def _repair(match: re.Match) -> str:
+            nonlocal touched, unknown
+            run = match.group(0)
+            if run.lower() in self.costs:
+                return run
+            end = match.end()
+            before_punct = end < len(match.string) and match.string[end] in ".,!?;:"
+            parts = _camel_parts(run)
+            pieces = []
+            for index, part in enumerate(parts):
+                last = before_punct and index == len(parts) - 1
+                touched += len(part)
+                if part.lower() in self.costs:
+                    pieces.append(part)
+                    continue
+                words, missing = self.split(part, last)
+                named = self.split_name(part, last) if missing and part[0].isupper() else None
+                if named is not None:
+                    # Büyük harfli bilinmeyen parça büyük ihtimalle bir isim:
+                    # sözlük parçalarına bölünmez, bütün tutulur.
+                    words = named
+                    missing = len(named[0]) if len(named[0]) > NAME_MAX_LETTERS else 0
+                elif missing:
+                    # Temiz bölünemeyen parça anlamsız parçalara ayrılmaz; olduğu
+                    # gibi kalır ve tamamı güvenden düşülür.
+                    words, missing = [part], len(part)
+                unknown += missing
+                pieces.extend(words)
+            return " ".join(pieces)
+
+        fixed = _WORD_RUN.sub(_repair, text)
+        if touched == 0:
+            return fixed, 1.0
+        return fixed, 1.0 - unknown / touched
+
+
+def _suspicious(word: str) -> bool:
+    # "m's" gibi kesme işaretli kısa parçalar da sayılır.
+    return len(word.replace("'", "")) <= 2 and word not in SHORT_WORDS
+
+
+def _camel_parts(run: str) -> list[str]:
+    # Küçük harften sonra gelen büyük harf yeni bir kelimeye (çoğunlukla isme)
+    # başlar: "girlnamedAyşe" -> "girlnamed", "Ayşe".
+    parts = []
+    start = 0
+    for i in range(1, len(run)):
+        if run[i].isupper() and run[i - 1].islower():
+            parts.append(run[start:i])
+            start = i
+    parts.append(run[start:])
+    return parts
+
+
+@lru_cache(maxsize=1)
+def get_segmenter() -> WordSegmenter:
+    with gzip.open(LEXICON_PATH, "rt", encoding="utf-8") as f:
+        words = [line.strip() for line in f if line.strip()]
+    return WordSegmenter(words)
+
+
+def fix_spacing(text: str) -> tuple[str, float]:
+    return get_segmenter().fix_spacing(text)
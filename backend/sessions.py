@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+# Özetlemeden sonra tam metin olarak kalan son tur (mesaj) sayısı. Özetlenmemiş
+# turların hepsi prompta girer; hiçbir tur özete girmeden prompttan düşmez.
+SESSION_WINDOW_TURNS = int(os.getenv("SESSION_WINDOW_TURNS", "8"))
+# Özet + turlar bu tahmini token sayısını geçince ya da turlar pencerenin iki
+# katına ulaşınca eski turlar özete katlanır.
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "1200"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(60 * 60 * 6)))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "5000"))
+
+# Oturum id'lerini yalnızca sunucu üretir ve her oturum bir kullanıcıya aittir;
+# başkasının id'siyle gelen istek oturumu hiç görmez. Kullanıcı başına tek oturum
+# tutulur (yenisi başlayınca eskisi atılır), böylece depo kullanıcı sayısıyla sınırlı.
+
+# (eski özet, özetlenecek turlar) -> yeni özet
+Summarizer = Callable[[str, list[dict]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    # Kaba tahmin: İngilizce için ~4 karakter/token.
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ChatSession:
+    id: str
+    owner: int
+    scenario: str
+    summary: str = ""
+    turns: list[dict] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.monotonic)
+    compacting: bool = False
+
+    def token_estimate(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(turn["content"]) for turn in self.turns
+        )
+
+
+class SessionStore:
+    def __init__(
+        self,
+        window_turns: int = SESSION_WINDOW_TURNS,
+        token_budget: int = SESSION_TOKEN_BUDGET,
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+    ):
+        self.window_turns = window_turns
+        self.token_budget = token_budget
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        # kullanıcı -> oturum id'si
+        self._by_owner: dict[int, str] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self, owner: int, scenario: str) -> ChatSession:
+        """Kullanıcıya yeni bir oturum açar; önceki oturumu atılır."""
+        self._evict_expired()
+        previous = self._by_owner.get(owner)
+        if previous is not None:
+            self._drop(previous)
+        session = ChatSession(id=uuid.uuid4().hex, owner=owner, scenario=scenario)
+        self._sessions[session.id] = session
+        self._by_owner[owner] = session.id
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)))
+        return session
+
+    def get(self, session_id: str, owner: int | None, scenario: str) -> ChatSession | None:
+        """Oturum yoksa, başkasınınsa ya da senaryo farklıysa None döner."""
+        self._evict_expired()
+        session = self._sessions.get(session_id)
+        if session is None or owner is None or session.owner != owner or session.scenario != scenario:
+            return None
+        self._sessions.move_to_end(session.id)
+        session.updated_at = time.monotonic()
+        return session
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None and self._by_owner.get(session.owner) == session_id:
+            del self._by_owner[session.owner]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def build_messages(self, session: ChatSession | None, system_prompt: str, user_message: str) -> list[dict]:
+        """session None ise geçmişsiz (tek seferlik) sohbet mesajları kurulur."""
+        messages = [{"role": "system", "content": system_prompt}]
+        if session is None:
+            messages.append({"role": "user", "content": user_message})
+            return messages
+        if session.summary:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": f"Conversation so far (summary): {session.summary}",
+                }
+            )
+        messages.extend(session.turns)
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def append(self, session: ChatSession, role: str, content: str) -> None:
+        session.turns.append({"role": role, "content": content})
+        session.updated_at = time.monotonic()
+
+    def maybe_compact(self, session: ChatSession, summarize: Summarizer) -> None:
+        if session.compacting or len(session.turns) <= self.window_turns:
+            return
+        # Kısa turlarda da özet her mesajda değil, pencere dolunca bir kez üretilir.
+        if session.token_estimate() <= self.token_budget and len(session.turns) < self.window_turns * 2:
+            return
+
+        session.compacting = True
+        task = asyncio.create_task(self._compact(session, summarize))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, session: ChatSession, summarize: Summarizer) -> None:
+        old_turns = session.turns[: len(session.turns) - self.window_turns]
+        try:
+            summary = await summarize(session.summary, old_turns)
+            if summary:
+                session.summary = summary
+                # Özetlenirken gelen yeni turlar korunur; sadece özetlenenler silinir.
+                del session.turns[: len(old_turns)]
+        except Exception as e:
+            print(f"Session Özet Hatası: {e}")
+            # Özet üst üste üretilemezse bellek ve prompt yine sınırlı kalsın;
+            # turlar ancak özetleme denendikten sonra atılır.
+            hard_limit = self.window_turns * 4
+            if len(session.turns) > hard_limit:
+                del session.turns[: len(session.turns) - hard_limit]
+        finally:
+            session.compacting = False
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.updated_at < self.ttl_seconds:
+                break
+            self._drop(oldest.id)
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import re
+import unicodedata
+from typing import Awaitable, Callable
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+import database
+import models
+
+# Üretilen hikayeler (konu, seviye) bazında saklanır; istek kullanıcının henüz
+# okumadığı bir hikaye varsa kütüphaneden, yoksa yeni üretimle karşılanır.
+
+# Bu benzerliğin (trigram, 0-1) üstündeki konular aynı konu sayılır.
+STORY_TOPIC_SIMILARITY = float(os.getenv("STORY_TOPIC_SIMILARITY", "0.5"))
+# Kullanıcının okumadığı hikaye sayısı bunun altına düşünce arka planda yenisi üretilir.
+STORY_LIBRARY_MIN_UNREAD = int(os.getenv("STORY_LIBRARY_MIN_UNREAD", "1"))
+# Konu başına en az bu kadar hikaye olana kadar kütüphane büyütülür (anonim istekler için).
+STORY_LIBRARY_MIN_SIZE = int(os.getenv("STORY_LIBRARY_MIN_SIZE", "3"))
+STORY_LIBRARY_MAX_PER_TOPIC = int(os.getenv("STORY_LIBRARY_MAX_PER_TOPIC", "40"))
+
+# (topic, level) -> {"title", "story", "keywords", "quiz"}
+Generator = Callable[[str, str], Awaitable[dict]]
+
+_STOPWORDS = {
+    "a", "an", "the", "about", "of", "and", "or", "in", "on", "at", "for", "to",
+    "with", "my", "our", "some", "story", "stories",
+}
+
+_pg_trgm: bool | None = None
+_growing: set[tuple[str, str]] = set()
+_tasks: set[asyncio.Task] = set()
+
+
+def normalize_topic(topic: str) -> str:
+    # "The Football Stories" ve "football" aynı anahtara düşer.
+    cleaned = unicodedata.normalize("NFKC", topic).casefold()
+    words = set()
+    for word in re.findall(r"\w+", cleaned):
+        if word in _STOPWORDS or word.isdigit():
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return " ".join(sorted(words))[:200] or cleaned.strip()[:200]
+
+
+def trigrams(value: str) -> set[str]:
+    # pg_trgm ile aynı kural: her kelime başta iki, sonda bir boşlukla doldurulur.
+    grams = set()
+    for word in value.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def _has_pg_trgm(db) -> bool:
+    global _pg_trgm
+    if _pg_trgm is None:
+        _pg_trgm = db.bind.dialect.name == "postgresql" and db.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_stories_topic_key_trgm'")
+        ).first() is not None
+    return _pg_trgm
+
+
+def match_topic_key(db, level: str, topic_key: str) -> str:
+    exact = db.execute(
+        select(models.Story.id)
+        .where(models.Story.level == level, models.Story.topic_key == topic_key)
+        .limit(1)
+    ).first()
+    if exact:
+        return topic_key
+
+    if _has_pg_trgm(db):
+        row = db.execute(
+            text(
+                "SELECT topic_key FROM stories "
+                "WHERE level = :level AND topic_key % :key AND similarity(topic_key, :key) >= :threshold "
+                "ORDER BY similarity(topic_key, :key) DESC LIMIT 1"
+            ),
+            {"level": level, "key": topic_key, "threshold": STORY_TOPIC_SIMILARITY},
+        ).first()
+        return row[0] if row else topic_key
+
+    # Seviye başına konu sayısı küçük; uygulama tarafında taramak yeterli.
+    best_key, best_score = topic_key, STORY_TOPIC_SIMILARITY
+    for (candidate,) in db.execute(
+        select(models.Story.topic_key).where(models.Story.level == level).distinct()
+    ):
+        score = similarity(topic_key, candidate)
+        if score >= best_score:
+            best_key, best_score = candidate, score
+    return best_key
+
+
+def to_payload(story: models.Story) -> dict:
+    return {
+        "story_id": story.id,
+        "title": story.title,
+        "story": story.story,
+        "keywords": story.keywords or [],
+        "quiz": story.quiz or [],
+    }
+
+
+def _mark_read(db, user_id: int | None, story_id: int) -> None:
+    db.execute(
+        update(models.Story)
+        .where(models.Story.id == story_id)
+        .values(served_count=models.Story.served_count + 1)
+    )
+    if user_id is not None:
+        db.add(models.StoryRead(user_id=user_id, story_id=story_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Aynı hikaye eşzamanlı iki istekte okundu olarak işaretlendi.
+        db.rollback()
+
+
+def serve(topic: str, level: str, user_id: int | None) -> tuple[str, dict | None, bool]:
+    """Kütüphaneden hikaye seçer: (topic_key, hikaye veya None, büyütülmeli mi)."""
+    with database.SessionLocal() as db:
+        topic_key = match_topic_key(db, level, normalize_topic(topic))
+
+        base = select(models.Story).where(
+            models.Story.level == level, models.Story.topic_key == topic_key
+        )
+        total = db.scalar(select(func.count()).select_from(base.subquery()))
+
+        unread = base
+        if user_id is not None:
+            read_ids = select(models.StoryRead.story_id).where(models.StoryRead.user_id == user_id)
+            unread = unread.where(models.Story.id.not_in(read_ids))
+        unread_count = db.scalar(select(func.count()).select_from(unread.subquery()))
+
+        story = db.scalars(
+            unread.order_by(models.Story.served_count, models.Story.id).limit(1)
+        ).first()
+        payload = None
+        if story is not None:
+            payload = to_payload(story)
+            _mark_read(db, user_id, story.id)
+
+    # Bulunamadıysa şimdi bir tane üretilecek; bir sonrakini arka planda hazırla.
+    remaining = unread_count - 1 if payload is not None else 0
+    grow = total + 1 < STORY_LIBRARY_MAX_PER_TOPIC and (
+        remaining < STORY_LIBRARY_MIN_UNREAD or total < STORY_LIBRARY_MIN_SIZE
+    )
+    return topic_key, payload, grow
+
+
+def add(topic: str, topic_key: str, level: str, data: dict, user_id: int | None = None) -> dict:
+    with database.SessionLocal() as db:
+        story = models.Story(
+            topic=topic.strip()[:200],
+            topic_key=topic_key,
+            level=level,
+            title=str(data.get("title") or "")[:300],
+            story=str(data.get("story") or ""),
+            keywords=data.get("keywords") or [],
+            quiz=data.get("quiz") or [],
+            served_count=0,
+        )
+        db.add(story)
+        db.commit()
+        db.refresh(story)
+        payload = to_payload(story)
+        if user_id is not None:
+            _mark_read(db, user_id, story.id)
+    return payload
+
+
+def schedule_growth(topic: str, topic_key: str, level: str, generate: Generator) -> None:
+    key = (level, topic_key)
+    if key in _growing:
+        return
+    _growing.add(key)
+
+    async def _grow() -> None:
+        try:
+            data = await generate(topic, level)
+            await asyncio.to_thread(add, topic, topic_key, level, data)
+        except Exception as e:
+            print(f"Hikaye kütüphanesi büyütme hatası: {e}")
+        finally:
+            _growing.discard(key)
+
+    task = asyncio.create_task(_grow())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
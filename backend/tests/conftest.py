@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Backend modülleri düz yapıda; testler onları doğrudan import eder.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main'i import eden testler dış servislere bağlanmasın.
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault(
+    "SQLALCHEMY_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+os.environ.setdefault("DAILY_BATCH_ENABLED", "0")
+os.environ.setdefault("STREAK_RESET_INTERVAL_SECONDS", "0")
+
+
+@pytest.fixture
+def client():
+    import migrations
+    from fastapi.testclient import TestClient
+    from main import app
+
+    migrations.migrate()
+    return TestClient(app)
+
+
+@pytest.fixture
+def login(client):
+    def _login(username: str) -> dict:
+        client.post(
+            "/register", json={"username": username, "email": f"{username}@example.com", "password": "secret123"}
+        )
+        token = client.post("/login", json={"username": username, "password": "secret123"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    return _login
@@ -0,0 +1,16 @@
+def test_not_modified_bootstrap_carries_etag(client, login):
+    headers = login("etag_user")
+
+    first = client.get("/bootstrap", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    by_combined = client.get("/bootstrap", headers={**headers, "If-None-Match": etag})
+    assert by_combined.status_code == 304
+    assert by_combined.headers["ETag"] == etag
+
+    by_sections = client.get(
+        "/bootstrap", headers={**headers, "If-None-Match": ", ".join(first.json()["etags"].values())}
+    )
+    assert by_sections.status_code == 304
+    assert by_sections.headers["ETag"] == etag
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+import cache
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    return cache.SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+
+
+@pytest.mark.parametrize("backend_name", ["memory", "sqlite"])
+def test_entries_expire_after_ttl(backend_name, sqlite_backend):
+    backend = sqlite_backend if backend_name == "sqlite" else cache.MemoryBackend()
+    backend.set("k", {"v": 1}, ttl_seconds=0.05)
+    assert backend.get("k") == {"v": 1}
+    time.sleep(0.1)
+    assert backend.get("k") is None
+
+
+def test_hits_only_touch_accessed_at_after_interval(sqlite_backend, monkeypatch):
+    sqlite_backend.set("k", 1, ttl_seconds=60)
+    conn = sqlite_backend._conn()
+
+    writes = conn.total_changes
+    assert sqlite_backend.get("k") == 1
+    assert conn.total_changes == writes
+
+    monkeypatch.setattr(cache, "CACHE_TOUCH_INTERVAL_SECONDS", 0)
+    assert sqlite_backend.get("k") == 1
+    assert conn.total_changes == writes + 1
+
+
+def test_get_or_compute_is_single_flight(sqlite_backend):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return "value"
+
+    async def run():
+        # İkinci Cache ayrı bir worker gibidir: süreç içi tekilleştirme yerine
+        # SQLite kilit kaydını görür.
+        same_worker = cache.Cache("t", 60, sqlite_backend)
+        other_worker = cache.Cache("t", 60, sqlite_backend)
+        return await asyncio.gather(
+            same_worker.get_or_compute("k", compute),
+            same_worker.get_or_compute("k", compute),
+            other_worker.get_or_compute("k", compute),
+        )
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert [value for value, _ in results] == ["value"] * 3
+    assert sorted(source for _, source in results) == ["inflight", "inflight", "miss"]
+
+
+def test_stale_lock_is_taken_over(sqlite_backend, monkeypatch):
+    assert sqlite_backend.try_lock("t:k", "dead-worker", ttl_seconds=0.2)
+    assert not sqlite_backend.try_lock("t:k", "other", ttl_seconds=60)
+
+    monkeypatch.setattr(cache, "CACHE_LOCK_TIMEOUT_SECONDS", 0.5)
+
+    async def compute():
+        return "fresh"
+
+    value, source = asyncio.run(cache.Cache("t", 60, sqlite_backend).get_or_compute("k", compute))
+    assert (value, source) == ("fresh", "miss")
+    assert sqlite_backend.get("t:k") == "fresh"
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+import cassette
+
+RESPONSE = {
+    "id": "x",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "m",
+    "choices": [
+        {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "hi"}}
+    ],
+}
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(cassette, "CASSETTE_DIR", str(tmp_path))
+    monkeypatch.setattr(cassette, "CASSETTE_MODE", "replay_fast")
+    cassette._write(cassette._endpoint_path("flashcards"), {"response": RESPONSE})
+
+
+def _call():
+    return asyncio.run(cassette.call("chat", "flashcards", {"prompt": "new"}, None))
+
+
+def test_replay_miss_raises_by_default(replay):
+    with pytest.raises(cassette.CassetteMissError):
+        _call()
+
+
+def test_endpoint_fallback_is_opt_in(replay, monkeypatch):
+    monkeypatch.setattr(cassette, "CASSETTE_FALLBACK", "endpoint")
+    assert _call().choices[0].message.content == "hi"
@@ -0,0 +1,68 @@
+import pytest
+from groq.types.chat import ChatCompletion
+
+import llm
+import main
+
+REPLY = '{"reply": "Sure!", "has_mistake": false, "correction": "", "explanation_tr": ""}'
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    calls = []
+
+    async def chat_completion(endpoint, **kwargs):
+        calls.append(kwargs["messages"])
+        return ChatCompletion.model_validate(
+            {
+                "id": "x",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "m",
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": REPLY}}
+                ],
+            }
+        )
+
+    monkeypatch.setattr(llm, "chat_completion", chat_completion)
+    monkeypatch.setattr(main, "chat_sessions", main.sessions.SessionStore())
+    return calls
+
+
+def test_stateless_chat_does_not_store_sessions(client):
+    response = client.post("/chat", json={"message": "Hi", "scenario": "cafe"})
+
+    assert response.status_code == 200
+    assert "session_id" not in response.json()
+    assert len(main.chat_sessions) == 0
+
+
+def test_sessions_are_opt_in_and_owned(client, login):
+    owner = login("chat_owner")
+    other = login("chat_other")
+
+    assert "session_id" not in client.post("/start_chat", headers=owner, json={"scenario": "cafe"}).json()
+    started = client.post("/start_chat", headers=owner, json={"scenario": "cafe", "keep_history": True})
+    session_id = started.json()["session_id"]
+
+    body = {"message": "A latte please", "scenario": "cafe", "session_id": session_id}
+    assert client.post("/chat", headers=owner, json=body).json()["session_id"] == session_id
+    assert client.post("/chat", headers=other, json=body).status_code == 404
+    assert client.post("/chat", json=body).status_code == 404
+    assert client.post("/chat", headers=owner, json={**body, "session_id": "guessed"}).status_code == 404
+
+
+def test_websocket_does_not_attach_to_someone_elses_session(client, login):
+    owner = login("ws_owner")
+    other = login("ws_other")
+    session_id = client.post(
+        "/start_chat", headers=owner, json={"scenario": "cafe", "keep_history": True}
+    ).json()["session_id"]
+    token = other["Authorization"].split()[1]
+
+    with client.websocket_connect(f"/ws/chat?token={token}&scenario=cafe&session_id={session_id}") as ws:
+        ready = ws.receive_json()
+
+    assert ready["type"] == "ready"
+    assert ready["session_id"] != session_id
@@ -0,0 +1,36 @@
+import chunking
+
+
+def _round_trip(text, max_chars):
+    chunks = chunking.split_text(text, max_chars)
+    return chunks, chunking.join([chunk for chunk, _ in chunks], [sep for _, sep in chunks])
+
+
+def test_short_paragraphs_share_a_chunk():
+    text = "First para.\n\nSecond para."
+    assert chunking.split_text(text, 500) == [(text, "")]
+
+
+def test_paragraph_boundaries_are_kept():
+    chunks, joined = _round_trip("First para.\n\n  \nSecond para.", 15)
+    assert chunks == [("First para.", "\n\n"), ("Second para.", "")]
+    assert joined == "First para.\n\nSecond para."
+
+
+def test_oversized_sentence_splits_on_words():
+    sentence = "Three four five six seven eight nine ten eleven."
+    chunks, joined = _round_trip(f"One two. {sentence}\n\nNext.", 20)
+    assert chunks == [
+        ("One two.", " "),
+        ("Three four five six", " "),
+        ("seven eight nine ten", " "),
+        ("eleven.", "\n\n"),
+        ("Next.", ""),
+    ]
+    assert joined == f"One two. {sentence}\n\nNext."
+
+
+def test_empty_input_has_no_chunks():
+    assert chunking.split_text("", 20) == []
+    assert chunking.split_text("  \n\n \n", 20) == []
+    assert chunking.join([], []) == ""
@@ -0,0 +1,32 @@
+import random
+
+import main
+import stories
+
+
+def _topics(payload):
+    return [q["topic"] for q in payload["questions"]]
+
+
+def test_quiz_topic_mapping_points_to_real_question_tags():
+    tags = {q["topic"] for q in main.DAILY_TEST_QUESTIONS}
+    for mapped in main.QUIZ_TOPIC_DAILY_TAGS.values():
+        assert set(mapped) <= tags
+
+
+def test_weak_quiz_topic_moves_matching_questions_forward():
+    key = stories.normalize_topic("Past Tense Review")
+    baseline = main._daily_test_payload(1, random.Random("seed"))
+    focused = main._daily_test_payload(1, random.Random("seed"), focus_topic_key=key)
+
+    available = sum(q["topic"] == "past simple" for q in main.DAILY_TEST_QUESTIONS[:15])
+    assert _topics(focused)[:available] == ["past simple"] * available
+    assert _topics(focused) != _topics(baseline)
+
+
+def test_unknown_topic_leaves_selection_unchanged():
+    baseline = main._daily_test_payload(1, random.Random("seed"))
+    focused = main._daily_test_payload(
+        1, random.Random("seed"), focus_topic_key=stories.normalize_topic("Food and Drinks Vocabulary")
+    )
+    assert _topics(focused) == _topics(baseline)
@@ -0,0 +1,23 @@
+import main
+
+
+def test_job_results_are_only_visible_to_their_owner(client, login, monkeypatch):
+    async def _story_for(topic, level, user_id):
+        return {"story": f"{topic} for {user_id}"}
+
+    monkeypatch.setattr(main, "_story_for", _story_for)
+    owner = login("job_owner")
+    other = login("job_other")
+
+    with client:
+        submitted = client.post("/jobs/story", headers=owner, json={"topic": "cats", "level": "A1"})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+
+        done = client.get(f"/jobs/{job_id}?wait=5", headers=owner)
+        assert done.status_code == 200
+        assert done.json()["status"] == "done"
+
+        assert client.get(f"/jobs/{job_id}", headers=other).status_code == 404
+        assert client.get(f"/jobs/{job_id}").status_code == 401
+        assert client.post("/jobs/story", json={"topic": "cats", "level": "A1"}).status_code == 401
@@ -0,0 +1,15 @@
+import lexicon
+
+
+def test_ed_ending_words_are_not_mistaken_for_past_tense():
+    assert lexicon.lookup("seed") is None
+    need = lexicon.lookup("need")
+    assert need["word"] == "need" and "lemma" not in need
+    assert lexicon.lookup("used")["lemma"] == "use"
+
+
+def test_regular_inflections_still_resolve():
+    assert lexicon.lookup("agreed")["lemma"] == "agree"
+    assert lexicon.lookup("seeing")["lemma"] == "see"
+    assert lexicon.lookup("hoped")["lemma"] == "hope"
+    assert lexicon.lookup("stopped")["lemma"] == "stop"
@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+
+def test_updates_from_threads_are_not_lost():
+    counter = metrics.Counter("c", "test", ("route",))
+    histogram = metrics.Histogram("h", "test", ("route",))
+
+    def work(i):
+        for _ in range(1000):
+            counter.inc(str(i % 4))
+            histogram.observe(str(i % 4), value=0.01)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(16)))
+
+    assert sum(counter.get(str(i)) for i in range(4)) == 16_000
+    assert sum(histogram.counts().values()) == 16_000
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+import placement
+
+
+def test_legacy_routes_are_gone_and_cannot_set_level(client, login):
+    headers = login("legacy")
+
+    assert client.get("/generate_placement_test", headers=headers).status_code == 410
+    assert client.post("/jobs/placement_test", headers=headers).status_code == 410
+    response = client.post("/submit_placement_test", headers=headers, json={"correct_count": 10})
+
+    assert response.status_code == 410
+    assert client.get("/profile", headers=headers).json()["level"] == 1
+
+
+def test_estimate_moves_with_answers():
+    prior, prior_se = placement.estimate([])
+    right, right_se = placement.estimate([{"item_id": "b1-3", "correct": True}])
+    wrong, _ = placement.estimate([{"item_id": "b1-3", "correct": False}])
+
+    assert prior == pytest.approx(0.0, abs=1e-9)
+    assert wrong < prior < right
+    assert right_se < prior_se
+
+
+def test_next_item_picks_informative_unasked_items(monkeypatch):
+    monkeypatch.setattr(placement, "PLACEMENT_EXPOSURE_TOP", 1)
+    theta = 1.0
+    best = max(placement.ITEM_BANK, key=lambda item: placement.information(theta, item))
+    assert placement.next_item(theta, set()) is best
+
+    asked = set()
+    rng = random.Random(0)
+    for _ in placement.ITEM_BANK:
+        item = placement.next_item(theta, asked, rng)
+        assert item["id"] not in asked
+        asked.add(item["id"])
+    assert placement.next_item(theta, asked) is None
+
+
+def test_is_finished_stops_on_se_or_max_items(monkeypatch):
+    monkeypatch.setattr(placement, "PLACEMENT_MIN_ITEMS", 5)
+    monkeypatch.setattr(placement, "PLACEMENT_MAX_ITEMS", 12)
+    monkeypatch.setattr(placement, "PLACEMENT_TARGET_SE", 0.5)
+
+    assert not placement.is_finished(4, 0.1)  # en az soru sayısına ulaşmadı
+    assert not placement.is_finished(6, 0.8)
+    assert placement.is_finished(6, 0.4)
+    assert placement.is_finished(12, 0.8)
@@ -0,0 +1,22 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import middleware
+import profiling
+
+
+def test_profile_key_is_generated_server_side(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILES", profiling.ProfileStore())
+    app = Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))])
+    client = TestClient(middleware.ProfilingMiddleware(app))
+    headers = {profiling.PROFILE_HEADER: "secret", "x-request-id": "victim"}
+
+    first = client.get("/", headers=headers).headers["x-profile-id"]
+    second = client.get("/", headers=headers).headers["x-profile-id"]
+
+    assert first != second and "victim" not in (first, second)
+    assert profiling.PROFILES.get("victim") is None
+    assert profiling.PROFILES.get(first)["client_request_id"] == "victim"
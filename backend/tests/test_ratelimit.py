@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import main
+import ratelimit
+
+
+def test_peek_does_not_spend_tokens():
+    limiter = ratelimit.TokenBucketLimiter(per_minute=0.001, burst=1)
+    assert limiter.peek("k") == 0
+    assert limiter.acquire("k") == 0
+    assert limiter.peek("k") > 0
+    assert limiter.acquire("k") > 0
+
+
+def test_ip_rejection_does_not_charge_user_bucket(monkeypatch):
+    user_limiter = ratelimit.TokenBucketLimiter(per_minute=0.001, burst=2)
+    ip_limiter = ratelimit.TokenBucketLimiter(per_minute=0.001, burst=1)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(main, "user_rate_limiter", user_limiter)
+    monkeypatch.setattr(main, "ip_rate_limiter", ip_limiter)
+    check = main.rate_limit_dep("test")
+    request = Request({"type": "http", "headers": [], "client": ("10.0.0.1", 1)})
+    authorization = f"Bearer {main.create_access_token(data={'sub': 'ali'})}"
+
+    asyncio.run(check(request, authorization))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(check(request, authorization))
+    assert exc.value.status_code == 429
+    # İlk istek bir token harcadı, IP'de reddedilen ikincisi harcamadı.
+    assert user_limiter.peek("ali") == 0
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+import segmenter
+
+
+@pytest.mark.parametrize(
+    "glued, expected",
+    [
+        ("Thesunwasshiningandthebirdsweresinging.", "The sun was shining and the birds were singing."),
+        ("Theydidn'twanttogohome.", "They didn't want to go home."),
+        # İsimler sözlük parçalarına bölünmez.
+        ("Therewasagirlnamed" "Ayşewholivedinasmallvillage.", "There was a girl named Ayşe who lived in a small village."),
+        ("KeremandZeynepplayedinthegarden.", "Kerem and Zeynep played in the garden."),
+        ("ElifandhermotherwenttoIstanbul.", "Elif and her mother went to Istanbul."),
+    ],
+)
+def test_fix_spacing(glued, expected):
+    fixed, confidence = segmenter.fix_spacing(glued)
+    assert fixed == expected
+    assert confidence >= segmenter.MIN_CONFIDENCE
+
+
+def test_non_ascii_letters_do_not_split_words():
+    fixed, _ = segmenter.fix_spacing("Ayşe ve Gülşen geldi.")
+    assert fixed == "Ayşe ve Gülşen geldi."
+
+
+@pytest.mark.parametrize("glued", ["Kerem'sdogrunsfast.", "Xqzvbnmwrtplkmnb went home."])
+def test_unsure_repairs_fall_back(glued):
+    _, confidence = segmenter.fix_spacing(glued)
+    assert confidence < segmenter.MIN_CONFIDENCE
+
+
+def test_long_capitalized_run_is_linear():
+    # İsim bölme her önek için yeniden DP çalıştırdığında bu metin saniyeler sürüyordu.
+    run = "Kerem" + "andthedogwalkedtotheparkwithhisfriend" * 19
+    text = " ".join([run + "."] * 5)
+    start = time.perf_counter()
+    fixed, confidence = segmenter.fix_spacing(text)
+    assert time.perf_counter() - start < 1.0
+    assert fixed.startswith("Kerem and the dog walked to the park")
+    assert confidence >= segmenter.MIN_CONFIDENCE
+
+
+def test_oversized_text_is_not_repaired_locally(monkeypatch):
+    monkeypatch.setattr(segmenter, "MAX_FIX_CHARS", 10)
+    assert segmenter.fix_spacing("Thesunwasshining.") == ("Thesunwasshining.", 0.0)
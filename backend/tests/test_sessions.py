@@ -0,0 +1,73 @@
+import asyncio
+
+import sessions
+
+
+def _chat(store, session, i):
+    store.append(session, "user", f"message {i}")
+    store.append(session, "assistant", f"reply {i}")
+
+
+def test_short_turns_are_summarized_before_leaving_the_prompt():
+    summarized = []
+
+    async def summarize(summary, turns):
+        summarized.extend(turn["content"] for turn in turns)
+        return "summary"
+
+    async def run():
+        store = sessions.SessionStore(window_turns=4, token_budget=10_000)
+        session = store.start(1, "cafe")
+        for i in range(10):
+            _chat(store, session, i)
+            store.maybe_compact(session, summarize)
+            await asyncio.sleep(0)
+        sent = [m["content"] for m in store.build_messages(session, "system", "next")]
+        return session, sent
+
+    session, sent = asyncio.run(run())
+    # Her eski tur ya özette ya da promptta; hiçbiri kaybolmaz.
+    for i in range(10):
+        assert f"message {i}" in summarized or f"message {i}" in sent
+    assert session.summary == "summary"
+    assert len(session.turns) <= 8
+
+
+def test_failed_summary_keeps_turns_until_hard_limit():
+    async def summarize(summary, turns):
+        raise RuntimeError("down")
+
+    async def run():
+        store = sessions.SessionStore(window_turns=2, token_budget=10_000)
+        session = store.start(1, "cafe")
+        for i in range(20):
+            _chat(store, session, i)
+            store.maybe_compact(session, summarize)
+            await asyncio.sleep(0)
+        return session
+
+    session = asyncio.run(run())
+    assert 2 < len(session.turns) <= 8 + 2
+    assert session.turns[-1]["content"] == "reply 19"
+
+
+def test_sessions_are_bound_to_their_owner():
+    store = sessions.SessionStore()
+    session = store.start(1, "cafe")
+
+    assert store.get(session.id, 1, "cafe") is session
+    assert store.get(session.id, 2, "cafe") is None
+    assert store.get(session.id, None, "cafe") is None
+    assert store.get(session.id, 1, "interview") is None
+    assert store.get("guessed", 1, "cafe") is None
+
+
+def test_one_session_per_user():
+    store = sessions.SessionStore()
+    first = store.start(1, "cafe")
+    second = store.start(1, "interview")
+    store.start(2, "cafe")
+
+    assert store.get(first.id, 1, "cafe") is None
+    assert store.get(second.id, 1, "interview") is second
+    assert len(store) == 2
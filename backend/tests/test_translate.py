@@ -0,0 +1,37 @@
+import pytest
+
+import main
+import ratelimit
+
+
+@pytest.fixture
+def fake_translate(monkeypatch):
+    calls = []
+
+    async def _translate_chunk(text):
+        calls.append(text)
+        return text.upper()
+
+    monkeypatch.setattr(main, "_translate_chunk", _translate_chunk)
+    return calls
+
+
+def test_too_many_chunks_is_rejected_before_any_llm_call(client, fake_translate):
+    # Karakter sınırının altında ama her paragraf ayrı bir parça.
+    text = "\n\n".join(["word " * 90] * (main.TRANSLATE_MAX_CHUNKS + 1))
+    assert len(text) <= main.TRANSLATE_MAX_CHARS
+
+    assert client.post("/translate", json={"text": text}).status_code == 413
+    assert client.post("/translate", json={"text": "a" * (main.TRANSLATE_MAX_CHARS + 1)}).status_code == 413
+    assert fake_translate == []
+
+
+def test_rate_limit_is_charged_per_chunk(client, fake_translate, monkeypatch):
+    limiter = ratelimit.TokenBucketLimiter(per_minute=0.001, burst=3)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(main, "ip_rate_limiter", limiter)
+    text = "\n\n".join(["word " * 90] * 3)
+
+    assert client.post("/translate", json={"text": text}).status_code == 200
+    assert len(fake_translate) == 3
+    assert client.post("/translate", json={"text": "hi"}).status_code == 429
@@ -29,6 +29,8 @@ class _ChatScreenState extends State<ChatScreen> {
   bool isRecording = false;
   bool isLoading = false;
   String? _recordedFilePath;
+  // Sunucudaki sohbet geçmişi; /start_chat döndürür, /chat'e geri gönderilir.
+  String? _sessionId;
 
   String selectedLanguage = 'en';
 
@@ -85,6 +87,15 @@ class _ChatScreenState extends State<ChatScreen> {
     });
   }
 
+  Future<Map<String, String>> _jsonHeaders() async {
+    final prefs = await SharedPreferences.getInstance();
+    final token = prefs.getString('user_token');
+    return {
+      "Content-Type": "application/json",
+      if (token != null) "Authorization": "Bearer $token",
+    };
+  }
+
   Future<void> _startScenario() async {
     if (messages.isNotEmpty) return;
 
@@ -92,13 +103,14 @@ class _ChatScreenState extends State<ChatScreen> {
     try {
       final response = await http.post(
         Uri.parse('$baseUrl/start_chat'),
-        headers: {"Content-Type": "application/json"},
-        body: jsonEncode({"scenario": widget.scenario}),
+        headers: await _jsonHeaders(),
+        body: jsonEncode({"scenario": widget.scenario, "keep_history": true}),
       );
 
       if (response.statusCode == 200) {
         final data = jsonDecode(utf8.decode(response.bodyBytes));
         if (data is Map<String, dynamic>) {
+          _sessionId = data['session_id'] as String?;
           _handleResponseData(data);
         }
       }
@@ -246,14 +258,12 @@ class _ChatScreenState extends State<ChatScreen> {
     setState(() => isLoading = true);
 
     try {
-      final response = await http.post(
-        Uri.parse('$baseUrl/chat'),
-        headers: {"Content-Type": "application/json"},
-        body: jsonEncode({
-          "message": text,
-          "scenario": widget.scenario,
-        }),
-      );
+      var response = await _postChat(text);
+      if (response.statusCode == 404 && _sessionId != null) {
+        // Oturumun süresi dolmuş; geçmişsiz devam et.
+        _sessionId = null;
+        response = await _postChat(text);
+      }
       _handleResponse(response);
     } catch (e) {
       _showError("Bağlantı hatası: $e");
@@ -262,6 +272,18 @@ class _ChatScreenState extends State<ChatScreen> {
     }
   }
 
+  Future<http.Response> _postChat(String text) async {
+    return http.post(
+      Uri.parse('$baseUrl/chat'),
+      headers: await _jsonHeaders(),
+      body: jsonEncode({
+        "message": text,
+        "scenario": widget.scenario,
+        if (_sessionId != null) "session_id": _sessionId,
+      }),
+    );
+  }
+
   Future<void> toggleRecording() async {
     _stopSpeaking();
     if (isRecording) {
@@ -14,9 +14,11 @@ class PlacementScreen extends StatefulWidget {
 }
 
 class _PlacementScreenState extends State<PlacementScreen> {
-  List<dynamic> questions = [];
-  int currentQuestionIndex = 0;
-  int correctAnswers = 0;
+  // Uyarlanabilir test: sorular tek tek gelir, cevaplar sunucuda puanlanır.
+  String? testId;
+  Map<String, dynamic>? question;
+  int answered = 0;
+  int maxItems = 12;
   bool isLoading = true;
   bool isSubmitting = false;
   bool showTranslation = false;
@@ -26,20 +28,23 @@ class _PlacementScreenState extends State<PlacementScreen> {
   @override
   void initState() {
     super.initState();
-    _fetchTest();
+    _startTest();
   }
 
-  Future<void> _fetchTest() async {
+  Future<Map<String, String>> _headers() async {
     final prefs = await SharedPreferences.getInstance();
     final token = prefs.getString('user_token');
+    return {
+      "Content-Type": "application/json",
+      "Authorization": "Bearer $token",
+    };
+  }
 
+  Future<void> _startTest() async {
     try {
-      final response = await http.get(
-        Uri.parse('$baseUrl/generate_placement_test'),
-        headers: {
-          "Content-Type": "application/json",
-          "Authorization": "Bearer $token",
-        },
+      final response = await http.post(
+        Uri.parse('$baseUrl/placement_test/start'),
+        headers: await _headers(),
       );
 
       if (!mounted) return;
@@ -47,7 +52,9 @@ class _PlacementScreenState extends State<PlacementScreen> {
       if (response.statusCode == 200) {
         final data = jsonDecode(utf8.decode(response.bodyBytes));
         setState(() {
-          questions = data['questions'] ?? [];
+          testId = data['test_id'];
+          question = data['question'];
+          maxItems = data['max_items'] ?? maxItems;
           isLoading = false;
         });
       } else {
@@ -59,77 +66,67 @@ class _PlacementScreenState extends State<PlacementScreen> {
     }
   }
 
-  void _answerQuestion(String selectedOption) {
-    final currentQ = questions[currentQuestionIndex];
-
-    if (selectedOption == currentQ['correct_answer']) {
-      correctAnswers++;
-    }
-
-    if (currentQuestionIndex < questions.length - 1) {
-      setState(() {
-        showTranslation = false;
-        currentQuestionIndex++;
-      });
-    } else {
-      _submitResult();
-    }
-  }
-
-  Future<void> _submitResult() async {
+  Future<void> _answerQuestion(String selectedOption) async {
+    final current = question;
+    if (current == null || testId == null) return;
     setState(() => isSubmitting = true);
-    final prefs = await SharedPreferences.getInstance();
-    final token = prefs.getString('user_token');
 
     try {
       final response = await http.post(
-        Uri.parse('$baseUrl/submit_placement_test'),
-        headers: {
-          "Content-Type": "application/json",
-          "Authorization": "Bearer $token",
-        },
-        body: jsonEncode({"correct_count": correctAnswers}),
+        Uri.parse('$baseUrl/placement_test/$testId/answer'),
+        headers: await _headers(),
+        body: jsonEncode({"item_id": current['id'], "answer": selectedOption}),
       );
 
       if (!mounted) return;
 
       if (response.statusCode == 200) {
         final data = jsonDecode(utf8.decode(response.bodyBytes));
-        final level = data['assigned_level'];
-
-        showDialog(
-          context: context,
-          barrierDismissible: false,
-          builder: (ctx) => AlertDialog(
-            title: const Text("Tebrikler!"),
-            content: Text(
-              "Testi tamamladın.\nSeviyen: $level\n+100 XP kazandın!",
-            ),
-            actions: [
-              TextButton(
-                onPressed: () {
-                  Navigator.of(context).pushReplacement(
-                    MaterialPageRoute(
-                      builder: (context) => const MainContainer(),
-                    ),
-                  );
-                },
-                child: const Text("Başla"),
-              )
-            ],
-          ),
-        );
+        if (data['done'] == true) {
+          _showResult(data['assigned_level']);
+        } else {
+          setState(() {
+            showTranslation = false;
+            answered = data['answered'] ?? answered + 1;
+            question = data['question'];
+          });
+        }
       } else {
-        _showError("Sonuç gönderilemedi: ${response.statusCode}");
+        _showError("Cevap gönderilemedi: ${response.statusCode}");
       }
     } catch (e) {
       if (!mounted) return;
-      _showError("Sonuç gönderilemedi: $e");
+      _showError("Cevap gönderilemedi: $e");
     } finally {
       if (mounted) setState(() => isSubmitting = false);
     }
   }
 
+  void _showResult(dynamic level) {
+    showDialog(
+      context: context,
+      barrierDismissible: false,
+      builder: (ctx) => AlertDialog(
+        title: const Text("Tebrikler!"),
+        content: Text(
+          "Testi tamamladın.\nSeviyen: $level\n+100 XP kazandın!",
+        ),
+        actions: [
+          TextButton(
+            onPressed: () {
+              Navigator.of(context).pushReplacement(
+                MaterialPageRoute(
+                  builder: (context) => const MainContainer(),
+                ),
+              );
+            },
+            child: const Text("Başla"),
+          )
+        ],
+      ),
+    );
+  }
+
   void _showError(String msg) {
     ScaffoldMessenger.of(context).showSnackBar(SnackBar(content: Text(msg)));
   }
@@ -140,16 +137,15 @@ class _PlacementScreenState extends State<PlacementScreen> {
       return const Scaffold(body: Center(child: CircularProgressIndicator()));
     }
 
-    if (questions.isEmpty) {
+    final question = this.question;
+    if (question == null) {
       return const Scaffold(body: Center(child: Text('No questions.')));
     }
 
-    final question = questions[currentQuestionIndex];
-
     return Scaffold(
       backgroundColor: Colors.white,
       appBar: AppBar(
-        title: Text("Level Test ${currentQuestionIndex + 1}/10"),
+        title: Text("Level Test ${answered + 1}"),
         centerTitle: true,
         backgroundColor: Colors.white,
         elevation: 0,
@@ -160,7 +156,7 @@ class _PlacementScreenState extends State<PlacementScreen> {
           crossAxisAlignment: CrossAxisAlignment.stretch,
           children: [
             LinearProgressIndicator(
-              value: (currentQuestionIndex + 1) / questions.length,
+              value: (answered + 1) / maxItems,
               backgroundColor: Colors.grey.shade200,
               color: const Color(0xFF6C63FF),
               minHeight: 8,
@@ -14,6 +14,8 @@ class QuizScreen extends StatefulWidget {
 
 class _QuizScreenState extends State<QuizScreen> {
   List<dynamic> questions = [];
+  String? quizId;
+  final List<String> answers = [];
   int currentQuestionIndex = 0;
   int correctAnswers = 0;
   bool isLoading = true;
@@ -47,6 +49,7 @@ class _QuizScreenState extends State<QuizScreen> {
         final data = jsonDecode(utf8.decode(response.bodyBytes));
         setState(() {
           questions = data['questions'] ?? [];
+          quizId = data['quiz_id'];
           isLoading = false;
         });
       } else {
@@ -65,6 +68,7 @@ class _QuizScreenState extends State<QuizScreen> {
 
   void _answerQuestion(String selectedOption) {
     final currentQ = questions[currentQuestionIndex];
+    answers.add(selectedOption);
     if (selectedOption == currentQ['correct_answer']) {
       correctAnswers++;
     }
@@ -81,6 +85,8 @@ class _QuizScreenState extends State<QuizScreen> {
   Future<void> _finishQuiz() async {
     setState(() => isCompleted = true);
 
+    await _submitAnswers();
+
     final bool isPassed = correctAnswers >= 3;
 
     if (isPassed) {
@@ -108,6 +114,30 @@ class _QuizScreenState extends State<QuizScreen> {
     );
   }
 
+  // Cevaplar sunucuda puanlanır; konu bazlı doğruluk buradan beslenir.
+  Future<void> _submitAnswers() async {
+    if (quizId == null) return;
+    final prefs = await SharedPreferences.getInstance();
+    final token = prefs.getString('user_token');
+
+    try {
+      final response = await http.post(
+        Uri.parse('$baseUrl/quiz/$quizId/submit'),
+        headers: {
+          "Content-Type": "application/json",
+          "Authorization": "Bearer $token",
+        },
+        body: jsonEncode({"answers": answers}),
+      );
+      if (response.statusCode == 200) {
+        final data = jsonDecode(utf8.decode(response.bodyBytes));
+        correctAnswers = data['score'] ?? correctAnswers;
+      }
+    } catch (_) {
+      // Gönderilemezse yerel puan kullanılır.
+    }
+  }
+
   Future<void> _completeUnitBackend() async {
     final prefs = await SharedPreferences.getInstance();
     final token = prefs.getString('user_token');